@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Record/replay stand-in for the Gemini generateContent API
+
+Record once against the real API (the stand-in proxies and saves each
+response as a fixture), then replay offline with synthetic latency, errors
+and streaming chunking. Point the backend at it with GEMINI_API_BASE.
+
+Usage (from the backend directory):
+    # Record: proxy to Gemini, saving fixtures
+    python benchmarks/gemini_standin.py record --fixtures benchmarks/fixtures/gemini
+    GEMINI_API_BASE=http://127.0.0.1:8765 python main.py
+
+    # Replay: no network or real key needed
+    python benchmarks/gemini_standin.py replay --latency lognormal:900:0.4 \\
+        --error-rate 0.05 --error-status 503,429 --chunk-chars 40
+    GEMINI_API_KEY=offline GEMINI_API_BASE=http://127.0.0.1:8765 python main.py
+
+Latency specs: fixed:MS, uniform:LOW_MS:HIGH_MS, lognormal:MEDIAN_MS:SIGMA,
+or recorded[:SCALE] to reuse the latency measured while recording.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_FIXTURES = Path(__file__).resolve().parent / "fixtures" / "gemini"
+GEMINI_BASE = "https://generativelanguage.googleapis.com"
+
+
+def request_key(model: str, payload: Dict) -> str:
+    """Stable hash of the parts of a request that determine the response"""
+    canonical = {
+        'model': model,
+        'contents': payload.get('contents'),
+        'systemInstruction': payload.get('systemInstruction'),
+        'generationConfig': payload.get('generationConfig'),
+    }
+    return hashlib.sha1(json.dumps(canonical, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def response_text(response: Dict) -> str:
+    parts = response.get('candidates', [{}])[0].get('content', {}).get('parts', [])
+    return ''.join(part.get('text', '') for part in parts)
+
+
+def text_response(text: str, usage: Optional[Dict] = None, finish_reason: str = 'STOP') -> Dict:
+    response = {
+        'candidates': [{
+            'content': {'role': 'model', 'parts': [{'text': text}]},
+            'finishReason': finish_reason,
+        }]
+    }
+    if usage:
+        response['usageMetadata'] = usage
+    return response
+
+
+class LatencyModel:
+    """Draw per-request latency (seconds) from a spec string"""
+
+    def __init__(self, spec: str):
+        name, _, args = spec.partition(':')
+        values = [float(v) for v in args.split(':') if v]
+        self.name = name
+        self.values = values
+        if name not in ('fixed', 'uniform', 'lognormal', 'recorded'):
+            raise ValueError(f"Unknown latency distribution: {name}")
+
+    def sample(self, recorded_ms: Optional[float] = None) -> float:
+        if self.name == 'fixed':
+            ms = self.values[0]
+        elif self.name == 'uniform':
+            ms = random.uniform(self.values[0], self.values[1])
+        elif self.name == 'lognormal':
+            ms = random.lognormvariate(math.log(self.values[0]), self.values[1])
+        else:
+            ms = (recorded_ms or 0) * (self.values[0] if self.values else 1.0)
+        return max(ms, 0) / 1000
+
+
+class FixtureStore:
+    """One JSON file per recorded request, keyed by request hash"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fixtures: Dict[str, Dict] = {}
+        for path in sorted(self.directory.glob('*.json')):
+            fixture = json.loads(path.read_text(encoding='utf-8'))
+            self.fixtures[fixture['key']] = fixture
+        self._keys: List[str] = sorted(self.fixtures)
+
+    def __len__(self) -> int:
+        return len(self.fixtures)
+
+    def find(self, key: str, strict: bool) -> Optional[Dict]:
+        fixture = self.fixtures.get(key)
+        if fixture is None and not strict and self._keys:
+            # Unrecorded request: pick a fixture deterministically
+            fixture = self.fixtures[self._keys[int(key, 16) % len(self._keys)]]
+        return fixture
+
+    def save(self, fixture: Dict) -> Path:
+        path = self.directory / f"{fixture['key']}.json"
+        path.write_text(json.dumps(fixture, indent=2), encoding='utf-8')
+        self.fixtures[fixture['key']] = fixture
+        self._keys = sorted(self.fixtures)
+        return path
+
+
+def create_app(args) -> FastAPI:
+    app = FastAPI(title="Gemini stand-in")
+    store = FixtureStore(args.fixtures)
+    latency = LatencyModel(args.latency)
+    error_statuses = [int(s) for s in args.error_status.split(',') if s]
+    stats = {'requests': 0, 'replayed': 0, 'recorded': 0, 'errors': 0, 'misses': 0}
+
+    async def record(model: str, method: str, payload: Dict, key: str, api_key: str) -> JSONResponse:
+        started = time.perf_counter()
+        async with httpx.AsyncClient(timeout=httpx.Timeout(120.0, connect=10.0)) as client:
+            if method == 'streamGenerateContent':
+                # Store streamed responses whole; replay re-chunks them
+                texts, usage = [], None
+                async with client.stream(
+                    "POST", f"{args.upstream}/v1beta/models/{model}:{method}",
+                    params={'alt': 'sse', 'key': api_key}, json=payload
+                ) as upstream:
+                    if not upstream.is_success:
+                        body = await upstream.aread()
+                        return JSONResponse(status_code=upstream.status_code, content=json.loads(body))
+                    async for line in upstream.aiter_lines():
+                        if line.startswith('data:'):
+                            chunk = json.loads(line[len('data:'):])
+                            texts.append(response_text(chunk))
+                            usage = chunk.get('usageMetadata', usage)
+                data = text_response(''.join(texts), usage)
+            else:
+                upstream = await client.post(
+                    f"{args.upstream}/v1beta/models/{model}:{method}",
+                    params={'key': api_key}, json=payload
+                )
+                if not upstream.is_success:
+                    return JSONResponse(status_code=upstream.status_code, content=upstream.json())
+                data = upstream.json()
+
+        store.save({
+            'key': key,
+            'model': model,
+            'request': payload,
+            'response': data,
+            'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+        })
+        stats['recorded'] += 1
+        return JSONResponse(content=data)
+
+    def error_response(status: int) -> JSONResponse:
+        stats['errors'] += 1
+        return JSONResponse(
+            status_code=status,
+            content={'error': {'code': status, 'message': f"Injected error ({status})", 'status': 'UNAVAILABLE'}}
+        )
+
+    def replay_text(fixture: Dict) -> str:
+        text = response_text(fixture['response'])
+        if args.truncate_rate and random.random() < args.truncate_rate:
+            # Cut mid-output, as when maxOutputTokens is reached
+            text = text[:random.randint(len(text) // 3, max(len(text) * 2 // 3, 1))]
+        return text
+
+    @app.post("/v1beta/models/{target}")
+    async def generate(target: str, request: Request):
+        stats['requests'] += 1
+        model, _, method = target.partition(':')
+        payload = await request.json()
+        key = request_key(model, payload)
+
+        if args.mode == 'record':
+            return await record(model, method, payload, key, request.query_params.get('key', ''))
+
+        fixture = store.find(key, args.strict)
+        if fixture is None:
+            stats['misses'] += 1
+            return JSONResponse(status_code=404, content={'error': {'code': 404, 'message': "No fixture recorded for this request"}})
+
+        delay = latency.sample(fixture.get('latency_ms'))
+        if error_statuses and random.random() < args.error_rate:
+            await asyncio.sleep(delay * random.random())
+            return error_response(random.choice(error_statuses))
+
+        stats['replayed'] += 1
+        text = replay_text(fixture)
+        usage = fixture['response'].get('usageMetadata')
+
+        if method != 'streamGenerateContent':
+            await asyncio.sleep(delay)
+            return JSONResponse(content=text_response(text, usage))
+
+        chunks = [text[i:i + args.chunk_chars] for i in range(0, len(text), args.chunk_chars)] or ['']
+
+        async def events():
+            # Time to first chunk, then the rest spread over the remaining latency
+            await asyncio.sleep(delay * args.first_chunk_share)
+            gap = delay * (1 - args.first_chunk_share) / max(len(chunks) - 1, 1)
+            for i, chunk in enumerate(chunks):
+                if i:
+                    await asyncio.sleep(gap)
+                last = i == len(chunks) - 1
+                event = text_response(chunk, usage if last else None, 'STOP' if last else None)
+                if not last:
+                    del event['candidates'][0]['finishReason']
+                yield f"data: {json.dumps(event)}\r\n\r\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def get_stats():
+        return {**stats, 'fixtures': len(store)}
+
+    return app
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Record/replay stand-in for Gemini")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES, help="Fixture directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--upstream", default=GEMINI_BASE, help="Real API base URL (record mode)")
+    parser.add_argument("--latency", default="recorded", help="Latency distribution (replay mode)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", default="503", help="Comma-separated injected status codes")
+    parser.add_argument("--truncate-rate", type=float, default=0.0,
+                        help="Fraction of responses cut off mid-output")
+    parser.add_argument("--chunk-chars", type=int, default=64, help="Characters per streamed chunk")
+    parser.add_argument("--first-chunk-share", type=float, default=0.3,
+                        help="Share of the latency spent before the first streamed chunk")
+    parser.add_argument("--strict", action="store_true",
+                        help="Return 404 for unrecorded requests instead of reusing a fixture")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible runs")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    app = create_app(args)
+    if args.mode == 'replay' and not len(FixtureStore(args.fixtures)):
+        print(f"No fixtures in {args.fixtures}; record some first", file=sys.stderr)
+        return 1
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Measure backend import time and fail if startup regresses
+
+Imports main in fresh interpreters (python -X importtime), reports the
+median and the slowest modules, and exits non-zero if the median is over
+budget, a saved baseline is exceeded by more than the tolerance, or a
+library that should load lazily (PDF/DOCX parsing, scikit-learn, scipy,
+pandas, pyarrow) is imported at startup.
+
+Usage (from the backend directory):
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 9 --max-ms 1200
+    python benchmarks/import_time.py --baseline import_baseline.json --update-baseline
+    python benchmarks/import_time.py --baseline import_baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Must not be imported until a request needs them
+DEFERRED_MODULES = ['pdfplumber', 'pdfminer', 'docx', 'sklearn', 'scipy', 'pandas', 'pyarrow']
+
+
+def import_once(module: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """Import module in a fresh interpreter; returns (total ms, {module: (self us, cumulative us)})"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+        env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    timings: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings[module][1] / 1000, timings
+
+
+def loaded_modules(module: str) -> List[str]:
+    """Top-level packages present in sys.modules after importing module"""
+    code = f"import json, sys, {module}; print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure backend import time")
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time (after one warm-up)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    parser.add_argument("--max-ms", type=float, default=1500.0, help="Fail if the median exceeds this")
+    parser.add_argument("--baseline", type=Path, help="JSON file with a previous median to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown over the baseline (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run's median to --baseline")
+    args = parser.parse_args()
+
+    # The first run warms the filesystem cache and compiles bytecode
+    import_once(args.module)
+    totals, slowest = [], {}
+    for _ in range(args.runs):
+        total_ms, timings = import_once(args.module)
+        totals.append(total_ms)
+        for name, (self_us, _) in timings.items():
+            slowest[name] = min(slowest.get(name, self_us), self_us)
+    median_ms = statistics.median(totals)
+
+    print(f"import {args.module}: median {median_ms:.0f} ms, min {min(totals):.0f} ms, "
+          f"max {max(totals):.0f} ms ({args.runs} runs)")
+    print(f"Slowest modules (self time, best of {args.runs}):")
+    for name, self_us in sorted(slowest.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    eager = sorted(set(DEFERRED_MODULES) & set(loaded_modules(args.module)))
+    if eager:
+        failures.append(f"imported at startup but should be lazy: {', '.join(eager)}")
+    if median_ms > args.max_ms:
+        failures.append(f"median {median_ms:.0f} ms is over the {args.max_ms:.0f} ms budget")
+
+    if args.baseline and args.update_baseline:
+        args.baseline.write_text(json.dumps({'module': args.module, 'median_ms': round(median_ms, 1)}, indent=2))
+        print(f"Baseline written to {args.baseline}")
+    elif args.baseline:
+        baseline_ms = json.loads(args.baseline.read_text())['median_ms']
+        limit_ms = baseline_ms * (1 + args.tolerance)
+        print(f"Baseline {baseline_ms:.0f} ms, limit {limit_ms:.0f} ms")
+        if median_ms > limit_ms:
+            failures.append(f"median {median_ms:.0f} ms regressed past the baseline limit of {limit_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
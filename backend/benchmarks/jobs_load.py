@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Load-test the job recommendations endpoint
+
+Sends concurrent requests to a running backend (typically pointed at the
+Gemini stand-in) and reports latency percentiles, status codes and how many
+responses were served from cache. --distinct controls the cache hit rate.
+
+Usage:
+    python benchmarks/jobs_load.py --requests 200 --concurrency 20 --distinct 10
+    python benchmarks/jobs_load.py --path /api/jobs/recommendations/stream
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+ROLES = [
+    "data analyst", "software engineer", "frontend developer", "backend engineer",
+    "data scientist", "devops engineer", "product manager", "machine learning engineer",
+    "business analyst", "qa engineer", "mobile developer", "security engineer",
+]
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+async def run(args) -> int:
+    queries = [
+        f"{ROLES[i % len(ROLES)]}" + (f" {i // len(ROLES)}" if i >= len(ROLES) else "")
+        for i in range(args.distinct)
+    ]
+    latencies, statuses, cached = [], Counter(), Counter()
+    first_byte = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+        async def one() -> None:
+            params = {'query': random.choice(queries)}
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    async with client.stream("GET", args.path, params=params) as response:
+                        ttfb = None
+                        body = b''
+                        async for chunk in response.aiter_bytes():
+                            if ttfb is None:
+                                ttfb = time.perf_counter() - started
+                            body += chunk
+                    statuses[response.status_code] += 1
+                    first_byte.append((ttfb or 0) * 1000)
+                    if b'"cached": true' in body or b'"cached":true' in body:
+                        cached['hit'] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.distinct} distinct queries")
+    print(f"throughput   {args.requests / elapsed:.1f} req/s")
+    print(f"latency ms   p50 {percentile(latencies, 0.5):.1f}  p95 {percentile(latencies, 0.95):.1f}  "
+          f"p99 {percentile(latencies, 0.99):.1f}  mean {statistics.mean(latencies):.1f}")
+    if first_byte:
+        print(f"first byte   p50 {percentile(first_byte, 0.5):.1f}  p95 {percentile(first_byte, 0.95):.1f}")
+    print(f"status       {dict(statuses)}")
+    print(f"cached       {cached['hit']}/{args.requests}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test job recommendations")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Backend base URL")
+    parser.add_argument("--path", default="/api/jobs/recommendations")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--distinct", type=int, default=len(ROLES), help="Distinct queries to spread over")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Compare tokens and latency per job-recommendation request
+
+Runs the same queries with the original verbose prompt (free-form output,
+4096-token budget) and with the compact prompt plus structured JSON output,
+and reports prompt/output tokens as counted by the provider.
+
+Usage (from the backend directory):
+    python benchmarks/prompt_tokens.py
+    python benchmarks/prompt_tokens.py --count 4 --repeat 3
+    python benchmarks/prompt_tokens.py --dry-run    # no API calls, estimates only
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from routes.jobs import (GENERATION_OPTIONS, build_job_search_prompt, generation_options,
+                         llm_router, parse_gemini_response)
+from services.http_client import close_http_client, start_http_client
+
+QUERIES = [
+    ("data analyst", "SQL, Python, Tableau", None),
+    ("frontend developer", "React, TypeScript", "Remote"),
+    ("machine learning engineer", None, "Bangalore"),
+]
+
+# The prompt as it was before compact mode, kept as the baseline
+VERBOSE_PROMPT = """You are an AI job recommendation system. Generate realistic and relevant job postings based on the user's search criteria.
+
+Search Query: {query}
+User Skills: {skills}
+Preferred Location: {location}
+
+Generate 6-8 diverse job recommendations that match the search criteria. For each job, provide:
+
+1. title: Job title (string)
+2. company: Company name (string, make it realistic but fictional)
+3. location: Location (string, include remote options if applicable)
+4. salary: Salary range (string, e.g., "$90k - $120k")
+5. posted: How long ago posted (string, e.g., "2 days ago", "1 week ago")
+6. description: Brief job description (1-2 sentences)
+7. tags: Array of 3-5 relevant skills/technologies (array of strings)
+8. type: Employment type (string: "Full-time", "Part-time", "Contract")
+9. experience: Required experience level (string: "Entry", "Mid", "Senior", "Lead")
+
+Make the jobs diverse in terms of:
+- Company size (startups, mid-size, enterprise)
+- Location (mix of remote, hybrid, on-site)
+- Experience levels
+- Salary ranges appropriate for the role level
+
+Return ONLY a valid JSON array of job objects. Do not include any markdown formatting or explanations.
+"""
+
+
+def verbose_request(query, skills, location, count):
+    prompt = VERBOSE_PROMPT.format(
+        query=query or "software developer",
+        skills=skills or "Not specified",
+        location=location or "Any location"
+    )
+    return prompt, dict(GENERATION_OPTIONS)
+
+
+def compact_request(query, skills, location, count):
+    return build_job_search_prompt(query, skills, location, count), generation_options(count)
+
+
+MODES = {'verbose': verbose_request, 'compact': compact_request}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) for dry runs"""
+    return max(1, round(len(text) / 4))
+
+
+async def measure(provider, mode: str, count: int, repeat: int) -> dict:
+    prompt_tokens, output_tokens, latencies, jobs = [], [], [], []
+    for query, skills, location in QUERIES:
+        for _ in range(repeat):
+            prompt, options = MODES[mode](query, skills, location, count)
+            before = dict(provider.tokens)
+            started = time.perf_counter()
+            text = await provider.generate(prompt, options)
+            latencies.append((time.perf_counter() - started) * 1000)
+            prompt_tokens.append(provider.tokens['prompt'] - before['prompt'])
+            output_tokens.append(provider.tokens['output'] - before['output'])
+            try:
+                jobs.append(len(parse_gemini_response(text)))
+            except Exception:
+                jobs.append(0)
+    return {
+        'prompt_tokens': statistics.mean(prompt_tokens),
+        'output_tokens': statistics.mean(output_tokens),
+        'latency_ms': statistics.median(latencies),
+        'jobs': statistics.mean(jobs),
+    }
+
+
+def dry_run(count: int) -> dict:
+    results = {}
+    for mode, build in MODES.items():
+        prompt_tokens, budgets = [], []
+        for query, skills, location in QUERIES:
+            prompt, options = build(query, skills, location, count)
+            prompt_tokens.append(estimate_tokens(prompt + options.get('system_instruction', '')))
+            budgets.append(options['max_output_tokens'])
+        results[mode] = {
+            'prompt_tokens': statistics.mean(prompt_tokens),
+            'output_budget': statistics.mean(budgets),
+        }
+    return results
+
+
+def print_table(results: dict) -> None:
+    columns = list(next(iter(results.values())))
+    print(f"{'mode':<10}" + ''.join(f"{column:>16}" for column in columns))
+    for mode, row in results.items():
+        print(f"{mode:<10}" + ''.join(f"{row[column]:>16.1f}" for column in columns))
+
+
+async def run(args) -> int:
+    provider = llm_router.get('gemini') or (llm_router.providers[0] if llm_router.providers else None)
+    if provider is None:
+        print("No LLM provider configured; set GEMINI_API_KEY or use --dry-run", file=sys.stderr)
+        return 1
+
+    await start_http_client()
+    try:
+        results = {}
+        for mode in MODES:
+            results[mode] = await measure(provider, mode, args.count, args.repeat)
+    finally:
+        await close_http_client()
+
+    print(f"Per-request averages over {len(QUERIES) * args.repeat} requests ({provider.name}, count={args.count})")
+    print_table(results)
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Report tokens per job-recommendation request")
+    parser.add_argument("--count", type=int, default=6, help="Jobs requested in compact mode")
+    parser.add_argument("--repeat", type=int, default=1, help="Requests per query and mode")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Estimate prompt tokens and output budgets without calling the API")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        print(f"Estimated per-request tokens (count={args.count})")
+        print_table(dry_run(args.count))
+        return 0
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
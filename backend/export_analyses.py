@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Export stored analyses to a flattened columnar file
+
+Usage (from the backend directory):
+    python export_analyses.py --output analyses.csv
+    python export_analyses.py --format parquet --output analyses.parquet  (requires pyarrow)
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from services.export_service import export_columnar
+from services.storage_service import create_analysis_store
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export stored analyses for BI tools")
+    parser.add_argument("--output", required=True, help="Destination file path")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="parquet requires pyarrow")
+    parser.add_argument("--storage", choices=["files", "segments"],
+                        help="Storage engine to read (defaults to ANALYSIS_STORAGE)")
+    parser.add_argument("--chunk-size", type=int, default=10000,
+                        help="Rows held in memory per write")
+    args = parser.parse_args()
+
+    if args.storage:
+        os.environ['ANALYSIS_STORAGE'] = args.storage
+    # Read-only, so it is safe to run beside the server
+    try:
+        store = create_analysis_store(read_only=True)
+    except FileNotFoundError as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+
+    try:
+        count = export_columnar(
+            store.iter_analyses(), Path(args.output), args.format, args.chunk_size
+        )
+    except (RuntimeError, ValueError) as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+
+    print(f"Exported {count} analyses to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ Main application entry point
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+import asyncio
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -13,9 +14,19 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-from routes.upload import router as upload_router
+from routes.upload import router as upload_router, analysis_store, analysis_index, resume_text_index
 from routes.analysis import router as analysis_router
-from routes.jobs import router as jobs_router
+from routes.jobs import (
+    router as jobs_router, job_catalog, recommendation_cache, recommendation_prefetcher, JOBS_CATALOG_PATH
+)
+from routes.analyses import router as analyses_router
+from routes.metrics import router as metrics_router, prometheus_router
+from routes.dashboard import router as dashboard_router
+from routes.admin import router as admin_router
+from services.http_client import start_http_client, close_http_client
+from utils.loop_watchdog import loop_watchdog
+from utils.profiling import ProfilingMiddleware
+from utils.timing import RequestTimingMiddleware
 
 # Create FastAPI app
 app = FastAPI(
@@ -33,6 +44,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ?profile=1 with X-Admin-Token runs a request under cProfile
+app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so request latency includes CORS and error handling
+app.add_middleware(RequestTimingMiddleware)
+
 # Ensure uploads directory exists
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
@@ -41,6 +58,36 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 app.include_router(upload_router, prefix="/api", tags=["Upload"])
 app.include_router(analysis_router, prefix="/api", tags=["Analysis"])
 app.include_router(jobs_router, prefix="/api", tags=["Jobs"])
+app.include_router(analyses_router, prefix="/api", tags=["Analyses"])
+app.include_router(metrics_router, prefix="/api", tags=["Metrics"])
+app.include_router(dashboard_router, prefix="/api", tags=["Dashboard"])
+app.include_router(prometheus_router, tags=["Metrics"])
+app.include_router(admin_router, prefix="/api", tags=["Admin"])
+
+@app.on_event("startup")
+async def startup():
+    """Open the shared upstream client and build in-memory search indexes"""
+    if os.getenv('LOOP_WATCHDOG', '1') == '1':
+        loop_watchdog.start()
+    await start_http_client()
+    await asyncio.to_thread(analysis_index.sync, analysis_store)
+    # A preforking launcher may already have loaded it in the master
+    if JOBS_CATALOG_PATH and job_catalog.path is None:
+        await asyncio.to_thread(job_catalog.load, JOBS_CATALOG_PATH)
+    # Import scikit-learn's hash and fit the seed IDF here rather than on
+    # the event loop during the first jobs request
+    if recommendation_cache.second_tier is not None:
+        await asyncio.to_thread(recommendation_cache.second_tier.warm_up)
+    recommendation_prefetcher.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Flush pending analysis writes and close pooled connections"""
+    await recommendation_prefetcher.stop()
+    await close_http_client()
+    analysis_store.close()
+    resume_text_index.close()
+    await loop_watchdog.stop()
 
 @app.get("/")
 async def root():
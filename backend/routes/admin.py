@@ -0,0 +1,83 @@
+"""
+Admin Route
+Diagnostics for operators: per-request profiles and event-loop stalls (requires X-Admin-Token)
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from utils.admin import require_admin
+from utils.loop_watchdog import loop_watchdog, loop_lag
+from utils.profiling import get_report, profile_reports
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/admin/profiles")
+async def list_profiles():
+    """
+    Recent profiled requests, newest first
+
+    Profile a request by repeating it with ?profile=1 and the admin
+    token; its response carries the X-Profile-Id to look up here.
+    """
+
+    return JSONResponse(
+        status_code=200,
+        content={
+            "success": True,
+            "profiles": [
+                {
+                    key: report[key]
+                    for key in ('id', 'method', 'path', 'status', 'duration_ms', 'created_at', 'areas_ms')
+                }
+                for report in reversed(profile_reports)
+            ]
+        }
+    )
+
+
+@router.get("/admin/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|text)$", description="json, or text for the pstats call tree")
+):
+    """Time per area, top functions and the call-tree report of one profiled request"""
+
+    report = get_report(profile_id)
+    if report is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Profile not found: {profile_id}"
+        )
+
+    if format == "text":
+        return PlainTextResponse(report['report'])
+    return JSONResponse(
+        status_code=200,
+        content={"success": True, "profile": report}
+    )
+
+
+@router.get("/admin/event-loop")
+async def event_loop_stalls(
+    limit: int = Query(10, ge=1, le=100, description="Number of top blocking sites to return")
+):
+    """
+    Event-loop lag and the calls that blocked the loop
+
+    Sites are ranked by total time blocked; each names the innermost
+    frame in our code and the library call it was in. Recent stalls
+    include the full captured stack. Per worker under serve.py.
+    """
+
+    return JSONResponse(
+        status_code=200,
+        content={
+            "success": True,
+            "watchdog": loop_watchdog.stats(),
+            "lag_histogram": next((value for _, value in loop_lag.samples()), None),
+            "top_sites": loop_watchdog.top_sites(limit),
+            "recent_stalls": list(reversed(loop_watchdog.recent_stalls))
+        }
+    )
@@ -0,0 +1,112 @@
+"""
+Analyses Route
+Bulk export, structured search and full-text search over stored analyses
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
+from typing import Optional
+
+from routes.upload import analysis_store, analysis_index, resume_text_index
+from services.export_service import iter_ndjson
+from utils.admin import require_admin
+
+router = APIRouter()
+
+
+@router.get("/analyses/export", dependencies=[Depends(require_admin)])
+def export_analyses():
+    """
+    Stream every stored analysis as newline-delimited JSON
+
+    Analyses are read and serialized one at a time, so memory use stays
+    constant regardless of how many analyses are stored. Contains every
+    candidate's contact details, so it requires X-Admin-Token.
+    """
+
+    return StreamingResponse(
+        iter_ndjson(analysis_store.iter_analyses()),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="analyses.ndjson"'}
+    )
+
+
+@router.get("/analyses/search", dependencies=[Depends(require_admin)])
+async def search_analyses(
+    skills: Optional[str] = Query(None, description="Comma-separated skills, all required"),
+    min_fit: Optional[int] = Query(None, ge=0, le=100, description="Minimum fit score"),
+    max_fit: Optional[int] = Query(None, ge=0, le=100, description="Maximum fit score"),
+    top_role: Optional[str] = Query(None, description="Required top role match"),
+    role: Optional[str] = Query(None, description="Role that must appear in role matches"),
+    min_role_match: Optional[int] = Query(None, ge=0, le=100, description="Minimum match for role"),
+    limit: int = Query(50, ge=1, le=1000, description="Maximum results to return")
+):
+    """
+    Search stored analyses by skill, role and score range
+
+    All filters are combined with AND, e.g.
+    ?skills=SQL,Tableau&min_fit=75&top_role=Data Analyst. Results include
+    candidate names and emails, so it requires X-Admin-Token.
+    """
+
+    if min_role_match is not None and not role:
+        raise HTTPException(
+            status_code=400,
+            detail="min_role_match requires a role"
+        )
+
+    skill_list = [s.strip() for s in skills.split(',') if s.strip()] if skills else None
+    # Pick up analyses other workers stored or deleted since the last search
+    await asyncio.to_thread(analysis_index.sync, analysis_store)
+
+    total, results = analysis_index.search(
+        skills=skill_list,
+        min_fit=min_fit,
+        max_fit=max_fit,
+        top_role=top_role,
+        role=role,
+        min_role_match=min_role_match,
+        limit=limit
+    )
+
+    return JSONResponse(
+        status_code=200,
+        content={
+            "success": True,
+            "total": total,
+            "count": len(results),
+            "results": results
+        }
+    )
+
+
+@router.get("/analyses/text-search", dependencies=[Depends(require_admin)])
+async def text_search_analyses(
+    q: str = Query(..., min_length=1, description="Free-text query over resume text"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum results to return")
+):
+    """
+    Full-text search across uploaded resumes
+
+    Returns file_ids ranked by BM25 relevance with a snippet of matching
+    text. Snippets are raw resume text, so it requires X-Admin-Token.
+    """
+
+    try:
+        results = await resume_text_index.search(q, limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error searching resume text: {str(e)}"
+        )
+
+    return JSONResponse(
+        status_code=200,
+        content={
+            "success": True,
+            "query": q,
+            "count": len(results),
+            "results": results
+        }
+    )
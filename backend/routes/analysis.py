@@ -5,16 +5,12 @@ Provides analysis data for frontend display
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
-from pathlib import Path
-import json
 
 router = APIRouter()
 
-# Storage paths
-ANALYSIS_DIR = Path("uploads/analysis")
-
-# In-memory storage (shared with upload route)
-from routes.upload import latest_analysis
+# In-memory storage, analysis store and search index (shared with upload route)
+from routes.upload import latest_analysis, analysis_store, analysis_index, resume_text_index
+from routes.jobs import recommendation_prefetcher
 
 
 @router.get("/analysis")
@@ -29,25 +25,23 @@ async def get_analysis(file_id: str = None):
     try:
         if file_id:
             # Load specific analysis from file
-            analysis_path = ANALYSIS_DIR / f"{file_id}.json"
+            analysis = await analysis_store.load(file_id)
             
-            if not analysis_path.exists():
+            if analysis is None:
                 raise HTTPException(
                     status_code=404,
                     detail=f"Analysis not found for file_id: {file_id}"
                 )
-            
-            with analysis_path.open("r") as f:
-                analysis = json.load(f)
         else:
-            # Return latest analysis from memory
-            if not latest_analysis or 'current' not in latest_analysis:
+            # Return the latest upload
+            latest = await latest_analysis.get()
+            if latest is None:
                 raise HTTPException(
                     status_code=404,
                     detail="No analysis available. Please upload a resume first."
                 )
             
-            analysis = latest_analysis['current']
+            analysis = latest[1]
         
         return JSONResponse(
             status_code=200,
@@ -70,21 +64,14 @@ async def get_analysis(file_id: str = None):
 async def get_analysis_summary():
     """Get a summary of the latest analysis"""
     
-    if not latest_analysis or 'current' not in latest_analysis:
+    latest = await latest_analysis.get()
+    if latest is None:
         raise HTTPException(
             status_code=404,
             detail="No analysis available"
         )
     
-    analysis = latest_analysis['current']
-    
-    summary = {
-        'fit_score': analysis['overall_insights']['fit_score'],
-        'role_alignment': analysis['metrics']['role_alignment'],
-        'top_role': analysis['role_matches'][0]['title'] if analysis['role_matches'] else None,
-        'skills_count': analysis['candidate_info']['skills_count'],
-        'upload_time': analysis['metadata']['upload_time']
-    }
+    summary = build_summary(latest[1])
     
     return JSONResponse(
         status_code=200,
@@ -95,24 +82,38 @@ async def get_analysis_summary():
     )
 
 
+def build_summary(analysis: dict) -> dict:
+    """Headline numbers of an analysis"""
+    
+    return {
+        'fit_score': analysis['overall_insights']['fit_score'],
+        'role_alignment': analysis['metrics']['role_alignment'],
+        'top_role': analysis['role_matches'][0]['title'] if analysis['role_matches'] else None,
+        'skills_count': analysis['candidate_info']['skills_count'],
+        'upload_time': analysis['metadata']['upload_time']
+    }
+
+
 @router.delete("/analysis/{file_id}")
 async def delete_analysis(file_id: str):
     """Delete a specific analysis"""
     
-    analysis_path = ANALYSIS_DIR / f"{file_id}.json"
-    
-    if not analysis_path.exists():
+    if not analysis_store.exists(file_id):
         raise HTTPException(
             status_code=404,
             detail=f"Analysis not found for file_id: {file_id}"
         )
     
     try:
-        analysis_path.unlink()
+        store_version = analysis_store.version()
+        await analysis_store.delete(file_id)
+        analysis_index.remove(file_id)
+        analysis_index.note_write(store_version, analysis_store.version())
+        await resume_text_index.remove(file_id)
+        recommendation_prefetcher.cancel(file_id)
         
-        # Clear from memory if it's the current analysis
-        if latest_analysis.get('file_id') == file_id:
-            latest_analysis.clear()
+        # No longer the latest analysis, in any worker
+        latest_analysis.discard(file_id)
         
         return JSONResponse(
             status_code=200,
@@ -0,0 +1,143 @@
+"""
+Dashboard Route
+Everything the dashboard shows, gathered concurrently in one round trip
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+import asyncio
+import os
+import time
+from typing import Awaitable, Dict, Optional
+
+from routes.upload import latest_analysis, analysis_store
+from routes.analysis import build_summary
+from routes.jobs import (DEFAULT_JOB_COUNT, build_job_search_prompt, call_gemini_for_jobs,
+                         job_catalog, llm_router, recommendation_cache)
+from services.job_cache import make_cache_key
+
+router = APIRouter()
+
+DASHBOARD_BUDGET_MS = int(os.getenv('DASHBOARD_BUDGET_MS', '1500'))
+
+
+@router.get("/dashboard")
+async def get_dashboard(
+    file_id: Optional[str] = Query(None, description="Analysis to show (defaults to the latest upload)"),
+    budget_ms: int = Query(DASHBOARD_BUDGET_MS, ge=50, le=30000, description="Latency budget in milliseconds")
+):
+    """
+    Get analysis, summary, upload status and job recommendations at once
+    
+    Sections run concurrently under one deadline. Each section is
+    {"status": "ok", "data": ...}, {"status": "error", "detail": ...} or,
+    if it missed the budget, {"status": "pending"}; a pending job fetch
+    keeps running and lands in the recommendations cache, so repeating the
+    request picks it up.
+    """
+    
+    started = time.perf_counter()
+    analysis_task = asyncio.ensure_future(load_analysis(file_id))
+    
+    async def summary_section() -> dict:
+        return build_summary(await asyncio.shield(analysis_task))
+    
+    async def jobs_section() -> dict:
+        return await recommend_for_analysis(await asyncio.shield(analysis_task))
+    
+    sections = await gather_with_budget({
+        'analysis': analysis_task,
+        'summary': summary_section(),
+        'jobs': jobs_section(),
+    }, budget_ms / 1000)
+    
+    # Nothing to show without an analysis
+    if analysis_task.done() and not analysis_task.cancelled():
+        error = analysis_task.exception()
+        if isinstance(error, HTTPException):
+            raise error
+    
+    latest = await latest_analysis.get()
+    current_file_id = file_id or (latest[0] if latest else None)
+    sections['upload_status'] = {
+        'status': 'ok',
+        'data': {
+            'has_analysis': latest is not None,
+            'file_id': latest[0] if latest else None
+        }
+    }
+    
+    return JSONResponse(
+        status_code=200,
+        content={
+            "success": True,
+            "file_id": current_file_id,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "sections": sections
+        }
+    )
+
+
+async def load_analysis(file_id: Optional[str]) -> dict:
+    if file_id:
+        analysis = await analysis_store.load(file_id)
+        if analysis is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Analysis not found for file_id: {file_id}"
+            )
+        return analysis
+    
+    latest = await latest_analysis.get()
+    if latest is None:
+        raise HTTPException(
+            status_code=404,
+            detail="No analysis available. Please upload a resume first."
+        )
+    return latest[1]
+
+
+async def recommend_for_analysis(analysis: dict) -> dict:
+    """Jobs for the top role: catalog matches if loaded, else cached/generated"""
+    
+    role_matches = analysis.get('role_matches', [])
+    top_role = role_matches[0]['title'] if role_matches else None
+    
+    if len(job_catalog):
+        roles = {match['title']: match.get('match', 0) / 100 for match in role_matches}
+        skills = analysis.get('candidate_info', {}).get('skills', [])
+        _, jobs = job_catalog.match(skills, roles, limit=DEFAULT_JOB_COUNT)
+        if jobs:
+            return {'source': 'catalog', 'query': top_role, 'cached': False, 'jobs': jobs}
+    
+    if not llm_router.providers:
+        raise Exception("No job catalog loaded and no LLM provider configured")
+    
+    # Same key the jobs page and the upload prefetch use
+    jobs, cached = await recommendation_cache.get_or_fetch(
+        make_cache_key(top_role, None, None, DEFAULT_JOB_COUNT),
+        lambda: call_gemini_for_jobs(
+            build_job_search_prompt(top_role, None, None, DEFAULT_JOB_COUNT), DEFAULT_JOB_COUNT
+        )
+    )
+    return {'source': 'generated', 'query': top_role, 'cached': cached, 'jobs': jobs}
+
+
+async def gather_with_budget(sections: Dict[str, Awaitable], timeout: float) -> Dict[str, dict]:
+    """Run sections concurrently; report each as ok, error or pending at the deadline"""
+    
+    tasks = {name: asyncio.ensure_future(section) for name, section in sections.items()}
+    await asyncio.wait(tasks.values(), timeout=timeout)
+    
+    results = {}
+    for name, task in tasks.items():
+        if not task.done():
+            task.cancel()
+            results[name] = {'status': 'pending'}
+        elif task.exception() is not None:
+            error = task.exception()
+            detail = error.detail if isinstance(error, HTTPException) else str(error)
+            results[name] = {'status': 'error', 'detail': detail}
+        else:
+            results[name] = {'status': 'ok', 'data': task.result()}
+    return results
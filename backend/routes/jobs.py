@@ -1,26 +1,136 @@
 """
 Job Recommendations Route
-Generates AI-powered job recommendations using Gemini API
+Generates AI-powered job recommendations using Gemini (or a fallback LLM provider)
 """
 
 from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
 import os
 import json
-import requests
-from typing import Optional
+import time
+import httpx
+from typing import AsyncIterator, Optional
+
+from routes.upload import analysis_store, analysis_listeners
+from services.http_client import get_http_client
+from services.llm_providers import ProviderError, create_provider_router
+from services.upstream_guard import UpstreamGuard, UpstreamUnavailableError
+from services.job_cache import RecommendationCache, make_cache_key
+from services.job_catalog import JobCatalog
+from services.prefetch_service import RecommendationPrefetcher
+from services.semantic_cache import SemanticQueryCache
+from utils.json_stream import JSONArrayStream, extract_array_elements
+from utils.metrics import registry
+from utils.timing import observe_stage, stage, timed_stage
 
 router = APIRouter()
 
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-GEMINI_API_URL = 'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-001:generateContent'
+# Providers in LLM_PROVIDERS order (Gemini first by default), with hedging
+# to the next provider when the first is slower than its recent p95
+llm_router = create_provider_router()
+
+parse_duration = registry.histogram(
+    'jobs_parse_duration_seconds', "Time spent parsing model output into jobs",
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+jobs_returned = registry.counter('jobs_returned_total', "Jobs parsed from model output")
+stream_first_job = registry.histogram(
+    'jobs_stream_first_job_seconds', "Time from request to the first streamed job")
+stream_duration = registry.histogram(
+    'jobs_stream_duration_seconds', "Duration of streamed generations by outcome")
+
+GENERATION_OPTIONS = {
+    'temperature': 0.8,
+    'top_k': 40,
+    'top_p': 0.95,
+    'max_output_tokens': 4096,
+}
+
+DEFAULT_JOB_COUNT = 6
+MAX_JOB_COUNT = 12
+
+# Output budget: a compact job object is ~110 tokens; the rest is headroom
+TOKENS_PER_JOB = 160
+TOKENS_OVERHEAD = 64
+
+# Schema-constrained JSON output (Gemini responseSchema) instead of prose
+JOBS_STRUCTURED_OUTPUT = os.getenv('JOBS_STRUCTURED_OUTPUT', '1') == '1'
+
+# Static instructions, sent as the system instruction so the per-request
+# prompt is a single short line and the prefix is byte-identical every call
+JOB_PROMPT_PREFIX = """You generate realistic job postings at fictional companies as a JSON array.
+Each job has: title; company; location (city, or Remote/Hybrid); salary (e.g. "$90k - $120k"); posted (e.g. "2 days ago"); description (one sentence, at most 25 words); tags (3-5 skills); type (Full-time, Part-time or Contract); experience (Entry, Mid, Senior or Lead).
+Vary company size, work arrangement, experience level and salary (matching level). Output only the JSON array."""
+
+JOB_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "title": {"type": "STRING"},
+            "company": {"type": "STRING"},
+            "location": {"type": "STRING"},
+            "salary": {"type": "STRING"},
+            "posted": {"type": "STRING"},
+            "description": {"type": "STRING"},
+            "tags": {"type": "ARRAY", "items": {"type": "STRING"}},
+            "type": {"type": "STRING", "enum": ["Full-time", "Part-time", "Contract"]},
+            "experience": {"type": "STRING", "enum": ["Entry", "Mid", "Senior", "Lead"]},
+        },
+        "required": ["title", "company", "location", "salary", "posted",
+                     "description", "tags", "type", "experience"],
+        "propertyOrdering": ["title", "company", "location", "salary", "posted",
+                             "description", "tags", "type", "experience"],
+    },
+}
+
+# Recommendations for the same normalized (query, skills, location), with a
+# second tier that also serves near-duplicate queries
+JOBS_CACHE_TTL = float(os.getenv('JOBS_CACHE_TTL_SECONDS', '300'))
+recommendation_cache = RecommendationCache(
+    ttl=JOBS_CACHE_TTL,
+    max_entries=int(os.getenv('JOBS_CACHE_MAX_ENTRIES', '1024')),
+    second_tier=SemanticQueryCache(
+        threshold=float(os.getenv('JOBS_SEMANTIC_THRESHOLD', '0.62')),
+        ttl=JOBS_CACHE_TTL
+    ) if os.getenv('JOBS_SEMANTIC_CACHE', '1') == '1' else None,
+    stale_ttl=float(os.getenv('JOBS_CACHE_STALE_SECONDS', '3600'))
+)
+
+# Real postings loaded from JOBS_CATALOG_PATH (JSONL/JSON/CSV) at startup;
+# when present, recommendations come from this index instead of the LLM
+JOBS_CATALOG_PATH = os.getenv('JOBS_CATALOG_PATH')
+JOBS_RERANK_TOP_K = int(os.getenv('JOBS_RERANK_TOP_K', '20'))
+job_catalog = JobCatalog()
+
+# Caps concurrency and request rate to match our quota, and fails fast
+# while the upstream keeps returning 429/5xx or timing out
+upstream_guard = UpstreamGuard(
+    'llm',
+    max_in_flight=int(os.getenv('JOBS_UPSTREAM_MAX_IN_FLIGHT', '8')),
+    rate_per_minute=float(os.getenv('JOBS_UPSTREAM_RPM', '60')),
+    burst=float(os.getenv('JOBS_UPSTREAM_BURST', '10')),
+    max_wait=float(os.getenv('JOBS_UPSTREAM_MAX_WAIT_SECONDS', '5')),
+    failure_threshold=int(os.getenv('JOBS_CIRCUIT_FAILURES', '5')),
+    reset_timeout=float(os.getenv('JOBS_CIRCUIT_RESET_SECONDS', '30'))
+)
+
+# Warms the cache for an uploaded resume's top roles while the upstream is
+# idle, so the jobs page that usually follows an upload is served from cache
+JOBS_PREFETCH = os.getenv('JOBS_PREFETCH', '1') == '1'
+JOBS_PREFETCH_ROLES = int(os.getenv('JOBS_PREFETCH_ROLES', '2'))
+recommendation_prefetcher = RecommendationPrefetcher(recommendation_cache, upstream_guard)
 
 
 @router.get("/jobs/recommendations")
 async def get_job_recommendations(
     query: Optional[str] = Query(None, description="Search query for job recommendations"),
     skills: Optional[str] = Query(None, description="Comma-separated skills"),
-    location: Optional[str] = Query(None, description="Preferred location")
+    location: Optional[str] = Query(None, description="Preferred location"),
+    count: int = Query(DEFAULT_JOB_COUNT, ge=1, le=MAX_JOB_COUNT, description="Number of jobs to generate"),
+    job_type: Optional[str] = Query(None, alias="type", description="Employment type filter (catalog only)"),
+    experience: Optional[str] = Query(None, description="Experience level filter (catalog only)"),
+    rerank: bool = Query(False, description="Re-rank the top catalog matches with the LLM")
 ):
     """
     Generate AI-powered job recommendations based on search query
@@ -29,33 +139,93 @@ async def get_job_recommendations(
     - query: Job search query (e.g., "software engineer", "data analyst")
     - skills: User's skills (optional)
     - location: Preferred location (optional)
+    - count: Number of jobs (default 6); also sets the output token budget
+    - type / experience: Facet filters when serving from the job catalog
+    - rerank: Let the LLM re-order the top catalog matches
     
-    Returns: List of job recommendations with details
+    When a job catalog is loaded, matching postings are returned from it
+    ("source": "catalog") with facet counts; otherwise, or when nothing
+    matches, jobs are generated ("source": "generated").
+    
+    Returns: List of job recommendations with details, and whether they
+    were served from cache. If the upstream fails or the guard refuses the
+    call, an expired cached result is served with "stale": true; without one
+    a guard refusal returns 503.
     """
     
-    if not GEMINI_API_KEY:
+    if len(job_catalog):
+        total, jobs, facets = job_catalog.search(
+            query, split_skills(skills), location, job_type, experience,
+            limit=max(count, JOBS_RERANK_TOP_K) if rerank else count
+        )
+        if total:
+            reranked = False
+            if rerank and len(jobs) > 1 and llm_router.providers:
+                jobs, reranked = await rerank_jobs(query, skills, location, jobs)
+            jobs_returned.inc(min(len(jobs), count), source='catalog')
+            return JSONResponse(
+                status_code=200,
+                content={
+                    "success": True,
+                    "query": query,
+                    "source": "catalog",
+                    "total": total,
+                    "count": min(len(jobs), count),
+                    "cached": False,
+                    "stale": False,
+                    "reranked": reranked,
+                    "facets": facets,
+                    "jobs": jobs[:count]
+                }
+            )
+    
+    if not llm_router.providers:
         raise HTTPException(
             status_code=500,
             detail="Gemini API key not configured. Please set GEMINI_API_KEY environment variable."
         )
     
+    cache_key = make_cache_key(query, skills, location, count)
+    stale = False
+    
     try:
         # Build the prompt for Gemini
-        prompt = build_job_search_prompt(query, skills, location)
+        prompt = build_job_search_prompt(query, skills, location, count)
         
-        # Call Gemini API
-        jobs = await call_gemini_for_jobs(prompt)
+        # Call Gemini API, unless a cached or in-flight result can be shared
+        try:
+            jobs, cached = await recommendation_cache.get_or_fetch(
+                cache_key,
+                lambda: call_gemini_for_jobs(prompt, count)
+            )
+        except Exception as e:
+            # Prefer an expired result over an error while the upstream is down
+            jobs = recommendation_cache.get_stale(cache_key)
+            if jobs is None:
+                if isinstance(e, UpstreamUnavailableError):
+                    raise HTTPException(
+                        status_code=503,
+                        detail=f"Job recommendations temporarily unavailable: {str(e)}",
+                        headers={"Retry-After": str(int(upstream_guard.retry_after()))}
+                    )
+                raise
+            cached = stale = True
         
         return JSONResponse(
             status_code=200,
             content={
                 "success": True,
                 "query": query,
+                "source": "generated",
                 "count": len(jobs),
+                "cached": cached,
+                "stale": stale,
                 "jobs": jobs
             }
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -63,129 +233,423 @@ async def get_job_recommendations(
         )
 
 
-def build_job_search_prompt(query: Optional[str], skills: Optional[str], location: Optional[str]) -> str:
-    """Build a prompt for Gemini to generate job recommendations"""
+@router.get("/jobs/recommendations/stream")
+async def stream_job_recommendations(
+    query: Optional[str] = Query(None, description="Search query for job recommendations"),
+    skills: Optional[str] = Query(None, description="Comma-separated skills"),
+    location: Optional[str] = Query(None, description="Preferred location"),
+    count: int = Query(DEFAULT_JOB_COUNT, ge=1, le=MAX_JOB_COUNT, description="Number of jobs to generate"),
+    job_type: Optional[str] = Query(None, alias="type", description="Employment type filter (catalog only)"),
+    experience: Optional[str] = Query(None, description="Experience level filter (catalog only)"),
+    output_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$", description="ndjson or sse")
+):
+    """
+    Stream job recommendations as the model generates them
     
-    base_prompt = """You are an AI job recommendation system. Generate realistic and relevant job postings based on the user's search criteria.
+    Each job is validated and sent as soon as its JSON object is complete.
+    Events are {"type": "job", "job": {...}}, then a final
+    {"type": "done", "count": n, "cached": bool} or {"type": "error", "detail": "..."}.
+    If the upstream fails before any job was sent, a stale cached result is
+    replayed instead (with "stale": true on the done event).
+    With format=sse the same payloads are sent as server-sent events.
+    A loaded job catalog is searched first, with the same type / experience
+    filters as /jobs/recommendations.
+    """
+    
+    if llm_router.get('gemini') is None and not len(job_catalog):
+        raise HTTPException(
+            status_code=500,
+            detail="Gemini API key not configured. Please set GEMINI_API_KEY environment variable."
+        )
+    
+    cache_key = make_cache_key(query, skills, location, count)
+    prompt = build_job_search_prompt(query, skills, location, count)
+    
+    def encode(event: dict) -> bytes:
+        data = json.dumps(event)
+        if output_format == "sse":
+            return f"event: {event['type']}\ndata: {data}\n\n".encode('utf-8')
+        return (data + "\n").encode('utf-8')
+    
+    async def events() -> AsyncIterator[bytes]:
+        if len(job_catalog):
+            total, catalog_jobs, _ = job_catalog.search(
+                query, split_skills(skills), location, job_type, experience, limit=count
+            )
+            if total:
+                for job in catalog_jobs:
+                    yield encode({"type": "job", "job": job})
+                yield encode({"type": "done", "count": len(catalog_jobs), "total": total,
+                              "cached": False, "source": "catalog"})
+                return
+        
+        cached_jobs = recommendation_cache.lookup(cache_key)
+        if cached_jobs is not None:
+            for job in cached_jobs:
+                yield encode({"type": "job", "job": job})
+            yield encode({"type": "done", "count": len(cached_jobs), "cached": True})
+            return
+        
+        # Nothing in the catalog matched and there is no model to stream from
+        if llm_router.get('gemini') is None:
+            yield encode({"type": "error", "detail": "Gemini API key not configured. Please set GEMINI_API_KEY environment variable."})
+            return
+        
+        jobs = []
+        try:
+            async with upstream_guard.acquire():
+                try:
+                    async for job in stream_gemini_jobs(prompt, count):
+                        jobs.append(job)
+                        yield encode({"type": "job", "job": job})
+                except Exception as e:
+                    upstream_guard.record_failure(e)
+                    raise
+                upstream_guard.record_success()
+            if not jobs:
+                raise Exception("No valid jobs found in response")
+        except Exception as e:
+            stale_jobs = None if jobs else recommendation_cache.get_stale(cache_key)
+            if stale_jobs is not None:
+                for job in stale_jobs:
+                    yield encode({"type": "job", "job": job})
+                yield encode({"type": "done", "count": len(stale_jobs), "cached": True, "stale": True})
+            elif isinstance(e, UpstreamUnavailableError):
+                yield encode({"type": "error", "detail": f"Job recommendations temporarily unavailable: {str(e)}"})
+            else:
+                yield encode({"type": "error", "detail": f"Error generating job recommendations: {str(e)}"})
+            return
+        
+        recommendation_cache.store(cache_key, jobs)
+        yield encode({"type": "done", "count": len(jobs), "cached": False})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if output_format == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-Search Query: {query}
-User Skills: {skills}
-Preferred Location: {location}
 
-Generate 6-8 diverse job recommendations that match the search criteria. For each job, provide:
+@router.get("/jobs/for-analysis/{file_id}")
+async def get_jobs_for_analysis(
+    file_id: str,
+    limit: int = Query(DEFAULT_JOB_COUNT, ge=1, le=50, description="Number of jobs to return"),
+    location: Optional[str] = Query(None, description="Location filter"),
+    job_type: Optional[str] = Query(None, alias="type", description="Employment type filter"),
+    experience: Optional[str] = Query(None, description="Experience level filter")
+):
+    """
+    Match catalog jobs to a stored resume analysis
+    
+    The candidate's parsed skills and role matches form a query vector that
+    is ranked against job vectors built when the catalog was loaded, so no
+    model call is made.
+    
+    Returns: Top jobs with similarity, matched_skills and missing_skills
+    """
+    
+    if not len(job_catalog):
+        raise HTTPException(
+            status_code=500,
+            detail="No job catalog loaded. Please set JOBS_CATALOG_PATH environment variable."
+        )
+    
+    analysis = await analysis_store.load(file_id)
+    if analysis is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Analysis not found for file_id: {file_id}"
+        )
+    
+    try:
+        skills = analysis.get('candidate_info', {}).get('skills', [])
+        roles = {
+            match['title']: match.get('match', 0) / 100
+            for match in analysis.get('role_matches', [])
+        }
+        total, jobs = job_catalog.match(skills, roles, location, job_type, experience, limit=limit)
+        
+        return JSONResponse(
+            status_code=200,
+            content={
+                "success": True,
+                "file_id": file_id,
+                "skills": skills,
+                "roles": list(roles),
+                "total": total,
+                "count": len(jobs),
+                "jobs": jobs
+            }
+        )
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error matching jobs: {str(e)}"
+        )
 
-1. title: Job title (string)
-2. company: Company name (string, make it realistic but fictional)
-3. location: Location (string, include remote options if applicable)
-4. salary: Salary range (string, e.g., "$90k - $120k")
-5. posted: How long ago posted (string, e.g., "2 days ago", "1 week ago")
-6. description: Brief job description (1-2 sentences)
-7. tags: Array of 3-5 relevant skills/technologies (array of strings)
-8. type: Employment type (string: "Full-time", "Part-time", "Contract")
-9. experience: Required experience level (string: "Entry", "Mid", "Senior", "Lead")
 
-Make the jobs diverse in terms of:
-- Company size (startups, mid-size, enterprise)
-- Location (mix of remote, hybrid, on-site)
-- Experience levels
-- Salary ranges appropriate for the role level
+def prefetch_recommendations(file_id: str, analysis: dict) -> int:
+    """
+    Queue background fetches for an analysis' top role matches
+    
+    Each role is prefetched as a plain query (what the jobs page sends) and
+    the top role also with the candidate's skills. Skipped when a job
+    catalog answers instead of the LLM.
+    """
+    
+    if not JOBS_PREFETCH or not llm_router.providers or len(job_catalog):
+        return 0
+    
+    roles = [match['title'] for match in analysis.get('role_matches', [])[:JOBS_PREFETCH_ROLES]]
+    skills = ', '.join(analysis.get('candidate_info', {}).get('skills', [])[:10]) or None
+    requests = [(role, None) for role in roles]
+    if roles and skills:
+        requests.append((roles[0], skills))
+    
+    def fetcher(prompt: str):
+        return lambda: call_gemini_for_jobs(prompt, DEFAULT_JOB_COUNT)
+    
+    return recommendation_prefetcher.schedule(file_id, [
+        (
+            make_cache_key(role, role_skills, None, DEFAULT_JOB_COUNT),
+            fetcher(build_job_search_prompt(role, role_skills, None, DEFAULT_JOB_COUNT))
+        )
+        for role, role_skills in requests
+    ])
 
-Return ONLY a valid JSON array of job objects. Do not include any markdown formatting or explanations.
-"""
+
+analysis_listeners.append(prefetch_recommendations)
+
+
+@router.delete("/jobs/prefetch/{file_id}")
+async def cancel_prefetch(file_id: str):
+    """Cancel queued and running recommendation prefetches for an upload"""
     
-    return base_prompt.format(
-        query=query or "software developer",
-        skills=skills or "Not specified",
-        location=location or "Any location"
+    cancelled = recommendation_prefetcher.cancel(file_id)
+    return JSONResponse(
+        status_code=200,
+        content={
+            "success": True,
+            "file_id": file_id,
+            "cancelled": cancelled
+        }
     )
 
 
-async def call_gemini_for_jobs(prompt: str) -> list:
-    """Call Gemini API to generate job recommendations"""
+def split_skills(skills: Optional[str]) -> list:
+    return [skill.strip() for skill in (skills or '').split(',') if skill.strip()]
+
+
+RERANK_INSTRUCTION = """You rank job postings for a job seeker. Each line is: id | title | company | location | experience | tags.
+Return a JSON array of the ids, best match first."""
+
+
+@timed_stage('jobs', 'rerank')
+async def rerank_jobs(query: Optional[str], skills: Optional[str], location: Optional[str],
+                      jobs: list) -> tuple:
+    """
+    Re-order catalog matches with the LLM; returns (jobs, reranked)
     
-    url = f"{GEMINI_API_URL}?key={GEMINI_API_KEY}"
+    Only ids are generated, so the call is cheap. Any failure keeps the
+    index order.
+    """
     
-    payload = {
-        "contents": [{
-            "parts": [{
-                "text": prompt
-            }]
-        }],
-        "generationConfig": {
-            "temperature": 0.8,
-            "topK": 40,
-            "topP": 0.95,
-            "maxOutputTokens": 4096,
-        }
-    }
+    lines = [
+        f"{job['id']} | {job['title']} | {job['company']} | {job['location']} | "
+        f"{job['experience']} | {', '.join(job['tags'][:6])}"
+        for job in jobs
+    ]
+    prompt = "Search: {query}. Skills: {skills}. Location: {location}.\nJobs:\n{jobs}".format(
+        query=query or "any",
+        skills=skills or "not specified",
+        location=location or "any",
+        jobs='\n'.join(lines)
+    )
+    options = dict(GENERATION_OPTIONS)
+    options.update({
+        'temperature': 0.0,
+        'max_output_tokens': 16 * len(jobs) + 32,
+        'system_instruction': RERANK_INSTRUCTION,
+    })
+    if JOBS_STRUCTURED_OUTPUT:
+        options['response_schema'] = {"type": "ARRAY", "items": {"type": "STRING"}}
     
     try:
-        response = requests.post(
-            url,
-            headers={"Content-Type": "application/json"},
-            json=payload,
-            timeout=30
-        )
-        
-        if not response.ok:
-            error_data = response.json()
-            raise Exception(f"Gemini API error: {error_data.get('error', {}).get('message', response.text)}")
-        
-        data = response.json()
-        
-        # Extract the generated text
-        generated_text = data.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
+        text = await upstream_guard.call(lambda: llm_router.generate(prompt, options))
+    except Exception:
+        return jobs, False
+    
+    # Order by first mention; ids the model left out keep their index order
+    positions = {}
+    for job in jobs:
+        index = text.find(f'"{job["id"]}"')
+        positions[job['id']] = index if index != -1 else len(text) + len(positions)
+    return sorted(jobs, key=lambda job: positions[job['id']]), True
+
+
+@timed_stage('jobs', 'build_prompt')
+def build_job_search_prompt(
+    query: Optional[str],
+    skills: Optional[str],
+    location: Optional[str],
+    count: int = DEFAULT_JOB_COUNT
+) -> str:
+    """Build the per-request part of the prompt; instructions live in JOB_PROMPT_PREFIX"""
+    
+    return "Generate {count} jobs. Search: {query}. Skills: {skills}. Location: {location}.".format(
+        count=count,
+        query=query or "software developer",
+        skills=skills or "not specified",
+        location=location or "any"
+    )
+
+
+def generation_options(count: int) -> dict:
+    """Generation options with an output budget sized to the number of jobs"""
+    
+    options = dict(GENERATION_OPTIONS)
+    options['max_output_tokens'] = min(
+        count * TOKENS_PER_JOB + TOKENS_OVERHEAD, GENERATION_OPTIONS['max_output_tokens']
+    )
+    options['system_instruction'] = JOB_PROMPT_PREFIX
+    if JOBS_STRUCTURED_OUTPUT:
+        options['response_schema'] = JOB_RESPONSE_SCHEMA
+    return options
+
+
+async def call_gemini_for_jobs(prompt: str, count: int = DEFAULT_JOB_COUNT) -> list:
+    """Generate job recommendations through the provider chain"""
+    
+    options = generation_options(count)
+    try:
+        with stage('jobs', 'upstream'):
+            generated_text = await upstream_guard.call(
+                lambda: llm_router.generate(prompt, options)
+            )
         
         if not generated_text:
             raise Exception("No response from Gemini API")
         
         # Parse the JSON response
-        jobs = parse_gemini_response(generated_text)
+        parse_started = time.perf_counter()
+        try:
+            jobs = parse_gemini_response(generated_text)
+        except Exception:
+            parse_duration.observe(time.perf_counter() - parse_started, outcome='error')
+            raise
+        parse_duration.observe(time.perf_counter() - parse_started, outcome='ok')
+        observe_stage('jobs', 'parse', time.perf_counter() - parse_started)
+        jobs_returned.inc(min(len(jobs), count), source='generated')
         
-        return jobs
+        return jobs[:count]
     
-    except requests.exceptions.Timeout:
-        raise Exception("Gemini API request timed out")
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Network error calling Gemini API: {str(e)}")
+    except UpstreamUnavailableError:
+        raise
     except Exception as e:
-        raise Exception(f"Error calling Gemini API: {str(e)}")
+        raise Exception(f"Error calling Gemini API: {str(e)}") from e
+
+
+async def stream_gemini_jobs(prompt: str, count: int = DEFAULT_JOB_COUNT) -> AsyncIterator[dict]:
+    """Yield validated jobs from Gemini's streaming endpoint as they complete"""
+    
+    gemini = llm_router.get('gemini')
+    url = f"{gemini.url(stream=True)}?alt=sse&key={gemini.api_key}"
+    parser = JSONArrayStream()
+    position = 0
+    started = time.perf_counter()
+    outcome = 'error'
+    
+    try:
+        async with get_http_client().stream(
+            "POST", url, json=gemini.build_payload(prompt, generation_options(count)), timeout=gemini.timeout
+        ) as response:
+            if not response.is_success:
+                body = await response.aread()
+                try:
+                    message = json.loads(body).get('error', {}).get('message', body.decode())
+                except ValueError:
+                    message = body.decode(errors='replace')
+                raise ProviderError(
+                    'gemini', f"API error: {message}",
+                    status_code=response.status_code,
+                    retryable=response.status_code == 429 or response.status_code >= 500
+                )
+            
+            # Each server-sent event carries the next slice of generated text
+            async for line in response.aiter_lines():
+                if not line.startswith('data:'):
+                    continue
+                chunk = json.loads(line[len('data:'):])
+                gemini.record_usage_metadata(chunk)
+                parts = chunk.get('candidates', [{}])[0].get('content', {}).get('parts', [])
+                text = ''.join(part.get('text', '') for part in parts)
+                
+                for job in parser.feed(text):
+                    job = validate_job(job, position)
+                    if job is not None and position < count:
+                        if not position:
+                            stream_first_job.observe(time.perf_counter() - started)
+                        position += 1
+                        yield job
+                
+                if parser.done or position >= count:
+                    break
+        outcome = 'ok'
+    
+    except (GeneratorExit, asyncio.CancelledError):
+        outcome = 'cancelled'
+        raise
+    except httpx.TimeoutException:
+        raise ProviderError('gemini', "request timed out", kind='timeout')
+    except httpx.HTTPError as e:
+        raise ProviderError('gemini', f"network error: {str(e)}", kind='network')
+    finally:
+        stream_duration.observe(time.perf_counter() - started, provider='gemini', outcome=outcome)
+        if position:
+            jobs_returned.inc(position, source='stream')
+
+
+REQUIRED_JOB_FIELDS = ['title', 'company', 'location', 'salary', 'description']
+
+
+def validate_job(job, position: int) -> Optional[dict]:
+    """Return the job with defaults filled in, or None if it is incomplete"""
+    
+    if not isinstance(job, dict) or not all(field in job for field in REQUIRED_JOB_FIELDS):
+        return None
+    
+    # Add default values for optional fields
+    job.setdefault('posted', '1 day ago')
+    job.setdefault('tags', [])
+    job.setdefault('type', 'Full-time')
+    job.setdefault('experience', 'Mid')
+    job.setdefault('id', f"job-{position + 1}")
+    return job
 
 
 def parse_gemini_response(response_text: str) -> list:
-    """Parse Gemini's response and extract job listings"""
+    """
+    Parse Gemini's response and extract job listings
+    
+    Tolerates markdown fences, surrounding commentary and output truncated
+    at the token limit: every complete job object is kept and a trailing
+    partial one is dropped, so a cut-off response still yields results.
+    """
     
     try:
-        # Remove markdown code blocks if present
-        cleaned_text = response_text.strip()
-        
-        # Remove ```json and ``` markers
-        if cleaned_text.startswith('```'):
-            # Find the actual JSON content
-            lines = cleaned_text.split('\n')
-            start_idx = 1 if lines[0].startswith('```') else 0
-            end_idx = len(lines) - 1 if lines[-1].strip() == '```' else len(lines)
-            cleaned_text = '\n'.join(lines[start_idx:end_idx])
-        
-        # Parse JSON
-        jobs = json.loads(cleaned_text)
+        jobs, _ = extract_array_elements(response_text)
         
         # Validate structure
-        if not isinstance(jobs, list):
-            raise ValueError("Response is not a list")
+        if jobs is None:
+            raise ValueError("No JSON array of jobs found in response")
         
         # Ensure each job has required fields
-        required_fields = ['title', 'company', 'location', 'salary', 'description']
         validated_jobs = []
         
         for job in jobs:
-            if all(field in job for field in required_fields):
-                # Add default values for optional fields
-                job.setdefault('posted', '1 day ago')
-                job.setdefault('tags', [])
-                job.setdefault('type', 'Full-time')
-                job.setdefault('experience', 'Mid')
-                job.setdefault('id', f"job-{len(validated_jobs) + 1}")
+            job = validate_job(job, len(validated_jobs))
+            if job is not None:
                 validated_jobs.append(job)
         
         if not validated_jobs:
@@ -193,7 +657,5 @@ def parse_gemini_response(response_text: str) -> list:
         
         return validated_jobs
     
-    except json.JSONDecodeError as e:
-        raise Exception(f"Failed to parse JSON response: {str(e)}")
     except Exception as e:
         raise Exception(f"Error parsing Gemini response: {str(e)}")
@@ -0,0 +1,79 @@
+"""
+Metrics Route
+Operational counters for upstream calls, caches and the upstream guard
+"""
+
+import os
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from routes.jobs import llm_router, recommendation_cache, recommendation_prefetcher, upstream_guard
+from routes.upload import resume_extractor
+from services.llm_providers import recent_calls
+from utils.metrics import registry
+from utils.process_memory import process_memory
+
+router = APIRouter()
+
+# Mounted without the /api prefix, at the path Prometheus scrapes by default
+prometheus_router = APIRouter()
+
+# Per-process: with a preforking server each worker reports its own
+registry.gauge('process_resident_memory_bytes', "Resident memory, shared pages counted in full",
+               function=lambda: process_memory().get('rss', 0))
+registry.gauge('process_proportional_memory_bytes', "Resident memory with shared pages split between sharers",
+               function=lambda: process_memory().get('pss', 0))
+registry.gauge('process_private_memory_bytes', "Memory not shared with any other process",
+               function=lambda: process_memory().get('private', 0))
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Snapshot of in-process metrics
+    
+    Returns: registered counters/gauges/histograms (tokens, latency, parse
+    time, cache results, error classes), upstream guard, LLM provider,
+    recommendation cache, prefetch and resume extraction (escalation
+    rate, added latency) statistics, and the most recent
+    model calls with their individual token counts and latency, and the
+    memory of the worker process that served the request
+    """
+    
+    return JSONResponse(
+        status_code=200,
+        content={
+            "success": True,
+            "upstream_guard": upstream_guard.stats(),
+            "llm": llm_router.stats(),
+            "recommendation_cache": recommendation_cache.stats(),
+            "prefetch": recommendation_prefetcher.stats(),
+            "resume_extraction": resume_extractor.stats(),
+            "recent_llm_calls": list(recent_calls),
+            "process": {
+                "pid": os.getpid(),
+                "worker": os.getenv('SERVER_WORKER_ID'),
+                "memory": process_memory()
+            },
+            "metrics": registry.snapshot()
+        }
+    )
+
+
+@prometheus_router.get("/metrics", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """
+    Every registered metric in the Prometheus text format
+    
+    Includes per-stage latency histograms for the upload and jobs
+    pipelines (stage_duration_seconds) and request latency per route
+    (http_request_duration_seconds). With serve.py each worker exports
+    its own series, labelled worker="<id>"; sum over it for totals.
+    """
+    
+    worker = os.getenv('SERVER_WORKER_ID')
+    return PlainTextResponse(
+        registry.render_prometheus({'worker': worker} if worker is not None else None),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -3,34 +3,77 @@ Upload Route
 Handles resume file uploads and triggers analysis
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
 from fastapi.responses import JSONResponse
 from pathlib import Path
 import shutil
+import time
 import uuid
-import json
+import os
 from datetime import datetime
+from typing import Callable, Dict, List
 
 from services.parser_service import ResumeParser
+from services.extraction_service import ExtractionBatcher
+from services.llm_providers import create_provider_router
+from services.upstream_guard import UpstreamGuard
 from services.analysis_service import AnalysisService
+from services.storage_service import LatestAnalysis, create_analysis_store
+from services.search_index import AnalysisIndex
+from services.text_index import ResumeTextIndex
+from utils.timing import observe_stage, request_started_at, stage
 
 router = APIRouter()
 
 # Storage paths
 UPLOAD_DIR = Path("uploads")
-ANALYSIS_DIR = Path("uploads/analysis")
-ANALYSIS_DIR.mkdir(parents=True, exist_ok=True)
+UPLOAD_DIR.mkdir(exist_ok=True)
 
 # Initialize services
 parser = ResumeParser()
 analyzer = AnalysisService()
 
-# Store latest analysis in memory (in production, use database)
-latest_analysis = {}
+# With EXTRACTION_LLM=1, resumes with a low-confidence field (fallback name,
+# missed experience...) are re-extracted by the LLM in small batches; its own
+# guard keeps these calls from crowding out job recommendations. Off by
+# default: it sends resume text, contact details included, to the providers
+resume_extractor = ExtractionBatcher(
+    create_provider_router(),
+    UpstreamGuard(
+        'extraction',
+        max_in_flight=int(os.getenv('EXTRACTION_MAX_IN_FLIGHT', '2')),
+        rate_per_minute=float(os.getenv('EXTRACTION_RPM', '20')),
+        burst=float(os.getenv('EXTRACTION_BURST', '5')),
+        max_wait=float(os.getenv('EXTRACTION_MAX_WAIT_SECONDS', '2'))
+    ),
+    threshold=float(os.getenv('PARSER_CONFIDENCE_THRESHOLD', '0.5')),
+    batch_window=float(os.getenv('EXTRACTION_BATCH_WINDOW_MS', '50')) / 1000,
+    max_batch=int(os.getenv('EXTRACTION_MAX_BATCH', '4')),
+    timeout=float(os.getenv('EXTRACTION_TIMEOUT_SECONDS', '8')),
+    enabled=os.getenv('EXTRACTION_LLM', '0') == '1'
+)
+
+# Analyses are written atomically off the event loop; the storage engine
+# (per-file JSON or segment log) is selected by ANALYSIS_STORAGE
+analysis_store = create_analysis_store()
+
+# Structured search index over stored analyses (built at startup, then
+# synced with the store before each search to pick up other workers' uploads)
+analysis_index = AnalysisIndex()
+
+# Compressed resume text with a BM25 full-text index
+resume_text_index = ResumeTextIndex(UPLOAD_DIR / "text_index")
+
+# Latest upload to any worker, tracked by a pointer file next to the store
+latest_analysis = LatestAnalysis(UPLOAD_DIR / "latest_analysis", analysis_store)
+
+# Called with (file_id, analysis) once an analysis is stored, e.g. to warm
+# caches; listeners must only schedule work, never block the upload
+analysis_listeners: List[Callable[[str, Dict], None]] = []
 
 
 @router.post("/upload")
-async def upload_resume(file: UploadFile = File(...)):
+async def upload_resume(request: Request, file: UploadFile = File(...)):
     """
     Upload resume file and trigger analysis
     
@@ -38,6 +81,11 @@ async def upload_resume(file: UploadFile = File(...)):
     Returns: Analysis results
     """
     
+    # Receiving and parsing the multipart body happens before this handler
+    started_at = request_started_at(request.scope)
+    if started_at is not None:
+        observe_stage('upload', 'receive', time.perf_counter() - started_at)
+    
     # Validate file type
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
@@ -55,11 +103,13 @@ async def upload_resume(file: UploadFile = File(...)):
         file_path = UPLOAD_DIR / f"{file_id}{file_ext}"
         
         # Save uploaded file
-        with file_path.open("wb") as buffer:
+        with stage('upload', 'save'), file_path.open("wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
         
         # Parse resume
         parsed_data = parser.parse_file(str(file_path))
+        with stage('upload', 'escalate'):
+            extraction = await resume_extractor.refine(parsed_data)
         
         # Generate analysis
         analysis = analyzer.generate_analysis(parsed_data)
@@ -69,17 +119,23 @@ async def upload_resume(file: UploadFile = File(...)):
             'file_id': file_id,
             'filename': file.filename,
             'upload_time': datetime.now().isoformat(),
-            'file_type': file_ext
+            'file_type': file_ext,
+            'extraction': extraction
         }
         
         # Save analysis to file
-        analysis_path = ANALYSIS_DIR / f"{file_id}.json"
-        with analysis_path.open("w") as f:
-            json.dump(analysis, f, indent=2)
+        with stage('upload', 'persist'):
+            store_version = analysis_store.version()
+            await analysis_store.save(file_id, analysis)
+        with stage('upload', 'index'):
+            analysis_index.add(file_id, analysis)
+            analysis_index.note_write(store_version, analysis_store.version())
+            await resume_text_index.add(file_id, parsed_data.get('raw_text', ''))
+        
+        await latest_analysis.set(file_id, analysis)
         
-        # Store in memory for quick access
-        latest_analysis['current'] = analysis
-        latest_analysis['file_id'] = file_id
+        for listener in analysis_listeners:
+            listener(file_id, analysis)
         
         return JSONResponse(
             status_code=200,
@@ -108,7 +164,8 @@ async def upload_resume(file: UploadFile = File(...)):
 @router.get("/upload/status")
 async def get_upload_status():
     """Get status of latest upload"""
-    if not latest_analysis:
+    latest = await latest_analysis.get()
+    if latest is None:
         return JSONResponse(
             status_code=404,
             content={
@@ -122,6 +179,6 @@ async def get_upload_status():
         content={
             "success": True,
             "has_analysis": True,
-            "file_id": latest_analysis.get('file_id')
+            "file_id": latest[0]
         }
     )
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Production server: a preforking master running N uvicorn workers
+
+The master imports the app and builds the read-only state once: the role
+and skill tables, compiled parser patterns, the semantic cache's IDF
+weights, the job catalog index and (unless --no-preload) the lazily
+imported parsing/ML libraries. It then moves every object to the GC's
+permanent generation (gc.freeze) and forks the workers. The workers share
+those pages copy-on-write, and their collector never scans the frozen
+objects and so never dirties the shared pages. All workers accept on one
+listening socket opened by the master.
+
+SIGTERM or SIGINT drains: workers stop accepting, finish in-flight
+requests for up to --drain-timeout seconds, run the app's shutdown hooks
+(flushing pending analysis writes) and exit. A worker that dies is
+restarted. Every --memory-interval seconds the master prints each worker's
+RSS, PSS (shared pages split between sharers), shared and private memory.
+
+State the workers must agree on lives on disk: the analysis store, the
+"latest analysis" pointer and the resume text index (whose BM25
+statistics are kept in SQLite). The structured analysis index syncs with
+the store before each search. Upstream guard limits are divided between
+the workers, so together they stay within e.g. JOBS_UPSTREAM_RPM. Each
+worker keeps at least one in-flight call and a burst of one, so with more
+workers than a guard's max_in_flight or burst the combined limit is
+higher; the master warns about this at startup.
+Recommendation caches stay per worker. /metrics labels every series
+with the worker that served the scrape.
+
+Usage (from the backend directory):
+    python serve.py --workers 4
+    python serve.py --host 0.0.0.0 --port 5000 --workers 8 --drain-timeout 30
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def build_shared_state(preload: bool) -> Tuple[object, Dict[str, int]]:
+    """Import the app and build everything the workers can share read-only"""
+    from main import app
+    from routes.jobs import JOBS_CATALOG_PATH, job_catalog, recommendation_cache
+    from routes.upload import resume_text_index
+    from utils.lazy_import import lazy_modules
+
+    state = {}
+    if JOBS_CATALOG_PATH:
+        state['catalog_jobs'] = job_catalog.load(JOBS_CATALOG_PATH)
+    if recommendation_cache.second_tier is not None:
+        recommendation_cache.second_tier.warm_up()
+    if preload:
+        for module in lazy_modules:
+            module.load()
+        state['preloaded_modules'] = len(lazy_modules)
+
+    # SQLite connections must not cross a fork; each worker opens its own
+    resume_text_index.close()
+    return app, state
+
+
+def warn_oversubscribed_guards(workers: int) -> None:
+    """Report guard limits the workers together will exceed"""
+    from services.upstream_guard import upstream_guards
+
+    for guard in upstream_guards:
+        exceeded = guard.oversubscribed(workers)
+        if exceeded:
+            print(f"Upstream guard '{guard.name}' cannot be split across {workers} workers "
+                  f"(at least one each); combined {', '.join(exceeded)}", file=sys.stderr)
+
+
+def run_worker(app, sock: socket.socket, worker_id: int, args) -> None:
+    """Serve on the inherited socket until told to drain"""
+    import uvicorn
+    from routes.upload import resume_text_index
+    from services.upstream_guard import upstream_guards
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)
+    os.environ['SERVER_WORKER_ID'] = str(worker_id)
+    gc.enable()
+    resume_text_index.reopen()
+    for guard in upstream_guards:
+        guard.share(args.workers)
+
+    config = uvicorn.Config(
+        app,
+        log_level=args.log_level,
+        access_log=args.access_log,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.drain_timeout,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def format_bytes(value: int) -> str:
+    return f"{value / (1024 * 1024):.1f}M"
+
+
+def report_memory(workers: Dict[int, Tuple[int, float]]) -> None:
+    from utils.process_memory import process_memory
+
+    rows = [('master', os.getpid(), process_memory())]
+    rows += [(f"worker {worker_id}", pid, process_memory(pid)) for pid, (worker_id, _) in sorted(workers.items())]
+    print(f"{'process':<10} {'pid':>7} {'rss':>9} {'pss':>9} {'shared':>9} {'private':>9}")
+    for name, pid, usage in rows:
+        print(f"{name:<10} {pid:>7} " + ' '.join(
+            f"{format_bytes(usage.get(key, 0)):>9}" for key in ('rss', 'pss', 'shared', 'private')))
+    total_pss = sum(usage.get('pss', 0) for _, _, usage in rows)
+    total_rss = sum(usage.get('rss', 0) for _, _, usage in rows)
+    print(f"total pss {format_bytes(total_pss)} (rss sum {format_bytes(total_rss)})", flush=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the API with preforked workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv('PORT', '5000')))
+    parser.add_argument("--workers", type=int,
+                        default=int(os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 1))))
+    parser.add_argument("--backlog", type=int, default=2048, help="Listen queue length")
+    parser.add_argument("--drain-timeout", type=float, default=30.0,
+                        help="Seconds a worker may spend finishing requests on shutdown")
+    parser.add_argument("--keep-alive", type=int, default=5, help="Idle keep-alive timeout (seconds)")
+    parser.add_argument("--memory-interval", type=float, default=60.0,
+                        help="Seconds between per-worker memory reports (0 disables)")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="Let each worker import parsing/ML libraries on first use")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--access-log", action="store_true")
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        print("--workers must be at least 1", file=sys.stderr)
+        return 1
+    if os.getenv('ANALYSIS_STORAGE', 'files') == 'segments':
+        print("The segment log has a single writer and a background compactor; "
+              "use ANALYSIS_STORAGE=files with serve.py", file=sys.stderr)
+        return 1
+
+    # No collections while building state, then freeze it all just before
+    # forking so workers never touch (and copy) the shared objects
+    gc.disable()
+    started = time.perf_counter()
+    app, state = build_shared_state(preload=not args.no_preload)
+    warn_oversubscribed_guards(args.workers)
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET6 if ':' in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(args.backlog)
+    sock.set_inheritable(True)
+    print(f"Master {os.getpid()} ready in {time.perf_counter() - started:.2f}s "
+          f"({', '.join(f'{k}={v}' for k, v in state.items()) or 'no preloaded state'}); "
+          f"{gc.get_freeze_count()} objects frozen; "
+          f"listening on {args.host}:{args.port} with {args.workers} workers", flush=True)
+
+    workers: Dict[int, Tuple[int, float]] = {}
+    stopping = []
+
+    def spawn(worker_id: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(app, sock, worker_id, args)
+            except BaseException:
+                import traceback
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        workers[pid] = (worker_id, time.monotonic())
+
+    def request_stop(signum, frame) -> None:
+        if not stopping:
+            stopping.append(time.monotonic())
+            print(f"Received {signal.Signals(signum).name}, draining workers", flush=True)
+            for pid in workers:
+                os.kill(pid, signal.SIGTERM)
+
+    for worker_id in range(args.workers):
+        spawn(worker_id)
+    gc.enable()
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    # Give up on a worker that keeps dying right after it starts
+    quick_deaths = 0
+    next_report = time.monotonic() + args.memory_interval
+    exit_code = 0
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            worker_id, born = workers.pop(pid)
+            if stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            print(f"Worker {worker_id} (pid {pid}) exited with {code}; restarting", file=sys.stderr, flush=True)
+            quick_deaths = quick_deaths + 1 if time.monotonic() - born < 5 else 0
+            if quick_deaths >= 5:
+                print("Workers keep failing at startup; shutting down", file=sys.stderr, flush=True)
+                exit_code = 1
+                request_stop(signal.SIGTERM, None)
+                continue
+            spawn(worker_id)
+            continue
+
+        now = time.monotonic()
+        if stopping and now - stopping[0] > args.drain_timeout + 10:
+            for pid in workers:
+                os.kill(pid, signal.SIGKILL)
+        if args.memory_interval and now >= next_report and not stopping:
+            report_memory(workers)
+            next_report = now + args.memory_interval
+        time.sleep(0.2)
+
+    sock.close()
+    print("All workers stopped", flush=True)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -55,6 +55,7 @@ class AnalysisService:
             'candidate_info': {
                 'name': parsed_data.get('name', 'Candidate'),
                 'email': parsed_data.get('email'),
+                'skills': sorted(parsed_data.get('skills', [])),
                 'skills_count': len(parsed_data.get('skills', [])),
                 'experience_count': len(parsed_data.get('experience', [])),
                 'education_count': len(parsed_data.get('education', []))
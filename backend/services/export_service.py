@@ -0,0 +1,140 @@
+"""
+Export Service
+Streams stored analyses out as NDJSON or flattened columnar files
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Number of role matches flattened into fixed columns
+TOP_ROLE_COLUMNS = 3
+
+# Flattened column layout, shared by CSV and Parquet exports
+EXPORT_COLUMNS = [
+    ('file_id', 'string'),
+    ('filename', 'string'),
+    ('upload_time', 'string'),
+    ('file_type', 'string'),
+    ('fit_score', 'int64'),
+    ('week_change', 'int64'),
+    ('highlights', 'string'),
+    ('role_alignment', 'string'),
+    ('skill_momentum', 'int64'),
+    ('readiness_actions_count', 'int64'),
+] + [
+    column
+    for rank in range(1, TOP_ROLE_COLUMNS + 1)
+    for column in ((f'role_match_{rank}_title', 'string'), (f'role_match_{rank}_match', 'int64'))
+] + [
+    ('candidate_name', 'string'),
+    ('candidate_email', 'string'),
+    ('skills_count', 'int64'),
+    ('experience_count', 'int64'),
+    ('education_count', 'int64'),
+]
+
+
+def iter_ndjson(analyses: Iterable[Tuple[str, Dict]]) -> Iterator[bytes]:
+    """Yield one compact JSON line per analysis"""
+    for _, analysis in analyses:
+        yield json.dumps(analysis, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def flatten_analysis(file_id: str, analysis: Dict) -> Dict:
+    """Flatten the nested analysis document into a single row"""
+    insights = analysis.get('overall_insights', {})
+    metrics = analysis.get('metrics', {})
+    candidate = analysis.get('candidate_info', {})
+    metadata = analysis.get('metadata', {})
+
+    row = {
+        'file_id': metadata.get('file_id', file_id),
+        'filename': metadata.get('filename'),
+        'upload_time': metadata.get('upload_time'),
+        'file_type': metadata.get('file_type'),
+        'fit_score': insights.get('fit_score'),
+        'week_change': insights.get('week_change'),
+        'highlights': '; '.join(insights.get('highlights', [])),
+        'role_alignment': metrics.get('role_alignment'),
+        'skill_momentum': metrics.get('skill_momentum'),
+        'readiness_actions_count': metrics.get('readiness_actions_count'),
+        'candidate_name': candidate.get('name'),
+        'candidate_email': candidate.get('email'),
+        'skills_count': candidate.get('skills_count'),
+        'experience_count': candidate.get('experience_count'),
+        'education_count': candidate.get('education_count'),
+    }
+
+    role_matches = analysis.get('role_matches', [])
+    for rank in range(1, TOP_ROLE_COLUMNS + 1):
+        match = role_matches[rank - 1] if len(role_matches) >= rank else {}
+        row[f'role_match_{rank}_title'] = match.get('title')
+        row[f'role_match_{rank}_match'] = match.get('match')
+
+    return row
+
+
+def _chunks(analyses: Iterable[Tuple[str, Dict]], chunk_size: int) -> Iterator[List[Dict]]:
+    """Group flattened rows so only one chunk is held in memory"""
+    chunk = []
+    for file_id, analysis in analyses:
+        chunk.append(flatten_analysis(file_id, analysis))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _to_frame(rows: List[Dict]):
+    import pandas as pd
+
+    frame = pd.DataFrame(rows, columns=[name for name, _ in EXPORT_COLUMNS])
+    dtypes = {name: ('Int64' if kind == 'int64' else kind) for name, kind in EXPORT_COLUMNS}
+    return frame.astype(dtypes)
+
+
+def export_columnar(
+    analyses: Iterable[Tuple[str, Dict]],
+    output_path: Path,
+    file_format: str = 'csv',
+    chunk_size: int = 10000
+) -> int:
+    """
+    Write flattened analyses to a Parquet or CSV file chunk by chunk
+
+    Returns the number of rows written
+    """
+    output_path = Path(output_path)
+    total = 0
+
+    if file_format == 'csv':
+        for index, rows in enumerate(_chunks(analyses, chunk_size)):
+            _to_frame(rows).to_csv(
+                output_path, mode='w' if index == 0 else 'a', header=index == 0, index=False
+            )
+            total += len(rows)
+        if total == 0:
+            _to_frame([]).to_csv(output_path, index=False)
+        return total
+
+    if file_format != 'parquet':
+        raise ValueError(f"Unsupported export format: {file_format}")
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow. Install it or use --format csv.")
+
+    schema = pa.schema([
+        (name, pa.int64() if kind == 'int64' else pa.string())
+        for name, kind in EXPORT_COLUMNS
+    ])
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for rows in _chunks(analyses, chunk_size):
+            table = pa.Table.from_pandas(_to_frame(rows), schema=schema, preserve_index=False)
+            writer.write_table(table)
+            total += len(rows)
+    return total
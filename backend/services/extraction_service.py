@@ -0,0 +1,283 @@
+"""
+Extraction Service
+Selective LLM re-extraction of resume fields the rule-based parser is unsure of
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from services.llm_providers import ProviderRouter
+from services.upstream_guard import UpstreamGuard
+from utils.json_stream import extract_array_elements
+from utils.metrics import registry
+
+# Fields the LLM may replace; email/phone regexes are already reliable
+REFINABLE_FIELDS = ('name', 'skills', 'experience', 'education')
+
+EXTRACTION_INSTRUCTION = """You extract fields from resumes. Return a JSON array with one object per resume, in input order, containing only the fields requested for that resume.
+name: the candidate's full name. skills: technical and professional skills (short names). experience: jobs, most recent first, each {title, company, dates, description} with a description of at most 30 words. education: each {degree, institution, year}.
+Use null or [] when a field is absent. Output only the JSON array."""
+
+EXTRACTION_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "name": {"type": "STRING", "nullable": True},
+            "skills": {"type": "ARRAY", "items": {"type": "STRING"}},
+            "experience": {
+                "type": "ARRAY",
+                "items": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "title": {"type": "STRING"},
+                        "company": {"type": "STRING"},
+                        "dates": {"type": "STRING"},
+                        "description": {"type": "STRING"},
+                    },
+                },
+            },
+            "education": {
+                "type": "ARRAY",
+                "items": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "degree": {"type": "STRING"},
+                        "institution": {"type": "STRING"},
+                        "year": {"type": "STRING"},
+                    },
+                },
+            },
+        },
+    },
+}
+
+# Output budget per resume in a batch, plus headroom for the array itself
+TOKENS_PER_RESUME = 700
+TOKENS_OVERHEAD = 64
+
+extractions = registry.counter('resume_extractions_total', "Parsed resumes by extraction path")
+escalation_duration = registry.histogram(
+    'resume_escalation_added_seconds', "Latency added to an upload by LLM escalation")
+escalation_batch_size = registry.histogram(
+    'resume_escalation_batch_size', "Resumes per batched extraction call",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16))
+
+
+class ExtractionBatcher:
+    """Re-extract low-confidence fields, batching concurrent resumes into one call
+
+    ``refine`` leaves resumes whose field confidences all reach
+    ``threshold`` on the local path. Others join a batch that is sent
+    ``batch_window`` seconds after its first resume arrives, or as soon as
+    it holds ``max_batch`` resumes, as a single rate-limited call through
+    ``guard``. An upload waits at most ``timeout`` seconds for the result;
+    on any failure the rule-based values are kept.
+    """
+
+    def __init__(
+        self,
+        router: ProviderRouter,
+        guard: UpstreamGuard,
+        threshold: float = 0.5,
+        batch_window: float = 0.05,
+        max_batch: int = 4,
+        max_chars: int = 6000,
+        timeout: float = 8.0,
+        enabled: bool = True
+    ):
+        self.router = router
+        self.guard = guard
+        self.threshold = threshold
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_chars = max_chars
+        self.timeout = timeout
+        self.enabled = enabled
+        self._batch: List[Tuple[str, List[str], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.parsed = 0
+        self.escalated = 0
+        self.refined = 0
+        self.failed = 0
+        self.batches = 0
+        self.added_seconds = 0.0
+        registry.gauge('resume_escalation_rate', "Share of parsed resumes escalated to the LLM",
+                       function=lambda: self.escalation_rate)
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalated / self.parsed if self.parsed else 0.0
+
+    def low_confidence_fields(self, parsed_data: Dict) -> List[str]:
+        confidence = parsed_data.get('confidence', {})
+        return [field for field in REFINABLE_FIELDS if confidence.get(field, 1.0) < self.threshold]
+
+    async def refine(self, parsed_data: Dict) -> Dict:
+        """
+        Escalate low-confidence fields of a parsed resume, in place
+
+        Returns the per-upload report: field confidences, which fields were
+        escalated and replaced, the batch size and the added latency.
+        """
+
+        fields = self.low_confidence_fields(parsed_data)
+        report = {
+            'confidence': dict(parsed_data.get('confidence', {})),
+            'low_confidence_fields': fields,
+            'escalated': False,
+            'refined_fields': [],
+            'added_latency_ms': 0.0
+        }
+        self.parsed += 1
+
+        if not fields or not self.enabled or not self.router.providers:
+            extractions.inc(path='local')
+            return report
+
+        self.escalated += 1
+        report['escalated'] = True
+        started = time.perf_counter()
+        try:
+            future = self._submit(parsed_data.get('raw_text', ''), fields)
+            extracted, report['batch_size'] = await asyncio.wait_for(
+                asyncio.shield(future), self.timeout
+            )
+            report['refined_fields'] = merge_fields(parsed_data, extracted, fields)
+            outcome = 'refined' if report['refined_fields'] else 'unchanged'
+        except Exception as e:
+            self.failed += 1
+            report['error'] = str(e) or type(e).__name__
+            outcome = 'failed'
+
+        if report['refined_fields']:
+            self.refined += 1
+        elapsed = time.perf_counter() - started
+        self.added_seconds += elapsed
+        report['added_latency_ms'] = round(elapsed * 1000, 1)
+        escalation_duration.observe(elapsed, outcome=outcome)
+        extractions.inc(path='escalated')
+        return report
+
+    def _submit(self, text: str, fields: List[str]) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._batch.append((text[:self.max_chars], fields, future))
+        if len(self._batch) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.batch_window, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch = self._batch, []
+        if batch:
+            asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[str, List[str], asyncio.Future]]) -> None:
+        self.batches += 1
+        escalation_batch_size.observe(len(batch))
+        prompt = '\n\n'.join(
+            f"Resume {i} (fields: {', '.join(fields)}):\n{text}"
+            for i, (text, fields, _) in enumerate(batch, 1)
+        )
+        options = {
+            'temperature': 0.0,
+            'max_output_tokens': TOKENS_PER_RESUME * len(batch) + TOKENS_OVERHEAD,
+            'system_instruction': EXTRACTION_INSTRUCTION,
+            'response_schema': EXTRACTION_RESPONSE_SCHEMA,
+        }
+
+        try:
+            text = await self.guard.call(lambda: self.router.generate(prompt, options))
+            results, _ = extract_array_elements(text or '')
+            if not results:
+                raise ValueError("No extraction results in model output")
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # A truncated array leaves later resumes without a result
+        for i, (_, _, future) in enumerate(batch):
+            if future.done():
+                continue
+            if i < len(results) and isinstance(results[i], dict):
+                future.set_result((results[i], len(batch)))
+            else:
+                future.set_exception(ValueError("Resume missing from extraction output"))
+
+    def stats(self) -> Dict:
+        return {
+            'parsed': self.parsed,
+            'escalated': self.escalated,
+            'escalation_rate': round(self.escalation_rate, 4),
+            'refined': self.refined,
+            'failed': self.failed,
+            'batches': self.batches,
+            'avg_added_latency_ms': round(self.added_seconds / self.escalated * 1000, 1) if self.escalated else 0.0,
+            'threshold': self.threshold,
+            'guard': self.guard.stats()
+        }
+
+
+def merge_fields(parsed_data: Dict, extracted: Dict, fields: List[str]) -> List[str]:
+    """Replace low-confidence fields with usable LLM values; returns the fields replaced"""
+
+    refined = []
+
+    name = extracted.get('name') if 'name' in fields else None
+    if isinstance(name, str) and 1 <= len(name.split()) <= 5 and len(name) < 60:
+        parsed_data['name'] = name.strip()
+        refined.append('name')
+
+    skills = extracted.get('skills') if 'skills' in fields else None
+    if isinstance(skills, list):
+        known = {skill.lower() for skill in parsed_data['skills']}
+        added = [s.strip() for s in skills if isinstance(s, str) and s.strip() and s.strip().lower() not in known]
+        if added:
+            parsed_data['skills'] = parsed_data['skills'] + list(dict.fromkeys(added))
+            refined.append('skills')
+
+    experience = extracted.get('experience') if 'experience' in fields else None
+    if isinstance(experience, list):
+        entries = []
+        for job in experience[:5]:
+            if not isinstance(job, dict) or not (job.get('title') or job.get('description')):
+                continue
+            heading = ' at '.join(str(job[k]) for k in ('title', 'company') if job.get(k))
+            if job.get('dates'):
+                heading += f" ({job['dates']})"
+            entries.append({
+                'title': job.get('title'),
+                'company': job.get('company'),
+                'dates': job.get('dates'),
+                'description': f"{heading}: {job.get('description') or ''}".strip(': ')[:200]
+            })
+        if entries:
+            parsed_data['experience'] = entries
+            refined.append('experience')
+
+    education = extracted.get('education') if 'education' in fields else None
+    if isinstance(education, list):
+        entries = [
+            {
+                'degree': school.get('degree') or school.get('institution'),
+                'institution': school.get('institution'),
+                'year': school.get('year')
+            }
+            for school in education[:3]
+            if isinstance(school, dict) and (school.get('degree') or school.get('institution'))
+        ]
+        if entries:
+            parsed_data['education'] = entries
+            refined.append('education')
+
+    for field in refined:
+        parsed_data['confidence'][field] = max(parsed_data['confidence'].get(field, 0.0), 0.8)
+    return refined
@@ -0,0 +1,62 @@
+"""
+HTTP Client Service
+Shared async HTTP client for upstream API calls
+"""
+
+import os
+from typing import Optional
+
+import httpx
+
+# Connection pool limits shared by every upstream call
+MAX_CONNECTIONS = int(os.getenv('UPSTREAM_MAX_CONNECTIONS', '100'))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('UPSTREAM_MAX_KEEPALIVE', '20'))
+KEEPALIVE_EXPIRY = float(os.getenv('UPSTREAM_KEEPALIVE_EXPIRY', '30'))
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (pip install httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        headers={"Content-Type": "application/json"}
+    )
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """Create the shared client (called on app startup)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections (called on shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it if the app lifecycle has not"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
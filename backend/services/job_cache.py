@@ -0,0 +1,200 @@
+"""
+Job Cache Service
+TTL cache with single-flight request coalescing for job recommendations
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, FrozenSet, Optional, Tuple
+
+from utils.metrics import registry
+
+cache_requests = registry.counter(
+    'recommendation_cache_requests_total',
+    "Recommendation cache lookups by result: hit, second_tier, coalesced, miss, stale")
+
+CacheKey = Tuple[str, FrozenSet[str], str, int]
+
+
+def _normalize_text(value: Optional[str]) -> str:
+    return ' '.join((value or '').lower().split())
+
+
+def make_cache_key(
+    query: Optional[str],
+    skills: Optional[str],
+    location: Optional[str],
+    count: int = 0
+) -> CacheKey:
+    """Normalize (query, skills, location, count) so equivalent requests share a key"""
+    skill_set = frozenset(
+        _normalize_text(skill) for skill in (skills or '').split(',') if skill.strip()
+    )
+    return (_normalize_text(query), skill_set, _normalize_text(location), count)
+
+
+class RecommendationCache:
+    """Size-bounded LRU cache with per-entry TTL and single-flight fetches
+
+    Concurrent misses for the same key share one upstream call: the first
+    caller starts the fetch and everyone else awaits its result. Failed
+    fetches are not cached. An optional ``second_tier`` (anything with
+    ``lookup(key) -> (value, score) | None`` and ``add(key, value)``) is
+    consulted on exact misses and fed with every fetched result.
+
+    Expired entries are kept for a further ``stale_ttl`` seconds so
+    ``get_stale`` can still serve them while the upstream is unavailable.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 1024, second_tier=None,
+                 stale_ttl: float = 0.0, name: str = 'recommendations'):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.second_tier = second_tier
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[CacheKey, Tuple[float, list]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._waiters: Dict[CacheKey, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.second_tier_hits = 0
+        self.stale_hits = 0
+        registry.gauge(f'{name}_cache_entries', "Entries held in the cache", lambda: len(self))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Optional[list]:
+        """Return a fresh cached value, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            if expires_at + self.stale_ttl <= now:
+                del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get_stale(self, key: CacheKey) -> Optional[list]:
+        """Return a cached value even if expired, within the stale window"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at + self.stale_ttl <= time.monotonic():
+            del self._entries[key]
+            return None
+        self.stale_hits += 1
+        cache_requests.inc(cache=self.name, result='stale')
+        return value
+
+    def set(self, key: CacheKey, value: list) -> None:
+        """Store a value, evicting the least recently used entries"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def lookup(self, key: CacheKey) -> Optional[list]:
+        """Return a cached value from either tier without fetching"""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            cache_requests.inc(cache=self.name, result='hit')
+            return value
+
+        if self.second_tier is not None:
+            similar = self.second_tier.lookup(key)
+            if similar is not None:
+                self.second_tier_hits += 1
+                cache_requests.inc(cache=self.name, result='second_tier')
+                self.set(key, similar[0])
+                return similar[0]
+        return None
+
+    def store(self, key: CacheKey, value: list) -> None:
+        """Store a value fetched outside get_or_fetch in both tiers"""
+        self.set(key, value)
+        if self.second_tier is not None:
+            self.second_tier.add(key, value)
+
+    async def get_or_fetch(
+        self,
+        key: CacheKey,
+        fetch: Callable[[], Awaitable[list]]
+    ) -> Tuple[list, bool]:
+        """
+        Return (value, served_from_cache)
+
+        Callers that joined an in-flight fetch count as served from cache,
+        since they did not trigger an upstream call of their own.
+        """
+        value = self.lookup(key)
+        if value is not None:
+            return value, True
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            cache_requests.inc(cache=self.name, result='coalesced')
+            return await self._wait(key, task), True
+
+        # The fetch runs as its own task so a disconnecting caller does not
+        # cancel the upstream call that other callers are waiting on
+        self.misses += 1
+        cache_requests.inc(cache=self.name, result='miss')
+        task = asyncio.ensure_future(self._fetch_and_store(key, fetch))
+        task.add_done_callback(_consume_exception)
+        self._inflight[key] = task
+        return await self._wait(key, task), False
+
+    async def _wait(self, key: CacheKey, task: asyncio.Future) -> list:
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def cancel_fetch(self, key: CacheKey) -> bool:
+        """Cancel an in-flight fetch nobody is waiting on; returns True if cancelled"""
+        task = self._inflight.get(key)
+        if task is None or task.done() or self._waiters.get(key):
+            return False
+        task.cancel()
+        return True
+
+    async def _fetch_and_store(self, key: CacheKey, fetch: Callable[[], Awaitable[list]]) -> list:
+        try:
+            value = await fetch()
+            self.store(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict:
+        return {
+            'entries': len(self._entries),
+            'inflight': len(self._inflight),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'second_tier_hits': self.second_tier_hits,
+            'stale_hits': self.stale_hits,
+        }
+
+
+def _consume_exception(task: asyncio.Future) -> None:
+    """Avoid 'exception was never retrieved' warnings once waiters are gone"""
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,357 @@
+"""
+Job Catalog Service
+In-process retrieval index over a local job postings file
+"""
+
+import csv
+import json
+import math
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from services.text_index import tokenize
+from utils.lazy_import import lazy_import
+from utils.timing import timed_stage
+
+# Only needed once a catalog is loaded
+sparse = lazy_import('scipy.sparse')
+
+FACET_FIELDS = ('location', 'type', 'experience')
+MAX_FACET_VALUES = 20
+
+JOB_DEFAULTS = {
+    'location': 'Remote',
+    'salary': 'Not disclosed',
+    'posted': 'Recently',
+    'description': '',
+    'type': 'Full-time',
+    'experience': 'Mid',
+}
+
+
+def normalize_tag(tag: str) -> str:
+    return ' '.join(str(tag).lower().split())
+
+
+def _split_tags(value) -> List[str]:
+    if isinstance(value, list):
+        return [str(tag).strip() for tag in value if str(tag).strip()]
+    separator = next((sep for sep in (';', '|') if sep in (value or '')), ',')
+    return [tag.strip() for tag in (value or '').split(separator) if tag.strip()]
+
+
+def load_jobs_file(path: Path) -> List[Dict]:
+    """Read postings from a .jsonl, .json (array) or .csv file"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix == '.csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            return [dict(row) for row in csv.DictReader(f)]
+
+    with open(path, encoding='utf-8') as f:
+        if suffix == '.json':
+            return json.load(f)
+        jobs = []
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                jobs.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return jobs
+
+
+def normalize_job(raw: Dict, position: int) -> Optional[Dict]:
+    """Return a posting in the recommendation response shape, or None"""
+    if not isinstance(raw, dict) or not raw.get('title') or not raw.get('company'):
+        return None
+    job = {key: raw[key] for key in raw if raw[key] not in (None, '')}
+    for key, default in JOB_DEFAULTS.items():
+        job.setdefault(key, default)
+    job['tags'] = _split_tags(raw.get('tags') or raw.get('skills'))
+    job.pop('skills', None)
+    job['id'] = str(raw.get('id') or f"catalog-{position + 1}")
+    return job
+
+
+class _Postings:
+    """Doc ids and precomputed BM25 term weights for one term"""
+
+    __slots__ = ('docs', 'weights', 'idf')
+
+    def __init__(self, docs: np.ndarray, weights: np.ndarray, idf: float):
+        self.docs = docs
+        self.weights = weights
+        self.idf = idf
+
+
+class JobCatalog:
+    """BM25 text index, skill-tag postings and facets over job postings
+
+    The index is built once per load and then read-only: BM25 weights are
+    precomputed per posting (document lengths never change), so a query is
+    a handful of vectorized adds into a score array. A reload builds a new
+    index and swaps it in, so searches never see a half-built one.
+
+    Each job also gets a normalized sparse vector over IDF-weighted skill
+    tags and title terms, so profile matching is a single matrix-vector
+    product.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, title_boost: int = 3,
+                 skill_weight: float = 2.0, title_vector_weight: float = 0.5):
+        self.k1 = k1
+        self.b = b
+        self.title_boost = title_boost
+        self.skill_weight = skill_weight
+        self.title_vector_weight = title_vector_weight
+        self._lock = threading.Lock()
+        self._state = self._build_state([])
+        self.path: Optional[Path] = None
+
+    def __len__(self) -> int:
+        return len(self._state['jobs'])
+
+    def load(self, path) -> int:
+        """Replace the catalog with the postings in path; returns the job count"""
+        count = self.build(load_jobs_file(path))
+        self.path = Path(path)
+        return count
+
+    def build(self, raw_jobs: Iterable[Dict]) -> int:
+        jobs = []
+        for raw in raw_jobs:
+            job = normalize_job(raw, len(jobs))
+            if job is not None:
+                jobs.append(job)
+        state = self._build_state(jobs)
+        with self._lock:
+            self._state = state
+        return len(jobs)
+
+    def _build_state(self, jobs: List[Dict]) -> Dict:
+        n = len(jobs)
+        term_docs: Dict[str, List[int]] = {}
+        term_tfs: Dict[str, List[int]] = {}
+        lengths = np.zeros(n, dtype=np.float32)
+        tag_docs: Dict[str, List[int]] = {}
+        facet_docs = {field: {} for field in FACET_FIELDS}
+
+        for doc, job in enumerate(jobs):
+            tokens = tokenize(job['title']) * self.title_boost
+            tokens += tokenize(' '.join([str(job['description']), str(job['company']), ' '.join(job['tags'])]))
+            lengths[doc] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_docs.setdefault(term, []).append(doc)
+                term_tfs.setdefault(term, []).append(tf)
+            for tag in {normalize_tag(tag) for tag in job['tags']}:
+                tag_docs.setdefault(tag, []).append(doc)
+            for field in FACET_FIELDS:
+                facet_docs[field].setdefault(str(job[field]), []).append(doc)
+
+        avgdl = float(lengths.mean()) if n else 0.0
+        postings = {}
+        for term, docs in term_docs.items():
+            docs = np.array(docs, dtype=np.int32)
+            tf = np.array(term_tfs[term], dtype=np.float32)
+            norm = self.k1 * (1 - self.b + self.b * lengths[docs] / avgdl)
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            postings[term] = _Postings(docs, tf * (self.k1 + 1) / (tf + norm), idf)
+
+        vocabulary, idf, vectors = self._build_vectors(jobs)
+
+        return {
+            'jobs': jobs,
+            'ids': {job['id']: doc for doc, job in enumerate(jobs)},
+            'vocabulary': vocabulary,
+            'idf': idf,
+            'vectors': vectors,
+            'postings': postings,
+            'tags': {tag: np.array(docs, dtype=np.int32) for tag, docs in tag_docs.items()},
+            'facets': {
+                field: {value: np.array(docs, dtype=np.int32) for value, docs in values.items()}
+                for field, values in facet_docs.items()
+            },
+        }
+
+    def _build_vectors(self, jobs: List[Dict]) -> Tuple[Dict[str, int], np.ndarray, Optional['sparse.csr_matrix']]:
+        """Row-normalized job vectors over ("skill", tag) and ("title", term) features"""
+        if not jobs:
+            # Empty catalog (e.g. at import): no vectors, and no scipy import
+            return {}, np.zeros(0, dtype=np.float32), None
+        vocabulary: Dict[str, int] = {}
+        rows, cols = [], []
+        for doc, job in enumerate(jobs):
+            features = {f"skill:{normalize_tag(tag)}" for tag in job['tags']}
+            features |= {f"title:{term}" for term in tokenize(job['title'])}
+            for feature in features:
+                rows.append(doc)
+                cols.append(vocabulary.setdefault(feature, len(vocabulary)))
+
+        n = len(jobs)
+        df = np.bincount(np.array(cols, dtype=np.int64), minlength=len(vocabulary))
+        idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        for feature, col in vocabulary.items():
+            if feature.startswith('title:'):
+                idf[col] *= self.title_vector_weight
+
+        vectors = sparse.csr_matrix(
+            (idf[cols], (rows, cols)), shape=(n, len(vocabulary)), dtype=np.float32
+        )
+        norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        vectors = sparse.csr_matrix(sparse.diags(1 / norms) @ vectors, dtype=np.float32)
+        return vocabulary, idf, vectors
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        state = self._state
+        doc = state['ids'].get(job_id)
+        return None if doc is None else state['jobs'][doc]
+
+    def facet_values(self, field: str) -> Dict[str, int]:
+        return {value: len(docs) for value, docs in self._state['facets'][field].items()}
+
+    def _facet_mask(self, state: Dict, field: str, value: str, n: int) -> np.ndarray:
+        """Docs whose facet value contains value (e.g. "bangalore" matches "Bangalore, India")"""
+        wanted = ' '.join(value.lower().split())
+        mask = np.zeros(n, dtype=bool)
+        for facet_value, docs in state['facets'][field].items():
+            if wanted in facet_value.lower():
+                mask[docs] = True
+        return mask
+
+    @timed_stage('jobs', 'catalog_search')
+    def search(
+        self,
+        query: Optional[str] = None,
+        skills: Optional[List[str]] = None,
+        location: Optional[str] = None,
+        job_type: Optional[str] = None,
+        experience: Optional[str] = None,
+        limit: int = 10
+    ) -> Tuple[int, List[Dict], Dict[str, Dict[str, int]]]:
+        """
+        Rank postings by BM25 on query plus the share of skills found in tags
+
+        location, job_type and experience filter on facets. Returns
+        (total matches, top results, facet counts over all matches).
+        """
+        state = self._state
+        jobs = state['jobs']
+        n = len(jobs)
+        if not n:
+            return 0, [], {field: {} for field in FACET_FIELDS}
+
+        scores = np.zeros(n, dtype=np.float32)
+        terms = set(tokenize(query or ''))
+        for term in terms:
+            postings = state['postings'].get(term)
+            if postings is not None:
+                scores[postings.docs] += postings.idf * postings.weights
+
+        wanted_skills = sorted({normalize_tag(s) for s in skills or [] if s.strip()})
+        skill_hits = np.zeros(n, dtype=np.float32)
+        for skill in wanted_skills:
+            docs = state['tags'].get(skill)
+            if docs is not None:
+                skill_hits[docs] += 1
+        if wanted_skills:
+            scores += self.skill_weight * skill_hits / len(wanted_skills)
+
+        mask = scores > 0 if terms or wanted_skills else np.ones(n, dtype=bool)
+        mask = self._apply_facets(state, mask, location, job_type, experience)
+        matches, ordered = self._top(scores, mask, limit)
+
+        results = []
+        for doc in ordered:
+            job = dict(jobs[doc])
+            job['score'] = round(float(scores[doc]), 4)
+            if wanted_skills:
+                tags = {normalize_tag(tag) for tag in job['tags']}
+                job['matched_skills'] = [s for s in wanted_skills if s in tags]
+            results.append(job)
+
+        facets = {}
+        for field in FACET_FIELDS:
+            counts = [
+                (value, int(mask[docs].sum())) for value, docs in state['facets'][field].items()
+            ]
+            counts.sort(key=lambda item: -item[1])
+            facets[field] = {value: count for value, count in counts[:MAX_FACET_VALUES] if count}
+        return len(matches), results, facets
+
+    @timed_stage('jobs', 'catalog_match')
+    def match(
+        self,
+        skills: List[str],
+        roles: Optional[Dict[str, float]] = None,
+        location: Optional[str] = None,
+        job_type: Optional[str] = None,
+        experience: Optional[str] = None,
+        limit: int = 10
+    ) -> Tuple[int, List[Dict]]:
+        """
+        Rank postings by cosine similarity to a candidate profile
+
+        The query vector holds the candidate's skills plus the title terms of
+        each role in roles, weighted by its match (0-1). Each result carries
+        ``similarity``, ``matched_skills`` and ``missing_skills``.
+        """
+        state = self._state
+        jobs = state['jobs']
+        vocabulary, idf = state['vocabulary'], state['idf']
+        if not jobs:
+            return 0, []
+
+        query = np.zeros(len(vocabulary), dtype=np.float32)
+        candidate_skills = {normalize_tag(skill) for skill in skills if str(skill).strip()}
+        for skill in candidate_skills:
+            col = vocabulary.get(f"skill:{skill}")
+            if col is not None:
+                query[col] = idf[col]
+        for role, weight in (roles or {}).items():
+            for term in tokenize(role):
+                col = vocabulary.get(f"title:{term}")
+                if col is not None:
+                    query[col] += idf[col] * weight
+
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return 0, []
+        scores = state['vectors'] @ (query / norm)
+
+        mask = self._apply_facets(state, scores > 0, location, job_type, experience)
+        matches, ordered = self._top(scores, mask, limit)
+
+        results = []
+        for doc in ordered:
+            job = dict(jobs[doc])
+            job['similarity'] = round(float(scores[doc]), 4)
+            job['matched_skills'] = [t for t in job['tags'] if normalize_tag(t) in candidate_skills]
+            job['missing_skills'] = [t for t in job['tags'] if normalize_tag(t) not in candidate_skills]
+            results.append(job)
+        return len(matches), results
+
+    def _apply_facets(self, state: Dict, mask: np.ndarray, location: Optional[str],
+                      job_type: Optional[str], experience: Optional[str]) -> np.ndarray:
+        for field, value in (('location', location), ('type', job_type), ('experience', experience)):
+            if value:
+                mask = mask & self._facet_mask(state, field, value, len(mask))
+        return mask
+
+    @staticmethod
+    def _top(scores: np.ndarray, mask: np.ndarray, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (all matching docs, top docs by score then catalog position)"""
+        matches = np.flatnonzero(mask)
+        if len(matches) > limit:
+            candidates = matches[np.argpartition(-scores[matches], limit - 1)[:limit]]
+        else:
+            candidates = matches
+        return matches, candidates[np.lexsort((candidates, -scores[candidates]))]
@@ -0,0 +1,425 @@
+"""
+LLM Provider Service
+Pluggable text-generation providers with latency-aware failover and hedging
+"""
+
+import asyncio
+import bisect
+import contextvars
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import httpx
+
+from services.http_client import get_http_client
+from utils.metrics import registry
+
+# Histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000]
+
+llm_tokens = registry.counter('llm_tokens_total', "Tokens reported by LLM providers")
+llm_requests = registry.counter('llm_requests_total', "LLM provider calls by outcome")
+llm_errors = registry.counter('llm_errors_total', "Failed LLM provider calls by error class")
+llm_duration = registry.histogram('llm_request_duration_seconds', "LLM provider call latency")
+llm_retries = registry.counter('llm_retries_total', "Extra provider calls sent as hedges or failovers")
+
+# Token usage of the provider call running in the current task
+_call_usage: contextvars.ContextVar = contextvars.ContextVar('llm_call_usage', default=None)
+
+# Most recent calls, newest last, for per-call inspection
+recent_calls = deque(maxlen=int(os.getenv('LLM_RECENT_CALLS', '50')))
+
+
+class ProviderError(Exception):
+    """An upstream provider failed; ``retryable`` marks 429/5xx/network errors"""
+
+    def __init__(self, provider: str, message: str, status_code: Optional[int] = None,
+                 retryable: bool = True, kind: Optional[str] = None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status_code = status_code
+        self.retryable = retryable
+        self.kind = kind
+
+
+def classify_error(error: BaseException) -> str:
+    """Short error class for metrics: timeout, network, rate_limited, server_error, ..."""
+    if isinstance(error, asyncio.CancelledError):
+        return 'cancelled'
+    if getattr(error, 'kind', None):
+        return error.kind
+    status = getattr(error, 'status_code', None)
+    if status == 429:
+        return 'rate_limited'
+    if status is not None:
+        return 'server_error' if status >= 500 else 'client_error'
+    return type(error).__name__
+
+
+class LatencyTracker:
+    """Fixed-bucket latency histogram plus a window of recent samples for p95"""
+
+    def __init__(self, window: int = 200):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.errors = 0
+        self._recent = deque(maxlen=window)
+
+    def observe(self, latency_ms: float) -> None:
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self._recent.append(latency_ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._recent:
+            return None
+        ordered = sorted(self._recent)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def snapshot(self) -> Dict:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'mean_ms': round(self.total_ms / self.count, 1) if self.count else None,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'buckets_ms': dict(zip([str(b) for b in LATENCY_BUCKETS_MS] + ['+Inf'], self.buckets)),
+        }
+
+
+class LLMProvider:
+    """Base class: turn a prompt plus generation options into text
+
+    Options understood by every provider: temperature, top_k, top_p,
+    max_output_tokens, system_instruction (a static prefix sent separately
+    from the prompt) and response_schema (honoured where the API supports
+    schema-constrained JSON output).
+    """
+
+    name = 'provider'
+
+    def __init__(self, api_key: str, model: str, base_url: str, timeout: float = 30.0):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip('/')
+        self.timeout = httpx.Timeout(timeout, connect=5.0)
+        self.latency = LatencyTracker()
+        self.tokens = {'prompt': 0, 'output': 0}
+
+    async def generate(self, prompt: str, options: Dict) -> str:
+        """Return generated text; account latency, tokens and outcome per call"""
+        usage = {'prompt': 0, 'output': 0}
+        token = _call_usage.set(usage)
+        started = time.perf_counter()
+        outcome, error_class = 'ok', None
+        try:
+            text = await self._generate(prompt, options)
+        except asyncio.CancelledError:
+            # Hedged calls that lost the race end up here
+            outcome = error_class = 'cancelled'
+            raise
+        except Exception as e:
+            outcome, error_class = 'error', classify_error(e)
+            self.latency.errors += 1
+            raise
+        else:
+            self.latency.observe((time.perf_counter() - started) * 1000)
+            return text
+        finally:
+            _call_usage.reset(token)
+            elapsed = time.perf_counter() - started
+            llm_duration.observe(elapsed, provider=self.name, outcome=outcome)
+            llm_requests.inc(provider=self.name, outcome=outcome)
+            if outcome == 'error':
+                llm_errors.inc(provider=self.name, error_class=error_class)
+            recent_calls.append({
+                'provider': self.name,
+                'model': self.model,
+                'outcome': outcome,
+                'error_class': error_class,
+                'latency_ms': round(elapsed * 1000, 1),
+                'prompt_tokens': usage['prompt'],
+                'output_tokens': usage['output'],
+                'max_output_tokens': options.get('max_output_tokens'),
+                'at': time.time(),
+            })
+
+    async def _generate(self, prompt: str, options: Dict) -> str:
+        raise NotImplementedError
+
+    def record_usage(self, prompt_tokens: Optional[int], output_tokens: Optional[int]) -> None:
+        call_usage = _call_usage.get()
+        for kind, count in (('prompt', prompt_tokens), ('output', output_tokens)):
+            if count:
+                self.tokens[kind] += count
+                llm_tokens.inc(count, provider=self.name, kind=kind)
+                if call_usage is not None:
+                    call_usage[kind] += count
+
+    async def _post(self, url: str, payload: Dict, headers: Optional[Dict] = None) -> Dict:
+        try:
+            response = await get_http_client().post(
+                url, json=payload, headers=headers, timeout=self.timeout
+            )
+        except httpx.TimeoutException:
+            raise ProviderError(self.name, "request timed out", kind='timeout')
+        except httpx.HTTPError as e:
+            raise ProviderError(self.name, f"network error: {str(e)}", kind='network')
+
+        if not response.is_success:
+            try:
+                message = response.json().get('error', {}).get('message', response.text)
+            except ValueError:
+                message = response.text
+            raise ProviderError(
+                self.name, f"API error: {message}",
+                status_code=response.status_code,
+                retryable=response.status_code == 429 or response.status_code >= 500
+            )
+        return response.json()
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini generateContent API"""
+
+    name = 'gemini'
+
+    def url(self, stream: bool = False) -> str:
+        method = 'streamGenerateContent' if stream else 'generateContent'
+        return f"{self.base_url}/v1beta/models/{self.model}:{method}"
+
+    def build_payload(self, prompt: str, options: Dict) -> Dict:
+        generation_config = {
+            "temperature": options.get('temperature', 0.8),
+            "topK": options.get('top_k', 40),
+            "topP": options.get('top_p', 0.95),
+            "maxOutputTokens": options.get('max_output_tokens', 4096),
+        }
+        if options.get('response_schema'):
+            generation_config["responseMimeType"] = "application/json"
+            generation_config["responseSchema"] = options['response_schema']
+        payload = {
+            "contents": [{
+                "parts": [{
+                    "text": prompt
+                }]
+            }],
+            "generationConfig": generation_config
+        }
+        if options.get('system_instruction'):
+            payload["systemInstruction"] = {"parts": [{"text": options['system_instruction']}]}
+        return payload
+
+    def record_usage_metadata(self, data: Dict) -> None:
+        usage = data.get('usageMetadata') or {}
+        self.record_usage(usage.get('promptTokenCount'), usage.get('candidatesTokenCount'))
+
+    async def _generate(self, prompt: str, options: Dict) -> str:
+        data = await self._post(
+            f"{self.url()}?key={self.api_key}", self.build_payload(prompt, options)
+        )
+        self.record_usage_metadata(data)
+        parts = data.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])
+        return ''.join(part.get('text', '') for part in parts)
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI-compatible chat completions API"""
+
+    name = 'openai'
+
+    async def _generate(self, prompt: str, options: Dict) -> str:
+        messages = [{"role": "user", "content": prompt}]
+        if options.get('system_instruction'):
+            messages.insert(0, {"role": "system", "content": options['system_instruction']})
+        data = await self._post(
+            f"{self.base_url}/v1/chat/completions",
+            {
+                "model": self.model,
+                "messages": messages,
+                "temperature": options.get('temperature', 0.8),
+                "top_p": options.get('top_p', 0.95),
+                "max_tokens": options.get('max_output_tokens', 4096),
+            },
+            headers={"Authorization": f"Bearer {self.api_key}"}
+        )
+        usage = data.get('usage') or {}
+        self.record_usage(usage.get('prompt_tokens'), usage.get('completion_tokens'))
+        return data.get('choices', [{}])[0].get('message', {}).get('content') or ''
+
+
+class AnthropicProvider(LLMProvider):
+    """Anthropic Messages API"""
+
+    name = 'anthropic'
+
+    async def _generate(self, prompt: str, options: Dict) -> str:
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": options.get('temperature', 0.8),
+            "max_tokens": options.get('max_output_tokens', 4096),
+        }
+        if options.get('system_instruction'):
+            payload["system"] = options['system_instruction']
+        data = await self._post(
+            f"{self.base_url}/v1/messages",
+            payload,
+            headers={"x-api-key": self.api_key, "anthropic-version": "2023-06-01"}
+        )
+        usage = data.get('usage') or {}
+        self.record_usage(usage.get('input_tokens'), usage.get('output_tokens'))
+        return ''.join(block.get('text', '') for block in data.get('content', []))
+
+
+class ProviderRouter:
+    """Send each request to the first provider, hedging to the next one
+
+    If the primary has not answered within its recent p95 latency (or
+    ``initial_hedge_delay`` before enough samples exist), the same request is
+    sent to the next provider; whichever succeeds first wins and the other is
+    cancelled. A primary that fails with a retryable error (429, 5xx,
+    timeout, network) fails over immediately; any other error, such as a
+    400 for a bad request, is raised as is.
+    """
+
+    def __init__(
+        self,
+        providers: List[LLMProvider],
+        hedging: bool = True,
+        initial_hedge_delay: float = 10.0,
+        min_hedge_delay: float = 0.25,
+        min_samples: int = 20
+    ):
+        self.providers = providers
+        self.hedging = hedging
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.failovers = 0
+
+    def get(self, name: str) -> Optional[LLMProvider]:
+        return next((p for p in self.providers if p.name == name), None)
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        """Seconds to wait on a provider before sending a hedged request"""
+        if provider.latency.count < self.min_samples:
+            return self.initial_hedge_delay
+        return max(provider.latency.percentile(0.95) / 1000, self.min_hedge_delay)
+
+    async def generate(self, prompt: str, options: Optional[Dict] = None) -> str:
+        if not self.providers:
+            raise ProviderError('router', "no LLM provider configured", retryable=False)
+        options = options or {}
+
+        pending = {}
+        errors = []
+        remaining = list(self.providers)
+
+        def launch() -> asyncio.Task:
+            provider = remaining.pop(0)
+            task = asyncio.ensure_future(provider.generate(prompt, options))
+            pending[task] = provider
+            return task
+
+        primary = launch()
+        hedged = False
+        try:
+            while pending:
+                timeout = None
+                if self.hedging and remaining and len(pending) == 1:
+                    timeout = self.hedge_delay(next(iter(pending.values())))
+
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Primary is slower than its recent p95: hedge
+                    self.hedges_sent += 1
+                    llm_retries.inc(reason='hedge')
+                    hedged = True
+                    launch()
+                    continue
+
+                for task in done:
+                    pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if hedged and task is not primary:
+                            self.hedges_won += 1
+                        return task.result()
+                    if not getattr(error, 'retryable', True):
+                        raise error
+                    errors.append(error)
+
+                if not pending and remaining:
+                    self.failovers += 1
+                    llm_retries.inc(reason='failover')
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise errors[-1] if len(errors) == 1 else ProviderError(
+            'router', "all providers failed: " + "; ".join(str(e) for e in errors),
+            retryable=any(getattr(e, 'retryable', True) for e in errors)
+        )
+
+    def stats(self) -> Dict:
+        return {
+            'providers': {
+                p.name: {**p.latency.snapshot(), 'tokens': dict(p.tokens)} for p in self.providers
+            },
+            'hedges_sent': self.hedges_sent,
+            'hedges_won': self.hedges_won,
+            'failovers': self.failovers,
+        }
+
+
+PROVIDER_CLASSES = {
+    'gemini': (GeminiProvider, 'GEMINI_API_KEY', 'GEMINI_API_BASE',
+               'https://generativelanguage.googleapis.com', 'GEMINI_MODEL', 'gemini-2.0-flash-001'),
+    'openai': (OpenAIProvider, 'OPENAI_API_KEY', 'OPENAI_BASE_URL',
+               'https://api.openai.com', 'OPENAI_MODEL', 'gpt-4o-mini'),
+    'anthropic': (AnthropicProvider, 'ANTHROPIC_API_KEY', 'ANTHROPIC_BASE_URL',
+                  'https://api.anthropic.com', 'ANTHROPIC_MODEL', 'claude-3-haiku-20240307'),
+}
+
+
+def create_provider_router() -> ProviderRouter:
+    """
+    Build the provider chain from environment variables
+
+    LLM_PROVIDERS sets the order (default "gemini,openai,anthropic"); a
+    provider is only included when its API key is set. Base URLs can point
+    at local stand-in servers.
+    """
+    timeout = float(os.getenv('GEMINI_TIMEOUT_SECONDS', '30'))
+    providers = []
+    for name in os.getenv('LLM_PROVIDERS', 'gemini,openai,anthropic').split(','):
+        name = name.strip().lower()
+        if name not in PROVIDER_CLASSES:
+            continue
+        cls, key_var, base_var, default_base, model_var, default_model = PROVIDER_CLASSES[name]
+        api_key = os.getenv(key_var)
+        if not api_key:
+            continue
+        providers.append(cls(
+            api_key=api_key,
+            model=os.getenv(model_var, default_model),
+            base_url=os.getenv(base_var, default_base),
+            timeout=timeout
+        ))
+
+    return ProviderRouter(
+        providers,
+        hedging=os.getenv('LLM_HEDGING', '1') == '1',
+        initial_hedge_delay=float(os.getenv('LLM_HEDGE_INITIAL_MS', '10000')) / 1000
+    )
@@ -6,16 +6,42 @@ Extracts information from PDF and DOCX files
 import re
 from pathlib import Path
 from typing import Dict, List, Optional
-import pdfplumber
-from docx import Document
+
+from utils.lazy_import import lazy_import
+from utils.timing import timed_stage
+
+# Imported on the first upload of each format
+pdfplumber = lazy_import('pdfplumber')
+docx = lazy_import('docx')
+
+# Words that mean a "name" line is really a heading or job title
+SECTION_WORDS = {
+    'summary', 'profile', 'objective', 'experience', 'education', 'skills',
+    'engineer', 'developer', 'analyst', 'manager', 'scientist', 'consultant'
+}
 
 
 class ResumeParser:
     """Parse resumes and extract structured information"""
     
     def __init__(self):
-        self.email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        self.phone_pattern = r'(\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
+        # Compiled once, so a preforking server shares them with its workers
+        self.email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+        self.phone_pattern = re.compile(r'(\+\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
+        self.experience_section = re.compile(
+            r'(?:experience|work history|employment)(.*?)(?:education|skills|projects|$)', re.DOTALL)
+        self.education_section = re.compile(
+            r'(?:education|academic)(.*?)(?:experience|skills|projects|$)', re.DOTALL)
+        self.projects_section = re.compile(
+            r'(?:projects?|portfolio)(.*?)(?:experience|education|skills|$)', re.DOTALL)
+        self.degree_pattern = re.compile(
+            r'(bachelor|master|phd|doctorate|b\.s\.|m\.s\.|b\.a\.|m\.a\.)[^\n]*', re.IGNORECASE)
+        self.entry_separator = re.compile(r'\n\s*\n')
+        # Evidence that a section exists even when the rules found no entries
+        self.date_range_pattern = re.compile(
+            r'\b(?:19|20)\d{2}\s*(?:-|–|—|to)\s*(?:(?:19|20)\d{2}|present|current|now)\b')
+        self.institution_pattern = re.compile(r'\b(?:university|college|institute|school of|academy)\b')
+        self.skills_heading = re.compile(r'^\s*(?:technical |core |key )?skills\b', re.MULTILINE)
         
     def parse_file(self, file_path: str) -> Dict:
         """Parse resume file and extract information"""
@@ -34,6 +60,7 @@ class ResumeParser:
         
         return parsed_data
     
+    @timed_stage('upload')
     def _extract_pdf_text(self, file_path: Path) -> str:
         """Extract text from PDF file"""
         text = ""
@@ -44,18 +71,20 @@ class ResumeParser:
                     text += page_text + "\n"
         return text
     
+    @timed_stage('upload')
     def _extract_docx_text(self, file_path: Path) -> str:
         """Extract text from DOCX file"""
-        doc = Document(file_path)
+        doc = docx.Document(file_path)
         text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
         return text
     
+    @timed_stage('upload')
     def _extract_information(self, text: str) -> Dict:
         """Extract structured information from resume text"""
         
         # Extract contact information
-        emails = re.findall(self.email_pattern, text)
-        phones = re.findall(self.phone_pattern, text)
+        emails = self.email_pattern.findall(text)
+        phones = self.phone_pattern.findall(text)
         
         # Extract name (usually first line or near top)
         lines = [line.strip() for line in text.split('\n') if line.strip()]
@@ -67,7 +96,7 @@ class ResumeParser:
         education = self._extract_education(text)
         projects = self._extract_projects(text)
         
-        return {
+        parsed_data = {
             'name': name,
             'email': emails[0] if emails else None,
             'phone': phones[0] if phones else None,
@@ -76,6 +105,55 @@ class ResumeParser:
             'education': education,
             'projects': projects
         }
+        parsed_data['confidence'] = self._score_confidence(text, lines, parsed_data)
+        
+        return parsed_data
+    
+    def _score_confidence(self, text: str, lines: List[str], parsed_data: Dict) -> Dict[str, float]:
+        """
+        Cheap 0-1 confidence per extracted field
+        
+        Low scores mark fields the rules probably got wrong: a fallback
+        name, or no entries although the text shows dates, institutions
+        or a skills section.
+        """
+        text_lower = text.lower()
+        
+        name = parsed_data['name']
+        if name == "Candidate":
+            name_score = 0.0
+        elif SECTION_WORDS & set(name.lower().split()):
+            name_score = 0.2
+        else:
+            name_score = 0.9 if lines and lines[0] == name else 0.7
+        
+        has_dates = self.date_range_pattern.search(text_lower) is not None
+        if parsed_data['experience']:
+            experience_score = 0.9 if has_dates else 0.7
+        else:
+            experience_score = 0.1 if has_dates else 0.5
+        
+        has_institution = self.institution_pattern.search(text_lower) is not None
+        if parsed_data['education']:
+            education_score = 0.9
+        else:
+            education_score = 0.2 if has_institution else 0.6
+        
+        # One keyword hit already shows the rules worked; only a skills
+        # section with no hits at all marks a failed extraction
+        skill_count = len(parsed_data['skills'])
+        if skill_count:
+            skills_score = min(0.6 + 0.1 * skill_count, 1.0)
+        else:
+            skills_score = 0.1 if self.skills_heading.search(text_lower) else 0.5
+        
+        return {
+            'name': name_score,
+            'email': 1.0 if parsed_data['email'] else 0.5,
+            'skills': skills_score,
+            'experience': experience_score,
+            'education': education_score
+        }
     
     def _extract_name(self, lines: List[str]) -> Optional[str]:
         """Extract candidate name from resume"""
@@ -119,13 +197,12 @@ class ResumeParser:
         experience = []
         
         # Look for experience section
-        exp_pattern = r'(?:experience|work history|employment)(.*?)(?:education|skills|projects|$)'
-        match = re.search(exp_pattern, text.lower(), re.DOTALL)
+        match = self.experience_section.search(text.lower())
         
         if match:
             exp_text = match.group(1)
             # Split by common delimiters
-            entries = re.split(r'\n\s*\n', exp_text)
+            entries = self.entry_separator.split(exp_text)
             
             for entry in entries[:5]:  # Limit to 5 most recent
                 if len(entry.strip()) > 20:
@@ -140,14 +217,12 @@ class ResumeParser:
         education = []
         
         # Look for education section
-        edu_pattern = r'(?:education|academic)(.*?)(?:experience|skills|projects|$)'
-        match = re.search(edu_pattern, text.lower(), re.DOTALL)
+        match = self.education_section.search(text.lower())
         
         if match:
             edu_text = match.group(1)
             # Common degree patterns
-            degrees = re.findall(r'(bachelor|master|phd|doctorate|b\.s\.|m\.s\.|b\.a\.|m\.a\.)[^\n]*', 
-                                edu_text, re.IGNORECASE)
+            degrees = self.degree_pattern.findall(edu_text)
             
             for degree in degrees[:3]:
                 education.append({
@@ -161,12 +236,11 @@ class ResumeParser:
         projects = []
         
         # Look for projects section
-        proj_pattern = r'(?:projects?|portfolio)(.*?)(?:experience|education|skills|$)'
-        match = re.search(proj_pattern, text.lower(), re.DOTALL)
+        match = self.projects_section.search(text.lower())
         
         if match:
             proj_text = match.group(1)
-            entries = re.split(r'\n\s*\n', proj_text)
+            entries = self.entry_separator.split(proj_text)
             
             for entry in entries[:5]:
                 if len(entry.strip()) > 20:
@@ -0,0 +1,169 @@
+"""
+Prefetch Service
+Low-priority background warming of the job recommendations cache
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.job_cache import CacheKey, RecommendationCache
+from services.upstream_guard import CLOSED, UpstreamGuard
+
+Fetch = Callable[[], Awaitable[list]]
+
+
+class RecommendationPrefetcher:
+    """Fetch likely next requests into the cache while the upstream is idle
+
+    A single worker drains a bounded queue. Before each fetch it waits until
+    no interactive upstream call is in flight, the circuit is closed and
+    the rate limiter has tokens to spare beyond ``token_reserve``; a
+    prefetch that cannot start within ``max_delay`` seconds is dropped.
+    Fetches go through the cache's single-flight path, so a user request
+    for the same key joins the prefetch instead of starting a second call.
+
+    Prefetches are grouped by owner (the analysis file_id). Cancelling an
+    owner drops its queued work and cancels its running upstream call
+    unless a user request is already waiting on it.
+    """
+
+    def __init__(
+        self,
+        cache: RecommendationCache,
+        guard: UpstreamGuard,
+        max_queue: int = 32,
+        max_delay: float = 30.0,
+        idle_poll: float = 0.25,
+        token_reserve: float = 2.0
+    ):
+        self.cache = cache
+        self.guard = guard
+        self.max_queue = max_queue
+        self.max_delay = max_delay
+        self.idle_poll = idle_poll
+        self.token_reserve = token_reserve
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._pending: Dict[str, List[list]] = {}
+        self._current: Optional[Tuple[list, asyncio.Task]] = None
+        self._stopping = False
+        self.completed = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is None:
+            return
+        self._stopping = True
+        self._worker.cancel()
+        if self._current is not None:
+            self._current[1].cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        self._stopping = False
+        self._pending.clear()
+
+    def schedule(self, owner: str, items: List[Tuple[CacheKey, Fetch]]) -> int:
+        """Queue (key, fetch) pairs for owner; returns how many were queued"""
+        if self._queue is None:
+            return 0
+        queued = 0
+        for key, fetch in items:
+            entry = [owner, key, fetch, False]
+            try:
+                self._queue.put_nowait(entry)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                continue
+            self._pending.setdefault(owner, []).append(entry)
+            queued += 1
+        return queued
+
+    def cancel(self, owner: str) -> int:
+        """Cancel queued and running prefetches for owner"""
+        entries = self._pending.pop(owner, [])
+        for entry in entries:
+            entry[3] = True
+        if self._current is not None and self._current[0][0] == owner:
+            self._current[1].cancel()
+        return len(entries)
+
+    def _upstream_idle(self) -> bool:
+        return (
+            self.guard.in_flight == 0
+            and self.guard.breaker.state == CLOSED
+            and self.guard.bucket.tokens >= 1 + self.token_reserve
+        )
+
+    async def _wait_until_idle(self, entry: list) -> bool:
+        deadline = time.monotonic() + self.max_delay
+        while not entry[3] and time.monotonic() < deadline:
+            if self._upstream_idle():
+                return True
+            await asyncio.sleep(self.idle_poll)
+        return False
+
+    def _done(self, entry: list) -> None:
+        entries = self._pending.get(entry[0])
+        if entries is not None and entry in entries:
+            entries.remove(entry)
+            if not entries:
+                del self._pending[entry[0]]
+
+    async def _run(self) -> None:
+        while True:
+            entry = await self._queue.get()
+            owner, key, fetch, _ = entry
+            try:
+                if entry[3]:
+                    self.cancelled += 1
+                    continue
+                if self.cache.get(key) is not None:
+                    self.skipped += 1
+                    continue
+                if not await self._wait_until_idle(entry):
+                    if entry[3]:
+                        self.cancelled += 1
+                    else:
+                        self.skipped += 1
+                    continue
+
+                task = asyncio.ensure_future(self.cache.get_or_fetch(key, fetch))
+                self._current = (entry, task)
+                try:
+                    await task
+                    self.completed += 1
+                except asyncio.CancelledError:
+                    # Stop the upstream call too if no user request has joined it
+                    self.cache.cancel_fetch(key)
+                    if self._stopping or not task.cancelled():
+                        raise
+                    self.cancelled += 1
+                except Exception:
+                    self.failed += 1
+                finally:
+                    self._current = None
+            finally:
+                self._done(entry)
+
+    def stats(self) -> Dict:
+        return {
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'running': self._current is not None,
+            'completed': self.completed,
+            'skipped': self.skipped,
+            'dropped': self.dropped,
+            'cancelled': self.cancelled,
+            'failed': self.failed,
+        }
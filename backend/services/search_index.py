@@ -0,0 +1,237 @@
+"""
+Search Index Service
+Incrementally maintained indexes for structured search over analyses
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def _normalize(value: str) -> str:
+    return ' '.join(value.lower().split())
+
+
+class AnalysisIndex:
+    """In-memory inverted and numeric indexes over stored analyses
+
+    - skill -> posting set of file_ids
+    - top role -> posting set of file_ids
+    - fit score -> sorted list of (score, file_id)
+    - role -> sorted list of (match, file_id) for every role in role_matches
+
+    Conjunctive queries start from the smallest posting set and filter the
+    remaining predicates against a compact per-document summary, so no
+    analysis document is read from storage at query time.
+    """
+
+    def __init__(self, rescan_interval: float = 60.0):
+        self.rescan_interval = rescan_interval
+        self._lock = threading.RLock()
+        self._store_version = None
+        self._scanned_at = 0.0
+        # Own writes were counted as synced since the last full scan
+        self._skipped_scans = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self._skills: Dict[str, Set[str]] = {}
+        self._top_roles: Dict[str, Set[str]] = {}
+        self._fit_scores: List[Tuple[int, str]] = []
+        self._role_scores: Dict[str, List[Tuple[int, str]]] = {}
+        self._docs: Dict[str, Dict] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def rebuild(self, analyses: Iterable[Tuple[str, Dict]]) -> int:
+        """Index every (file_id, analysis) pair, replacing existing state"""
+        with self._lock:
+            self._reset()
+            for file_id, analysis in analyses:
+                self.add(file_id, analysis)
+            return len(self._docs)
+
+    def sync(self, store) -> int:
+        """
+        Catch up with a store other processes may also write to
+
+        Indexes analyses that appeared and drops ones that were deleted
+        since the last sync; a no-op while ``store.version()`` is unchanged.
+        Analyses are written once per upload, so known ids are not reloaded.
+        Returns the number of changes applied.
+        """
+        version = store.version()
+        with self._lock:
+            if version == self._store_version and not (
+                self._skipped_scans and time.monotonic() - self._scanned_at >= self.rescan_interval
+            ):
+                return 0
+            self._skipped_scans = False
+            self._scanned_at = time.monotonic()
+
+        stored = set(store.iter_ids())
+        with self._lock:
+            known = set(self._docs)
+        changes = 0
+        for file_id in known - stored:
+            changes += self.remove(file_id)
+        for file_id in stored - known:
+            analysis = store.load_sync(file_id)
+            if analysis is not None:
+                self.add(file_id, analysis)
+                changes += 1
+        self._store_version = version
+        return changes
+
+    def note_write(self, before, after) -> None:
+        """
+        Count this process's own store write as synced
+
+        ``before`` and ``after`` are ``store.version()`` around a write whose
+        change was already applied with add() or remove(), so the next
+        sync() does not rescan the store for it. A write by another process
+        that lands at the same moment is caught by a full rescan at most
+        ``rescan_interval`` seconds later.
+        """
+        with self._lock:
+            if self._store_version == before:
+                self._store_version = after
+                self._skipped_scans = True
+
+    def add(self, file_id: str, analysis: Dict) -> None:
+        """Index (or re-index) a single analysis"""
+        candidate = analysis.get('candidate_info', {})
+        role_matches = analysis.get('role_matches', [])
+        doc = {
+            'file_id': file_id,
+            'name': candidate.get('name'),
+            'fit_score': analysis.get('overall_insights', {}).get('fit_score', 0),
+            'top_role': role_matches[0]['title'] if role_matches else None,
+            'roles': {_normalize(m['title']): m['match'] for m in role_matches},
+            'skills': candidate.get('skills', []),
+            'upload_time': analysis.get('metadata', {}).get('upload_time'),
+        }
+
+        with self._lock:
+            self.remove(file_id)
+            self._docs[file_id] = doc
+
+            for skill in doc['skills']:
+                self._skills.setdefault(_normalize(skill), set()).add(file_id)
+            if doc['top_role']:
+                self._top_roles.setdefault(_normalize(doc['top_role']), set()).add(file_id)
+
+            bisect.insort(self._fit_scores, (doc['fit_score'], file_id))
+            for role, match in doc['roles'].items():
+                bisect.insort(self._role_scores.setdefault(role, []), (match, file_id))
+
+    def remove(self, file_id: str) -> bool:
+        """Drop an analysis from every index"""
+        with self._lock:
+            doc = self._docs.pop(file_id, None)
+            if doc is None:
+                return False
+
+            for skill in doc['skills']:
+                self._discard(self._skills, _normalize(skill), file_id)
+            if doc['top_role']:
+                self._discard(self._top_roles, _normalize(doc['top_role']), file_id)
+
+            self._remove_sorted(self._fit_scores, (doc['fit_score'], file_id))
+            for role, match in doc['roles'].items():
+                scores = self._role_scores.get(role, [])
+                self._remove_sorted(scores, (match, file_id))
+                if not scores:
+                    self._role_scores.pop(role, None)
+            return True
+
+    def search(
+        self,
+        skills: Optional[List[str]] = None,
+        min_fit: Optional[int] = None,
+        max_fit: Optional[int] = None,
+        top_role: Optional[str] = None,
+        role: Optional[str] = None,
+        min_role_match: Optional[int] = None,
+        limit: int = 50
+    ) -> Tuple[int, List[Dict]]:
+        """
+        Answer a conjunctive query
+
+        Returns (total_matches, results) with results ordered by fit score
+        """
+        role_key = _normalize(role) if role else None
+
+        with self._lock:
+            # Candidate sets from posting lists, smallest first
+            candidates: List[Set[str]] = []
+            for skill in skills or []:
+                candidates.append(self._skills.get(_normalize(skill), set()))
+            if top_role:
+                candidates.append(self._top_roles.get(_normalize(top_role), set()))
+            if role_key and min_role_match is not None:
+                scores = self._role_scores.get(role_key, [])
+                start = bisect.bisect_left(scores, (min_role_match, ''))
+                candidates.append({file_id for _, file_id in scores[start:]})
+            elif role_key:
+                candidates.append({file_id for _, file_id in self._role_scores.get(role_key, [])})
+
+            if candidates:
+                candidates.sort(key=len)
+                matched = set(candidates[0])
+                for posting in candidates[1:]:
+                    if not matched:
+                        break
+                    matched.intersection_update(posting)
+                if min_fit is not None or max_fit is not None:
+                    low = min_fit if min_fit is not None else float('-inf')
+                    high = max_fit if max_fit is not None else float('inf')
+                    matched = {
+                        file_id for file_id in matched
+                        if low <= self._docs[file_id]['fit_score'] <= high
+                    }
+                ordered = sorted(
+                    matched, key=lambda file_id: self._docs[file_id]['fit_score'], reverse=True
+                )
+            else:
+                # Pure range query: walk the sorted fit-score index
+                start = 0
+                end = len(self._fit_scores)
+                if min_fit is not None:
+                    start = bisect.bisect_left(self._fit_scores, (min_fit, ''))
+                if max_fit is not None:
+                    end = bisect.bisect_right(self._fit_scores, (max_fit, '\uffff'))
+                ordered = [file_id for _, file_id in reversed(self._fit_scores[start:end])]
+
+            results = []
+            for file_id in ordered[:limit]:
+                doc = self._docs[file_id]
+                result = {
+                    'file_id': file_id,
+                    'name': doc['name'],
+                    'fit_score': doc['fit_score'],
+                    'top_role': doc['top_role'],
+                    'skills': doc['skills'],
+                    'upload_time': doc['upload_time'],
+                }
+                if role_key:
+                    result['role_match'] = doc['roles'].get(role_key)
+                results.append(result)
+
+            return len(ordered), results
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[str]], key: str, file_id: str) -> None:
+        posting = postings.get(key)
+        if posting is not None:
+            posting.discard(file_id)
+            if not posting:
+                del postings[key]
+
+    @staticmethod
+    def _remove_sorted(entries: List[Tuple[int, str]], entry: Tuple[int, str]) -> None:
+        position = bisect.bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
@@ -0,0 +1,442 @@
+"""
+Segment Store
+Append-only segment log for analyses with an in-memory offset index
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks
+    fcntl = None
+
+from services.storage_service import BaseAnalysisStore, fsync_directory
+
+# Record header: kind, file_id length, payload length, crc32 of id + payload
+RECORD_HEADER = struct.Struct('<BHII')
+KIND_PUT = 1
+KIND_DELETE = 2
+
+SEGMENT_PATTERN = re.compile(r'^segment-(\d{6})\.(log|compacted)$')
+
+# Held exclusively by the one writer for its lifetime
+WRITER_LOCK = 'writer.lock'
+# Shared by read-only opens, exclusive while compaction deletes segments
+COMPACTION_LOCK = 'compaction.lock'
+
+
+class SegmentLogStore(BaseAnalysisStore):
+    """Store analyses as records appended to large segment files
+
+    The offset index maps ``file_id -> (segment, offset, length)`` and is
+    rebuilt on startup by scanning the memory-mapped segments. Reads slice the
+    record out of the segment's mapping and decode it in place. Deletes append
+    a tombstone; a background compaction thread rewrites sealed segments once
+    enough of their bytes are dead.
+
+    Only one process may open a directory for writing; a second writer
+    fails fast. A ``read_only`` open (e.g. an export beside the running
+    server) is a snapshot of the segments at open time: it never recovers,
+    truncates or compacts, and compaction waits until it is closed.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        segment_size: int = 64 * 1024 * 1024,
+        compact_ratio: float = 0.5,
+        compact_interval: float = 60.0,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.directory = Path(directory)
+        self.segment_size = segment_size
+        self.compact_ratio = compact_ratio
+        self.compact_interval = compact_interval
+
+        self._lock = threading.RLock()
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+        # Bytes per segment, and bytes belonging to superseded records
+        self._sizes: Dict[int, int] = {}
+        self._dead: Dict[int, int] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._active_file = None
+        self._compactor = None
+        self._stop = threading.Event()
+
+        if self.read_only:
+            if not self.directory.is_dir():
+                raise FileNotFoundError(f"No segment store at {self.directory}")
+            # Keeps the writer's compaction from deleting segments under us
+            self._lock_file = _lock(self.directory / COMPACTION_LOCK, shared=True)
+            self._load_segments()
+            self._active = max(self._sizes, default=0)
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_file = _lock(self.directory / WRITER_LOCK, blocking=False)
+        if self._lock_file is None:
+            raise RuntimeError(f"{self.directory} is already open for writing by another process")
+
+        with _held(_lock(self.directory / COMPACTION_LOCK)):
+            self._finish_interrupted_compaction()
+        self._load_segments()
+
+        self._active = max(self._sizes, default=0) or 1
+        self._sizes.setdefault(self._active, 0)
+        self._dead.setdefault(self._active, 0)
+        self._active_file = self._segment_path(self._active).open('ab')
+
+        self._compactor = threading.Thread(
+            target=self._compaction_loop, name="segment-compaction", daemon=True
+        )
+        self._compactor.start()
+
+    # ----- Engine hooks -----
+
+    def _serialize(self, analysis: Dict) -> bytes:
+        return json.dumps(analysis, separators=(',', ':')).encode('utf-8')
+
+    def _commit_batch(self, batch: List[Tuple[str, bytes]]) -> None:
+        """Append one record per analysis and fsync the segment once"""
+        with self._lock:
+            for file_id, data in batch:
+                self._append(KIND_PUT, file_id, data)
+            self._sync_active()
+
+    def _read(self, file_id: str) -> Optional[Dict]:
+        with self._lock:
+            location = self._index.get(file_id)
+            if location is None:
+                return None
+            segment, offset, length = location
+            mapping = self._mapping(segment, offset + length)
+            with memoryview(mapping) as view, view[offset:offset + length] as record:
+                text = str(record, 'utf-8')
+        return json.loads(text)
+
+    def _remove(self, file_id: str) -> bool:
+        with self._lock:
+            if file_id not in self._index:
+                return False
+            self._append(KIND_DELETE, file_id, b'')
+            self._sync_active()
+            return True
+
+    def _contains(self, file_id: str) -> bool:
+        with self._lock:
+            return file_id in self._index
+
+    def iter_ids(self) -> Iterator[str]:
+        """Yield the file_id of every stored analysis"""
+        with self._lock:
+            ids = list(self._index)
+        yield from ids
+
+    def version(self) -> Tuple[int, int]:
+        """Every put and tombstone grows the active segment"""
+        with self._lock:
+            return self._active, self._sizes.get(self._active, 0)
+
+    def close(self) -> None:
+        """Flush queued writes, stop compaction and release mappings and locks"""
+        super().close()
+        if self._compactor is not None:
+            self._stop.set()
+            self._compactor.join()
+        with self._lock:
+            for mapping in self._maps.values():
+                mapping.close()
+            self._maps.clear()
+            if self._active_file is not None:
+                self._active_file.close()
+            self._lock_file.close()
+
+    # ----- Compaction -----
+
+    def compact(self) -> bool:
+        """
+        Rewrite all sealed segments into one, dropping dead records
+
+        Returns True if a compaction ran. Skipped while a read-only open
+        holds a snapshot of the segments.
+        """
+        self._check_writable()
+        lock = _lock(self.directory / COMPACTION_LOCK, blocking=False)
+        if lock is None:
+            return False
+        with _held(lock):
+            return self._compact()
+
+    def _compact(self) -> bool:
+        with self._lock:
+            total_bytes = sum(self._sizes.values())
+            dead_bytes = sum(self._dead.values())
+            if total_bytes == 0 or dead_bytes / total_bytes < self.compact_ratio:
+                return False
+
+            # Seal the active segment so its dead records can be dropped too
+            self._roll_if_needed(force=self._sizes[self._active] > 0)
+            sealed = sorted(s for s in self._sizes if s < self._active)
+            if not sealed:
+                return False
+            snapshot = {
+                file_id: location for file_id, location in self._index.items()
+                if location[0] in sealed
+            }
+
+        # Copy live records without holding the lock; writes go to the active
+        # segment, which is never part of a compaction
+        target = sealed[-1]
+        compacting_path = self._segment_path(target, 'compacting')
+        compacted_path = self._segment_path(target, 'compacted')
+        moved = {}
+        try:
+            with compacting_path.open('wb') as out:
+                offset = 0
+                for file_id, (segment, src_offset, length) in snapshot.items():
+                    with self._lock:
+                        if self._index.get(file_id) != (segment, src_offset, length):
+                            continue
+                        mapping = self._mapping(segment, src_offset + length)
+                        payload = mapping[src_offset:src_offset + length]
+                    record = self._encode(KIND_PUT, file_id, payload)
+                    out.write(record)
+                    moved[file_id] = (
+                        (segment, src_offset, length),
+                        (target, offset + len(record) - length, length)
+                    )
+                    offset += len(record)
+                out.flush()
+                os.fsync(out.fileno())
+        except BaseException:
+            compacting_path.unlink(missing_ok=True)
+            raise
+        # Only a fully written output carries the .compacted name, which is
+        # what lets recovery delete the source segments
+        os.replace(compacting_path, compacted_path)
+        fsync_directory(self.directory)
+
+        with self._lock:
+            for segment in sealed:
+                mapping = self._maps.pop(segment, None)
+                if mapping is not None:
+                    mapping.close()
+                self._segment_path(segment).unlink()
+                self._sizes.pop(segment, None)
+                self._dead.pop(segment, None)
+            os.replace(compacted_path, self._segment_path(target))
+            fsync_directory(self.directory)
+
+            self._sizes[target] = offset
+            self._dead[target] = 0
+            for file_id, (old, new) in moved.items():
+                if self._index.get(file_id) == old:
+                    self._index[file_id] = new
+                else:
+                    # Overwritten or deleted while we were copying
+                    self._dead[target] += RECORD_HEADER.size + len(file_id.encode('utf-8')) + new[2]
+        return True
+
+    def _compaction_loop(self) -> None:
+        while not self._stop.wait(self.compact_interval):
+            try:
+                self.compact()
+            except Exception:
+                # Compaction is best effort; the log stays readable either way
+                pass
+
+    def _finish_interrupted_compaction(self) -> None:
+        """Complete a compaction whose output was fully written, discard any other"""
+        for path in self.directory.glob('segment-*.compacting'):
+            # Crashed mid-copy; the source segments are untouched
+            path.unlink()
+        for path in self.directory.glob('segment-*.compacted'):
+            if not self._is_intact(path):
+                path.unlink()
+                continue
+            target = int(SEGMENT_PATTERN.match(path.name).group(1))
+            for old in self.directory.glob('segment-*.log'):
+                if int(SEGMENT_PATTERN.match(old.name).group(1)) <= target:
+                    old.unlink()
+            os.replace(path, self._segment_path(target))
+        fsync_directory(self.directory)
+
+    def _is_intact(self, path: Path) -> bool:
+        """True if every byte of a segment file belongs to a valid record"""
+        size = path.stat().st_size
+        if size == 0:
+            return True
+        with path.open('rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            end = 0
+            for *_, end in self._records(mapping):
+                pass
+            return end == size
+        finally:
+            mapping.close()
+
+    # ----- Segment I/O -----
+
+    def _segment_path(self, segment: int, suffix: str = 'log') -> Path:
+        return self.directory / f"segment-{segment:06d}.{suffix}"
+
+    @staticmethod
+    def _encode(kind: int, file_id: str, payload) -> bytes:
+        key = file_id.encode('utf-8')
+        crc = zlib.crc32(payload, zlib.crc32(key))
+        return RECORD_HEADER.pack(kind, len(key), len(payload), crc) + key + bytes(payload)
+
+    def _append(self, kind: int, file_id: str, payload: bytes) -> None:
+        self._roll_if_needed()
+        record = self._encode(kind, file_id, payload)
+        offset = self._sizes[self._active]
+        self._active_file.write(record)
+        self._sizes[self._active] = offset + len(record)
+        self._apply(kind, file_id, self._active, offset + len(record) - len(payload), len(payload), len(record))
+
+    def _apply(self, kind: int, file_id: str, segment: int, offset: int, length: int, record_size: int) -> None:
+        """Update the offset index and dead-byte accounting for one record"""
+        previous = self._index.pop(file_id, None)
+        if previous is not None:
+            old_segment, _, old_length = previous
+            if old_segment in self._dead:
+                self._dead[old_segment] += RECORD_HEADER.size + len(file_id.encode('utf-8')) + old_length
+        if kind == KIND_PUT:
+            self._index[file_id] = (segment, offset, length)
+        else:
+            self._dead[segment] += record_size
+
+    def _sync_active(self) -> None:
+        self._active_file.flush()
+        if self.fsync:
+            os.fsync(self._active_file.fileno())
+
+    def _roll_if_needed(self, force: bool = False) -> None:
+        if not force and self._sizes[self._active] < self.segment_size:
+            return
+        self._sync_active()
+        self._active_file.close()
+        self._active += 1
+        self._sizes[self._active] = 0
+        self._dead[self._active] = 0
+        self._active_file = self._segment_path(self._active).open('ab')
+
+    def _mapping(self, segment: int, needed: int) -> mmap.mmap:
+        """Return a read-only mapping of a segment covering ``needed`` bytes"""
+        mapping = self._maps.get(segment)
+        if mapping is None or len(mapping) < needed:
+            if mapping is not None:
+                mapping.close()
+            if self._active_file is not None and segment == self._active:
+                self._active_file.flush()
+            with self._segment_path(segment).open('rb') as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapping
+        return mapping
+
+    def _load_segments(self) -> None:
+        """Rebuild the offset index by scanning every segment in order"""
+        paths = {}
+        compacted = []
+        for path in self.directory.iterdir():
+            match = SEGMENT_PATTERN.match(path.name)
+            if match and match.group(2) == 'log':
+                paths[int(match.group(1))] = path
+            elif match:
+                compacted.append((int(match.group(1)), path))
+        if self.read_only:
+            # A writer would finish this crashed compaction on open; read its
+            # output in place of the segments it replaces
+            for target, path in sorted(compacted):
+                if self._is_intact(path):
+                    paths = {segment: p for segment, p in paths.items() if segment > target}
+                    paths[target] = path
+
+        for segment in sorted(paths):
+            self._sizes[segment] = 0
+            self._dead[segment] = 0
+            path = paths[segment]
+            size = path.stat().st_size
+            if size == 0:
+                continue
+
+            with path.open('rb') as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                valid = self._scan(segment, mapping)
+            except BaseException:
+                mapping.close()
+                raise
+            if self.read_only:
+                # The snapshot reads from the mappings taken here, even if a
+                # writer later compacts these segments away
+                self._maps[segment] = mapping
+                self._sizes[segment] = valid
+                continue
+            mapping.close()
+
+            if valid < size:
+                # A torn record at the tail from a crash mid-append
+                with path.open('r+b') as f:
+                    f.truncate(valid)
+            self._sizes[segment] = valid
+
+    def _scan(self, segment: int, mapping: mmap.mmap) -> int:
+        """Apply every valid record to the index; returns the end of the last one"""
+        offset = 0
+        for kind, key, payload_start, length, end in self._records(mapping):
+            self._apply(kind, key, segment, payload_start, length, end - offset)
+            offset = end
+        return offset
+
+    @staticmethod
+    def _records(mapping: mmap.mmap) -> Iterator[Tuple[int, str, int, int, int]]:
+        """Yield (kind, file_id, payload offset, payload length, record end) up to the first bad record"""
+        offset = 0
+        size = len(mapping)
+        while offset + RECORD_HEADER.size <= size:
+            kind, key_length, length, crc = RECORD_HEADER.unpack_from(mapping, offset)
+            key_start = offset + RECORD_HEADER.size
+            payload_start = key_start + key_length
+            end = payload_start + length
+            if kind not in (KIND_PUT, KIND_DELETE) or end > size:
+                return
+            key = mapping[key_start:payload_start]
+            if zlib.crc32(mapping[payload_start:end], zlib.crc32(key)) != crc:
+                return
+            yield kind, key.decode('utf-8'), payload_start, length, end
+            offset = end
+
+
+def _lock(path: Path, shared: bool = False, blocking: bool = True) -> Optional[IO]:
+    """Open and flock a lock file; None if non-blocking and held elsewhere"""
+    f = path.open('a+b')
+    if fcntl is None:
+        return f
+    operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+    try:
+        fcntl.flock(f.fileno(), operation if blocking else operation | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return None
+    return f
+
+
+@contextmanager
+def _held(lock: IO) -> Iterator[None]:
+    """Release a lock from _lock on exit"""
+    try:
+        yield
+    finally:
+        lock.close()
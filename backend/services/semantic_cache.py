@@ -0,0 +1,266 @@
+"""
+Semantic Cache Service
+Near-duplicate query cache for job recommendations
+"""
+
+import math
+import re
+import threading
+import time
+from difflib import SequenceMatcher
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from services.job_cache import CacheKey
+from utils.lazy_import import lazy_import
+from utils.scoring_logic import ScoringEngine
+
+# scikit-learn takes over a second to import; only its hash is needed
+sklearn_utils = lazy_import('sklearn.utils')
+
+# Job titles used to fit IDF weights, so generic words such as "engineer",
+# "developer" or "senior" count for less than the words that set roles apart
+SEED_QUERIES = list(ScoringEngine.ROLE_DEFINITIONS) + [
+    'software engineer', 'software developer', 'senior software engineer',
+    'junior software developer', 'backend engineer', 'backend developer',
+    'frontend engineer', 'frontend developer', 'full stack developer',
+    'full stack engineer', 'web developer', 'mobile developer', 'ios developer',
+    'android developer', 'devops engineer', 'site reliability engineer',
+    'cloud engineer', 'data engineer', 'machine learning engineer',
+    'data scientist', 'data analyst', 'business analyst', 'product analyst',
+    'product manager', 'project manager', 'program manager', 'qa engineer',
+    'test engineer', 'security engineer', 'network engineer', 'ux designer',
+    'ui designer', 'product designer', 'technical writer', 'solutions architect',
+    'engineering manager', 'remote software engineer', 'remote data analyst',
+    'lead developer', 'principal engineer', 'staff engineer', 'intern',
+]
+
+
+# Words that set the level of a role; "senior data analyst" and "junior
+# data analyst" are close in n-gram space but must never share results
+SENIORITY_LEVELS = {
+    'intern': 'intern', 'internship': 'intern',
+    'junior': 'junior', 'jr': 'junior', 'entry': 'junior', 'graduate': 'junior',
+    'senior': 'senior', 'sr': 'senior',
+    'lead': 'lead', 'staff': 'staff', 'principal': 'principal',
+}
+
+
+def seniority(query: str) -> FrozenSet[str]:
+    """Seniority levels named in a query (empty if none)"""
+    return frozenset(
+        SENIORITY_LEVELS[word] for word in re.findall(r'[a-z]+', query.lower()) if word in SENIORITY_LEVELS
+    )
+
+
+# Nouns that name the kind of role, mapped to a family; the last one in a
+# query is its head ("software engineering manager" is a manager)
+ROLE_HEADS = {
+    'engineer': 'engineer', 'engineers': 'engineer', 'engineering': 'engineer',
+    'developer': 'engineer', 'developers': 'engineer', 'dev': 'engineer', 'programmer': 'engineer',
+    'analyst': 'analyst', 'analysts': 'analyst', 'analytics': 'analyst',
+    'scientist': 'scientist', 'scientists': 'scientist', 'science': 'scientist',
+    'manager': 'manager', 'managers': 'manager', 'management': 'manager',
+    'designer': 'designer', 'designers': 'designer', 'architect': 'architect',
+    'administrator': 'administrator', 'admin': 'administrator', 'consultant': 'consultant',
+    'specialist': 'specialist', 'writer': 'writer', 'tester': 'tester',
+}
+
+# Words that do not change the role
+ROLE_FILLER = {
+    'remote', 'hybrid', 'onsite', 'job', 'jobs', 'role', 'roles', 'position', 'positions',
+    'opening', 'openings', 'level', 'a', 'an', 'the', 'in', 'for', 'of', 'and',
+}
+
+COMPOUND_WORDS = re.compile(r'\b(front|back|full)[\s-]+(end|stack)\b')
+
+
+def role_signature(query: str) -> Tuple[Optional[str], Tuple[str, ...]]:
+    """(head family, other role words) of a query; seniority and filler words are dropped"""
+    text = COMPOUND_WORDS.sub(r'\1\2', query.lower())
+    words = [
+        word for word in re.findall(r'[a-z0-9+#]+', text)
+        if word not in ROLE_FILLER and word not in SENIORITY_LEVELS
+    ]
+    for position in range(len(words) - 1, -1, -1):
+        if words[position] in ROLE_HEADS:
+            return ROLE_HEADS[words[position]], tuple(words[:position] + words[position + 1:])
+    return None, tuple(words)
+
+
+def same_role(a: str, b: str) -> bool:
+    """
+    True if two queries name the same role
+
+    The heads must be the same family, and every other role word needs a
+    near-identical counterpart (plurals, typos): "data analyst" and
+    "business analyst" share a head but are different jobs.
+    """
+    head_a, words_a = role_signature(a)
+    head_b, words_b = role_signature(b)
+    if head_a != head_b:
+        return False
+    close = lambda word, others: any(SequenceMatcher(None, word, other).ratio() >= 0.8 for other in others)
+    return all(close(word, words_b) for word in words_a) and all(close(word, words_a) for word in words_b)
+
+
+class SemanticQueryCache:
+    """Serve cached recommendations for near-duplicate queries
+
+    Queries are embedded as hashed character n-gram TF-IDF vectors (the same
+    features as scikit-learn's ``char_wb`` analyzer, hashed with its
+    murmurhash3) and stored as rows of a dense, preallocated matrix. A query
+    only has a few dozen non-zero features, so a lookup gathers just those
+    columns and needs no vocabulary. N-gram similarity alone cannot tell
+    "data analyst" from "business analyst", so a match also requires the
+    same role (see same_role), the same location, the same seniority words
+    (see SENIORITY_LEVELS) and a skills overlap of at least
+    ``skills_threshold`` (Jaccard).
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.62,
+        skills_threshold: float = 0.6,
+        ttl: float = 300.0,
+        max_entries: int = 512,
+        n_features: int = 2 ** 12
+    ):
+        self.threshold = threshold
+        self.skills_threshold = skills_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.n_features = n_features
+        self._idf_weights: Optional[np.ndarray] = None
+        self._idf_lock = threading.Lock()
+
+        self._lock = threading.Lock()
+        # Column-major so gathering a query's feature columns is contiguous
+        self._vectors = np.zeros((max_entries, n_features), dtype=np.float32, order='F')
+        # slot -> (key, expires_at, value, last_used)
+        self._slots: List[Optional[Tuple[CacheKey, float, list, float]]] = [None] * max_entries
+        self._slot_by_key: Dict[CacheKey, int] = {}
+        self.hits = 0
+
+    @property
+    def _idf(self) -> np.ndarray:
+        """Smoothed IDF over the seed titles, fitted on first use; unseen n-grams get the maximum"""
+        if self._idf_weights is None:
+            with self._idf_lock:
+                if self._idf_weights is None:
+                    document_frequency = np.zeros(self.n_features, dtype=np.float32)
+                    for seed in SEED_QUERIES:
+                        document_frequency[list(self._features(seed.lower()))] += 1
+                    self._idf_weights = np.log((1 + len(SEED_QUERIES)) / (1 + document_frequency)) + 1
+        return self._idf_weights
+
+    def warm_up(self) -> None:
+        """Fit the seed IDF now (e.g. before forking workers) instead of on the first lookup"""
+        self._idf
+
+    def _features(self, text: str) -> Dict[int, int]:
+        """Count hashed character 3- and 4-grams within word boundaries"""
+        murmurhash3_32 = sklearn_utils.murmurhash3_32
+        counts: Dict[int, int] = {}
+        for word in text.split():
+            padded = f" {word} "
+            for n in (3, 4):
+                for start in range(len(padded) - n + 1):
+                    index = murmurhash3_32(padded[start:start + n], positive=True) % self.n_features
+                    counts[index] = counts.get(index, 0) + 1
+        return counts
+
+    def _embed(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the (indices, weights) of an L2-normalized sparse vector"""
+        counts = self._features(query)
+        indices = np.fromiter(counts, dtype=np.intp, count=len(counts))
+        tf = np.array([1 + math.log(c) for c in counts.values()], dtype=np.float32)
+        weights = tf * self._idf[indices]
+        norm = np.linalg.norm(weights)
+        return indices, (weights / norm if norm else weights)
+
+    def lookup(self, key: CacheKey) -> Optional[Tuple[list, float]]:
+        """Return (value, similarity) for the closest compatible entry"""
+        query, skills, location, count = key
+        if not query or not self._slot_by_key:
+            return None
+
+        indices, weights = self._embed(query)
+        if not len(indices):
+            return None
+        levels = seniority(query)
+        now = time.monotonic()
+
+        with self._lock:
+            similarities = self._vectors[:, indices] @ weights
+            for slot in np.argsort(similarities)[::-1][:8]:
+                similarity = float(similarities[slot])
+                if similarity < self.threshold:
+                    break
+                entry = self._slots[slot]
+                if entry is None:
+                    continue
+                (cached_query, cached_skills, cached_location, cached_count), expires_at, value, _ = entry
+                if expires_at <= now:
+                    self._evict(slot)
+                    continue
+                if cached_location != location or cached_count != count:
+                    continue
+                if seniority(cached_query) != levels or not same_role(query, cached_query):
+                    continue
+                if not self._skills_compatible(skills, cached_skills):
+                    continue
+                self._slots[slot] = entry[:3] + (now,)
+                self.hits += 1
+                return value, similarity
+        return None
+
+    def add(self, key: CacheKey, value: list) -> None:
+        """Remember a fetched result for future near-duplicate lookups"""
+        if not key[0]:
+            return
+        indices, weights = self._embed(key[0])
+        now = time.monotonic()
+
+        with self._lock:
+            slot = self._slot_by_key.get(key)
+            if slot is None:
+                slot = self._free_slot(now)
+            self._vectors[slot] = 0
+            self._vectors[slot, indices] = weights
+            self._slots[slot] = (key, now + self.ttl, value, now)
+            self._slot_by_key[key] = slot
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors[:] = 0
+            self._slots = [None] * self.max_entries
+            self._slot_by_key.clear()
+
+    def _skills_compatible(self, requested, cached) -> bool:
+        if requested == cached:
+            return True
+        union = requested | cached
+        return bool(union) and len(requested & cached) / len(union) >= self.skills_threshold
+
+    def _free_slot(self, now: float) -> int:
+        """Pick an empty or expired slot, else the least recently used one"""
+        oldest_slot, oldest_used = 0, float('inf')
+        for slot, entry in enumerate(self._slots):
+            if entry is None:
+                return slot
+            if entry[1] <= now:
+                self._evict(slot)
+                return slot
+            if entry[3] < oldest_used:
+                oldest_slot, oldest_used = slot, entry[3]
+        self._evict(oldest_slot)
+        return oldest_slot
+
+    def _evict(self, slot: int) -> None:
+        entry = self._slots[slot]
+        if entry is not None:
+            self._slot_by_key.pop(entry[0], None)
+        self._slots[slot] = None
+        self._vectors[slot] = 0
@@ -0,0 +1,413 @@
+"""
+Storage Service
+Persists analysis results atomically without blocking the event loop
+"""
+
+import asyncio
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# A temp file older than this cannot belong to a write still in progress
+STALE_TEMP_SECONDS = 15 * 60
+
+
+class BaseAnalysisStore:
+    """Shared async API, pending-write visibility and group commit
+
+    Subclasses implement ``_commit_batch`` (durably write a list of
+    ``(file_id, serialized_bytes)``), ``_read``, ``_remove``, ``_contains``
+    and ``iter_ids``. With ``group_commit`` enabled, writes that arrive within
+    ``commit_window`` seconds of each other are handed to ``_commit_batch``
+    together by a single writer thread.
+
+    A ``read_only`` store (exports, scripts run beside the server) never
+    modifies the directory and refuses writes.
+    """
+
+    def __init__(
+        self,
+        group_commit: bool = False,
+        commit_window: float = 0.005,
+        max_batch: int = 32,
+        fsync: bool = True,
+        read_only: bool = False
+    ):
+        self.read_only = read_only
+        self.group_commit = group_commit
+        self.commit_window = commit_window
+        self.max_batch = max_batch
+        self.fsync = fsync
+
+        # Serialized documents that are queued but not yet committed
+        self._pending: Dict[str, bytes] = {}
+        self._pending_lock = threading.Lock()
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    # ----- Writes -----
+
+    async def save(self, file_id: str, analysis: Dict) -> None:
+        """Serialize and durably store an analysis off the event loop"""
+        self._check_writable()
+        data = await asyncio.to_thread(self._serialize, analysis)
+
+        if not self.group_commit:
+            await asyncio.to_thread(self._commit_batch, [(file_id, data)])
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._pending_lock:
+            self._pending[file_id] = data
+        self._ensure_writer()
+        self._queue.put((file_id, data, loop, future))
+        await future
+
+    def save_sync(self, file_id: str, analysis: Dict) -> None:
+        """Store an analysis from synchronous code (scripts, migrations)"""
+        self._check_writable()
+        self._commit_batch([(file_id, self._serialize(analysis))])
+
+    async def delete(self, file_id: str) -> bool:
+        """Delete an analysis, returning False if it did not exist"""
+        return await asyncio.to_thread(self.delete_sync, file_id)
+
+    def delete_sync(self, file_id: str) -> bool:
+        """Delete an analysis from synchronous code"""
+        self._check_writable()
+        with self._pending_lock:
+            self._pending.pop(file_id, None)
+        return self._remove(file_id)
+
+    def close(self) -> None:
+        """Flush queued writes and stop the group-commit writer"""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        self._writer = None
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise PermissionError("Analysis store is open read-only")
+
+    # ----- Reads -----
+
+    async def load(self, file_id: str) -> Optional[Dict]:
+        """Load an analysis, or None if it does not exist"""
+        return await asyncio.to_thread(self.load_sync, file_id)
+
+    def load_sync(self, file_id: str) -> Optional[Dict]:
+        """Load an analysis from synchronous code"""
+        with self._pending_lock:
+            data = self._pending.get(file_id)
+        if data is not None:
+            return json.loads(data)
+        return self._read(file_id)
+
+    def exists(self, file_id: str) -> bool:
+        """Check whether an analysis is stored (or queued for storage)"""
+        with self._pending_lock:
+            if file_id in self._pending:
+                return True
+        return self._contains(file_id)
+
+    def iter_ids(self) -> Iterator[str]:
+        """Yield the file_id of every stored analysis"""
+        raise NotImplementedError
+
+    def version(self):
+        """A value that changes whenever an analysis is added or removed"""
+        raise NotImplementedError
+
+    def iter_analyses(self) -> Iterator[Tuple[str, Dict]]:
+        """Yield (file_id, analysis) pairs one at a time"""
+        for file_id in self.iter_ids():
+            analysis = self.load_sync(file_id)
+            if analysis is not None:
+                yield file_id, analysis
+
+    # ----- Storage engine hooks -----
+
+    def _serialize(self, analysis: Dict) -> bytes:
+        return json.dumps(analysis, indent=2).encode("utf-8")
+
+    def _commit_batch(self, batch: List[Tuple[str, bytes]]) -> None:
+        raise NotImplementedError
+
+    def _read(self, file_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def _remove(self, file_id: str) -> bool:
+        raise NotImplementedError
+
+    def _contains(self, file_id: str) -> bool:
+        raise NotImplementedError
+
+    # ----- Group commit -----
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._pending_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._writer_loop, name="analysis-group-commit", daemon=True
+                )
+                self._writer.start()
+
+    def _writer_loop(self) -> None:
+        """Collect queued writes into batches and commit them together"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.commit_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+
+            # Last write wins when the same file_id appears twice in a batch
+            latest = {file_id: data for file_id, data, _, _ in batch}
+            error = None
+            try:
+                self._commit_batch(list(latest.items()))
+            except Exception as e:
+                error = e
+
+            with self._pending_lock:
+                for file_id, data in latest.items():
+                    if self._pending.get(file_id) is data:
+                        del self._pending[file_id]
+
+            for _, _, loop, future in batch:
+                loop.call_soon_threadsafe(self._resolve, future, error)
+
+            if stop:
+                return
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, error: Optional[Exception]) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(None)
+
+
+class AnalysisStore(BaseAnalysisStore):
+    """Store one JSON document per analysis with atomic, off-loop writes
+
+    Every write goes to a temporary file in the target directory, is fsynced
+    and then renamed over the final path, so readers only ever see a complete
+    document. A group-committed batch shares one directory fsync.
+    """
+
+    def __init__(self, directory: Path, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = Path(directory)
+        if self.read_only:
+            if not self.directory.is_dir():
+                raise FileNotFoundError(f"No analysis store at {self.directory}")
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._remove_stale_temp_files()
+
+    def path_for(self, file_id: str) -> Path:
+        """Return the on-disk path of an analysis"""
+        return self.directory / f"{file_id}.json"
+
+    def iter_ids(self) -> Iterator[str]:
+        """Yield the file_id of every stored analysis"""
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.endswith(".json") and not name.startswith("."):
+                    yield name[:-len(".json")]
+
+    def version(self) -> int:
+        """Directory mtime: every rename into it and unlink, from any process, changes it"""
+        return self.directory.stat().st_mtime_ns
+
+    def _read(self, file_id: str) -> Optional[Dict]:
+        try:
+            with self.path_for(file_id).open("rb") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _remove(self, file_id: str) -> bool:
+        try:
+            self.path_for(file_id).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _contains(self, file_id: str) -> bool:
+        return self.path_for(file_id).exists()
+
+    def _commit_batch(self, batch: List[Tuple[str, bytes]]) -> None:
+        """Write each document to a temp file, fsync, rename into place"""
+        staged = []
+        try:
+            for file_id, data in batch:
+                fd, tmp_name = tempfile.mkstemp(
+                    dir=self.directory, prefix=f".{file_id}.", suffix=".tmp"
+                )
+                staged.append((file_id, tmp_name))
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+
+            for file_id, tmp_name in staged:
+                os.replace(tmp_name, self.path_for(file_id))
+            staged = []
+
+            if self.fsync:
+                fsync_directory(self.directory)
+        finally:
+            # Never leave temp files behind if a write failed half-way
+            for _, tmp_name in staged:
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+
+    def _remove_stale_temp_files(self) -> None:
+        """
+        Drop temp files left behind by a crash mid-write
+
+        Other processes (serve.py workers) may be writing to the same
+        directory, so recent temp files are left alone.
+        """
+        cutoff = time.time() - STALE_TEMP_SECONDS
+        for tmp in self.directory.glob(".*.tmp"):
+            try:
+                if tmp.stat().st_mtime < cutoff:
+                    tmp.unlink()
+            except OSError:
+                pass
+
+
+class LatestAnalysis:
+    """The most recently uploaded analysis, shared by every process using the store
+
+    Its file_id is kept in a small pointer file, replaced atomically on
+    each upload, so with several serve.py workers "latest" means the
+    latest upload to any of them. Each process caches the analysis it
+    last loaded and only reloads it from the store when the pointer moves.
+    """
+
+    def __init__(self, path: Path, store: BaseAnalysisStore):
+        self.path = Path(path)
+        self.store = store
+        self._cached: Optional[Tuple[str, Dict]] = None
+
+    async def get(self) -> Optional[Tuple[str, Dict]]:
+        """Return (file_id, analysis) of the latest upload, or None"""
+        file_id = self._read_pointer()
+        if file_id is None:
+            self._cached = None
+            return None
+        if self._cached is not None and self._cached[0] == file_id:
+            return self._cached
+
+        analysis = await self.store.load(file_id)
+        self._cached = (file_id, analysis) if analysis is not None else None
+        return self._cached
+
+    async def set(self, file_id: str, analysis: Dict) -> None:
+        """Record a new upload as the latest"""
+        self._cached = (file_id, analysis)
+        await asyncio.to_thread(self._write_pointer, file_id)
+
+    def discard(self, file_id: str) -> None:
+        """Forget the latest analysis if it is file_id (e.g. after deleting it)"""
+        if self._cached is not None and self._cached[0] == file_id:
+            self._cached = None
+        if self._read_pointer() == file_id:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _read_pointer(self) -> Optional[str]:
+        try:
+            return self.path.read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_pointer(self, file_id: str) -> None:
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(file_id)
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+
+def fsync_directory(directory: Path) -> None:
+    """Persist renames and unlinks in a directory (not supported on Windows)"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def create_analysis_store(read_only: bool = False) -> BaseAnalysisStore:
+    """
+    Build the analysis store selected by environment variables
+
+    ANALYSIS_STORAGE=files (default) keeps one JSON file per analysis in
+    uploads/analysis; ANALYSIS_STORAGE=segments appends analyses to large
+    segment files in uploads/segments. Tools that run beside the server
+    must pass ``read_only=True``.
+    """
+    options = {
+        'read_only': read_only,
+        'group_commit': os.getenv('ANALYSIS_GROUP_COMMIT', '0') == '1',
+        'commit_window': float(os.getenv('ANALYSIS_COMMIT_WINDOW_MS', '5')) / 1000,
+    }
+
+    engine = os.getenv('ANALYSIS_STORAGE', 'files').lower()
+    if engine == 'segments':
+        from services.segment_store import SegmentLogStore
+
+        return SegmentLogStore(
+            Path(os.getenv('ANALYSIS_SEGMENT_DIR', 'uploads/segments')),
+            segment_size=int(os.getenv('ANALYSIS_SEGMENT_MB', '64')) * 1024 * 1024,
+            **options
+        )
+    if engine != 'files':
+        raise ValueError(f"Unknown ANALYSIS_STORAGE engine: {engine}")
+
+    return AnalysisStore(Path('uploads/analysis'), **options)
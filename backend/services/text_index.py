@@ -0,0 +1,255 @@
+"""
+Text Index Service
+Compressed resume text storage and an on-disk BM25 inverted index
+"""
+
+import asyncio
+import heapq
+import math
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+[+#]*")
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'that', 'the', 'to', 'was', 'were', 'with'
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into index terms"""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class ResumeTextIndex:
+    """Full-text search over uploaded resume text
+
+    Raw text is kept zlib-compressed, one file per resume, for snippets.
+    Postings ``(term, file_id, tf)`` and document lengths live in a SQLite
+    database so the index is persistent, updated incrementally and never
+    needs to be loaded into memory as a whole. Queries are ranked with BM25.
+
+    The corpus statistics BM25 needs (document count, total length) are a
+    row updated in the same transaction as each insert or delete, and read
+    in the same transaction as the postings. Several processes (serve.py
+    workers) can therefore share one index and always rank consistently.
+    """
+
+    def __init__(self, directory: Path, k1: float = 1.2, b: float = 0.75):
+        self.directory = Path(directory)
+        self.text_dir = self.directory / "texts"
+        self.text_dir.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _connect(self) -> None:
+        self._db = sqlite3.connect(
+            self.directory / "index.sqlite3", check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                file_id TEXT PRIMARY KEY,
+                length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                file_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, file_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_by_file ON postings (file_id);
+            CREATE TABLE IF NOT EXISTS stats (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                doc_count INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO stats (id, doc_count, total_length)
+                SELECT 0, COUNT(*), COALESCE(SUM(length), 0) FROM docs;
+            """
+        )
+
+    # ----- Updates -----
+
+    async def add(self, file_id: str, text: str) -> None:
+        """Store and index a resume's text off the event loop"""
+        await asyncio.to_thread(self.add_sync, file_id, text)
+
+    async def remove(self, file_id: str) -> bool:
+        """Remove a resume's text and postings off the event loop"""
+        return await asyncio.to_thread(self.remove_sync, file_id)
+
+    def add_sync(self, file_id: str, text: str) -> None:
+        """Store and index a resume's text"""
+        self._write_text(file_id, text)
+
+        counts = Counter(tokenize(text))
+        length = sum(counts.values())
+
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete_postings(file_id)
+                self._db.execute(
+                    "INSERT INTO docs (file_id, length) VALUES (?, ?)", (file_id, length)
+                )
+                self._db.executemany(
+                    "INSERT INTO postings (term, file_id, tf) VALUES (?, ?, ?)",
+                    ((term, file_id, tf) for term, tf in counts.items())
+                )
+                self._db.execute(
+                    "UPDATE stats SET doc_count = doc_count + 1, total_length = total_length + ?",
+                    (length,)
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def remove_sync(self, file_id: str) -> bool:
+        """Remove a resume's text and postings"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                removed = self._delete_postings(file_id)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+        try:
+            self._text_path(file_id).unlink()
+        except FileNotFoundError:
+            pass
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def reopen(self) -> None:
+        """Open a fresh connection, e.g. in a forked worker after the parent closed its own"""
+        with self._lock:
+            self._connect()
+
+    # ----- Queries -----
+
+    async def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Rank resumes against a free-text query off the event loop"""
+        return await asyncio.to_thread(self.search_sync, query, limit)
+
+    def search_sync(self, query: str, limit: int = 10) -> List[Dict]:
+        """Rank resumes against a free-text query with BM25"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        scores: Dict[str, float] = {}
+        with self._lock:
+            # One read transaction: statistics and postings from the same snapshot
+            self._db.execute("BEGIN")
+            try:
+                doc_count, total_length = self._db.execute(
+                    "SELECT doc_count, total_length FROM stats"
+                ).fetchone()
+                if doc_count == 0:
+                    return []
+                avg_length = total_length / doc_count
+
+                for term in terms:
+                    rows = self._db.execute(
+                        "SELECT p.file_id, p.tf, d.length FROM postings p "
+                        "JOIN docs d ON d.file_id = p.file_id WHERE p.term = ?",
+                        (term,)
+                    ).fetchall()
+                    if not rows:
+                        continue
+                    df = len(rows)
+                    idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                    for file_id, tf, length in rows:
+                        norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                        scores[file_id] = scores.get(file_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+            finally:
+                self._db.execute("COMMIT")
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [
+            {
+                'file_id': file_id,
+                'score': round(score, 4),
+                'snippet': self.snippet(file_id, terms)
+            }
+            for file_id, score in top
+        ]
+
+    def load_text(self, file_id: str) -> Optional[str]:
+        """Return the decompressed text of a resume"""
+        try:
+            data = self._text_path(file_id).read_bytes()
+        except FileNotFoundError:
+            return None
+        return zlib.decompress(data).decode('utf-8')
+
+    def snippet(self, file_id: str, terms: List[str], width: int = 160) -> Optional[str]:
+        """Return a window of text around the first query term occurrence"""
+        text = self.load_text(file_id)
+        if text is None:
+            return None
+
+        lowered = text.lower()
+        positions = [
+            match.start()
+            for match in (re.search(r'\b' + re.escape(term), lowered) for term in terms)
+            if match
+        ]
+        center = min(positions) if positions else 0
+        start = max(center - width // 3, 0)
+        end = min(start + width, len(text))
+
+        fragment = ' '.join(text[start:end].split())
+        prefix = '...' if start > 0 else ''
+        suffix = '...' if end < len(text) else ''
+        return f"{prefix}{fragment}{suffix}"
+
+    # ----- Internals -----
+
+    def _text_path(self, file_id: str) -> Path:
+        return self.text_dir / f"{file_id}.txt.z"
+
+    def _write_text(self, file_id: str, text: str) -> None:
+        fd, tmp_name = tempfile.mkstemp(dir=self.text_dir, prefix=f".{file_id}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(text.encode('utf-8'), 6))
+            os.replace(tmp_name, self._text_path(file_id))
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+    def _delete_postings(self, file_id: str) -> bool:
+        """Delete a document inside the caller's transaction"""
+        row = self._db.execute("SELECT length FROM docs WHERE file_id = ?", (file_id,)).fetchone()
+        if row is None:
+            return False
+        self._db.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+        self._db.execute("DELETE FROM docs WHERE file_id = ?", (file_id,))
+        self._db.execute(
+            "UPDATE stats SET doc_count = doc_count - 1, total_length = total_length - ?", (row[0],)
+        )
+        return True
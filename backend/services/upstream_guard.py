@@ -0,0 +1,274 @@
+"""
+Upstream Guard Service
+Concurrency limit, token-bucket rate limit and circuit breaker for LLM calls
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, List, TypeVar
+
+from utils.metrics import registry
+
+T = TypeVar('T')
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Every guard in this process, so a preforking server can split their limits
+upstream_guards: List['UpstreamGuard'] = []
+
+
+class UpstreamUnavailableError(Exception):
+    """The guard refused to send a request upstream"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class TokenBucket:
+    """Reservation-based token bucket: callers wait for their token in order"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, max_wait: float) -> None:
+        """Take one token, waiting up to max_wait seconds for it"""
+        self._refill()
+        wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+        if wait > max_wait:
+            raise UpstreamUnavailableError('rate_limited', "Upstream rate limit reached, try again shortly")
+        self._tokens -= 1
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except BaseException:
+                self.refund()
+                raise
+
+    def refund(self) -> None:
+        """Return the token of a caller that never made its call"""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + 1)
+
+
+class CircuitBreaker:
+    """Open after consecutive upstream failures, probe once after a cool-down"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self) -> bool:
+        """Admit or refuse a call; returns True if the caller is the half-open probe"""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise UpstreamUnavailableError('circuit_open', "Upstream is unhealthy, failing fast")
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                raise UpstreamUnavailableError('circuit_open', "Upstream is recovering, failing fast")
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        """Let another caller probe if the half-open probe ended without an outcome
+
+        Only the caller that before_call() admitted as the probe may call this.
+        """
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0)
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self._probe_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Count a failure; returns True if this opened the circuit"""
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            opened = self.state != OPEN
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+            return opened
+        return False
+
+
+class UpstreamGuard:
+    """Gate every upstream call through breaker, rate limiter and semaphore
+
+    Only failures marked ``retryable`` (429, 5xx, timeouts, network errors)
+    count towards opening the circuit; bad requests and parse errors do not.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int = 8,
+        rate_per_minute: float = 60.0,
+        burst: float = 10.0,
+        max_wait: float = 5.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0
+    ):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.bucket = TokenBucket(rate_per_minute / 60.0, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        upstream_guards.append(self)
+
+        self._rejections = registry.counter(
+            'upstream_rejections_total', "Requests refused by the upstream guard")
+        self._failures = registry.counter(
+            'upstream_failures_total', "Upstream calls that failed with a retryable error")
+        self._opens = registry.counter(
+            'upstream_circuit_opens_total', "Times the circuit breaker opened")
+        registry.gauge(
+            f'upstream_{name}_in_flight', "Upstream calls currently in flight",
+            lambda: self.in_flight)
+        registry.gauge(
+            f'upstream_{name}_circuit_state', "Circuit state: 0 closed, 1 half-open, 2 open",
+            lambda: CIRCUIT_STATE_VALUES[self.breaker.state])
+        registry.gauge(
+            f'upstream_{name}_tokens_available', "Tokens left in the rate-limit bucket",
+            lambda: round(self.bucket.tokens, 2))
+
+    def share(self, workers: int) -> None:
+        """
+        Take this process's part of limits configured for ``workers`` processes
+
+        Called in each forked worker before it serves, so the workers
+        together stay within the configured rate. Concurrency and burst
+        never drop below one per worker.
+        """
+        self.max_in_flight = max(self.max_in_flight // workers, 1)
+        self.rate_per_minute = self.rate_per_minute / workers
+        self.burst = max(self.burst / workers, 1.0)
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.bucket = TokenBucket(self.rate_per_minute / 60.0, self.burst)
+
+    def oversubscribed(self, workers: int) -> List[str]:
+        """Limits that share(workers) raises because of the one-per-worker floor"""
+        exceeded = []
+        if workers > self.max_in_flight:
+            exceeded.append(f"max_in_flight {self.max_in_flight} -> {workers}")
+        if workers > self.burst:
+            exceeded.append(f"burst {self.burst:g} -> {workers}")
+        return exceeded
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        """Reserve an upstream slot; callers report the outcome themselves"""
+        probe = False
+        try:
+            probe = self.breaker.before_call()
+            await self.bucket.acquire(self.max_wait)
+            try:
+                if self._semaphore.locked():
+                    await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+                else:
+                    # A free slot is taken without wait_for, which times out at
+                    # max_wait=0 and can swallow a cancellation on 3.11
+                    await self._semaphore.acquire()
+            except BaseException:
+                # No call is made, so its rate budget is not spent
+                self.bucket.refund()
+                raise
+        except asyncio.TimeoutError:
+            self._refuse(probe, 'concurrency')
+            raise UpstreamUnavailableError(
+                'concurrency', "Too many upstream requests in flight, try again shortly")
+        except UpstreamUnavailableError as e:
+            self._refuse(probe, e.reason)
+            raise
+        except BaseException:
+            if probe:
+                self.breaker.release_probe()
+            raise
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            # A cancelled probe must not leave the circuit stuck half-open
+            if probe:
+                self.breaker.release_probe()
+
+    def _refuse(self, probe: bool, reason: str) -> None:
+        if probe:
+            self.breaker.release_probe()
+        self._rejections.inc(upstream=self.name, reason=reason)
+
+    def retry_after(self) -> float:
+        """Seconds a rejected caller should wait before trying again"""
+        return max(self.breaker.retry_after(), 1.0)
+
+    def record_success(self) -> None:
+        self.breaker.record_success()
+
+    def record_failure(self, error: Exception) -> None:
+        if not getattr(error, 'retryable', False):
+            # Not an upstream health problem
+            return
+        self._failures.inc(upstream=self.name)
+        if self.breaker.record_failure():
+            self._opens.inc(upstream=self.name)
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run one upstream call under the guard"""
+        async with self.acquire():
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.record_failure(e)
+                raise
+            self.record_success()
+            return result
+
+    def stats(self) -> dict:
+        return {
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'rate_per_minute': self.rate_per_minute,
+            'circuit_state': self.breaker.state,
+            'consecutive_failures': self.breaker.consecutive_failures,
+            'tokens_available': round(self.bucket.tokens, 2),
+        }
@@ -0,0 +1,111 @@
+"""
+Job Cache Tests
+Single-flight fetches, TTL expiry and stale serving of RecommendationCache
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from services.job_cache import RecommendationCache, make_cache_key
+
+KEY = make_cache_key('Data Analyst', 'SQL, Python', 'Remote', 6)
+
+
+def test_equivalent_requests_share_a_key():
+    assert make_cache_key(' data  analyst', 'python,sql', 'remote', 6) == KEY
+
+
+def test_concurrent_misses_share_one_fetch():
+    async def scenario():
+        cache = RecommendationCache(ttl=60)
+        release = asyncio.Event()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await release.wait()
+            return ['job']
+
+        waiters = [asyncio.ensure_future(cache.get_or_fetch(KEY, fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert len(calls) == 1
+        assert sorted(cached for _, cached in results) == [False, True, True, True, True]
+        assert all(value == ['job'] for value, _ in results)
+        assert cache.coalesced == 4
+        assert await cache.get_or_fetch(KEY, fetch) == (['job'], True)
+        assert len(calls) == 1
+
+    asyncio.run(scenario())
+
+
+def test_failed_fetch_reaches_every_waiter_and_is_not_cached():
+    async def scenario():
+        cache = RecommendationCache(ttl=60)
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError('upstream down')
+
+        results = await asyncio.gather(
+            *(cache.get_or_fetch(KEY, failing) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert cache.get(KEY) is None
+
+        async def working():
+            return ['job']
+
+        assert await cache.get_or_fetch(KEY, working) == (['job'], False)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_fetch():
+    async def scenario():
+        cache = RecommendationCache(ttl=60)
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return ['job']
+
+        first = asyncio.ensure_future(cache.get_or_fetch(KEY, fetch))
+        second = asyncio.ensure_future(cache.get_or_fetch(KEY, fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == (['job'], True)
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert cache.get(KEY) == ['job']
+
+    asyncio.run(scenario())
+
+
+def test_expired_entries_are_served_stale_only_within_the_window():
+    cache = RecommendationCache(ttl=0.02, stale_ttl=0.1)
+    cache.set(KEY, ['job'])
+    assert cache.get(KEY) == ['job']
+
+    time.sleep(0.04)
+    assert cache.get(KEY) is None
+    assert cache.get_stale(KEY) == ['job']
+    assert cache.stale_hits == 1
+
+    time.sleep(0.1)
+    assert cache.get_stale(KEY) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RecommendationCache(ttl=60, max_entries=2)
+    keys = [make_cache_key(f'role {i}', None, None, 6) for i in range(3)]
+    cache.set(keys[0], ['a'])
+    cache.set(keys[1], ['b'])
+    cache.get(keys[0])
+    cache.set(keys[2], ['c'])
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == ['a'] and cache.get(keys[2]) == ['c']
@@ -0,0 +1,54 @@
+"""
+JSON Stream Tests
+Incremental decoding of a JSON array split across arbitrary chunks
+"""
+
+import json
+
+from utils.json_stream import JSONArrayStream, extract_array_elements
+
+JOBS = [
+    {"title": "Data Analyst", "tags": ["SQL", "Tableau"], "note": "uses [brackets] and {braces}"},
+    {"title": "Backend \"Go\" Engineer", "path": "C:\\\\jobs\\\\", "nested": {"level": [1, [2, 3]]}},
+    {"title": "QA, Remote", "description": "commas, colons: and ] inside strings"},
+]
+RESPONSE = "Here you go:\n```json\n" + json.dumps(JOBS, indent=2) + "\n```\nAnything else?"
+
+
+def feed_in_chunks(size):
+    stream = JSONArrayStream()
+    elements = []
+    for start in range(0, len(RESPONSE), size):
+        elements.extend(stream.feed(RESPONSE[start:start + size]))
+    return stream, elements
+
+
+def test_elements_survive_any_chunking():
+    for size in (1, 2, 3, 7, 16, 64, len(RESPONSE)):
+        stream, elements = feed_in_chunks(size)
+        assert elements == JOBS, size
+        assert stream.done
+
+
+def test_each_element_is_returned_once_it_is_complete():
+    text = json.dumps(JOBS)
+    first_end = text.index('}, {') + 1
+    stream = JSONArrayStream()
+    assert stream.feed(text[:first_end - 1]) == []
+    assert stream.feed(text[first_end - 1:first_end + 1]) == [JOBS[0]]
+    assert stream.feed(text[first_end + 1:]) == JOBS[1:]
+    assert stream.feed('[{"ignored": true}]') == []
+
+
+def test_truncated_array_keeps_complete_elements():
+    text = RESPONSE[:RESPONSE.index('"QA, Remote"') + 5]
+    elements, complete = extract_array_elements(text)
+    assert elements == JOBS[:2]
+    assert complete is False
+
+
+def test_brackets_in_preamble_are_skipped():
+    elements, complete = extract_array_elements('Options [see below]: ' + json.dumps(JOBS[:1]))
+    assert elements == JOBS[:1]
+    assert complete is True
+    assert extract_array_elements('no array here') == (None, False)
@@ -0,0 +1,125 @@
+"""
+LLM Provider Tests
+Hedging and failover of ProviderRouter against mocked provider APIs
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from services import http_client
+from services.llm_providers import GeminiProvider, OpenAIProvider, ProviderError, ProviderRouter
+
+
+class FakeUpstreams:
+    """Answer each provider's API after a delay, recording requests and cancellations"""
+
+    def __init__(self, **behaviour):
+        # host -> (delay seconds, status code or exception)
+        self.behaviour = behaviour
+        self.started = {}
+        self.cancelled = []
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        delay, outcome = self.behaviour[host]
+        self.started[host] = time.monotonic()
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(host)
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        if outcome != 200:
+            return httpx.Response(outcome, json={'error': {'message': f'status {outcome}'}})
+        if host == 'gemini.test':
+            return httpx.Response(200, json={'candidates': [{'content': {'parts': [{'text': 'from gemini'}]}}]})
+        return httpx.Response(200, json={'choices': [{'message': {'content': 'from openai'}}]})
+
+
+def run(upstreams, monkeypatch, **router_options):
+    """Generate through a gemini -> openai router; returns (result or error, router)"""
+    router = ProviderRouter(
+        [GeminiProvider('key', 'model', 'http://gemini.test'),
+         OpenAIProvider('key', 'model', 'http://openai.test')],
+        **router_options
+    )
+
+    async def scenario():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(upstreams.handle))
+        monkeypatch.setattr(http_client, '_client', client)
+        try:
+            return await router.generate('prompt')
+        except ProviderError as e:
+            return e
+        finally:
+            # Let cancelled requests unwind before the loop closes
+            await asyncio.sleep(0.01)
+            await client.aclose()
+
+    return asyncio.run(scenario()), router
+
+
+def test_fast_primary_is_not_hedged(monkeypatch):
+    upstreams = FakeUpstreams(**{'gemini.test': (0.01, 200), 'openai.test': (0.01, 200)})
+    result, router = run(upstreams, monkeypatch, initial_hedge_delay=0.2)
+    assert result == 'from gemini'
+    assert list(upstreams.started) == ['gemini.test']
+    assert router.hedges_sent == 0
+
+
+def test_hedge_fires_after_the_delay_and_the_loser_is_cancelled(monkeypatch):
+    upstreams = FakeUpstreams(**{'gemini.test': (1.0, 200), 'openai.test': (0.01, 200)})
+    started = time.monotonic()
+    result, router = run(upstreams, monkeypatch, initial_hedge_delay=0.1)
+    assert result == 'from openai'
+    assert time.monotonic() - started < 0.5
+    assert upstreams.started['openai.test'] - upstreams.started['gemini.test'] >= 0.09
+    assert upstreams.cancelled == ['gemini.test']
+    assert (router.hedges_sent, router.hedges_won) == (1, 1)
+
+
+def test_primary_can_still_win_after_hedging(monkeypatch):
+    upstreams = FakeUpstreams(**{'gemini.test': (0.1, 200), 'openai.test': (1.0, 200)})
+    result, router = run(upstreams, monkeypatch, initial_hedge_delay=0.05)
+    assert result == 'from gemini'
+    assert upstreams.cancelled == ['openai.test']
+    assert (router.hedges_sent, router.hedges_won) == (1, 0)
+
+
+@pytest.mark.parametrize('failure', [429, 500, 503, httpx.ConnectError('refused')])
+def test_retryable_error_fails_over(monkeypatch, failure):
+    upstreams = FakeUpstreams(**{'gemini.test': (0, failure), 'openai.test': (0, 200)})
+    result, router = run(upstreams, monkeypatch, hedging=False)
+    assert result == 'from openai'
+    assert router.failovers == 1
+
+
+@pytest.mark.parametrize('status', [400, 401, 404])
+def test_client_error_does_not_fail_over(monkeypatch, status):
+    upstreams = FakeUpstreams(**{'gemini.test': (0, status), 'openai.test': (0, 200)})
+    result, router = run(upstreams, monkeypatch, hedging=False)
+    assert isinstance(result, ProviderError)
+    assert result.status_code == status and not result.retryable
+    assert list(upstreams.started) == ['gemini.test']
+    assert router.failovers == 0
+
+
+def test_all_providers_failing_raises_one_error(monkeypatch):
+    upstreams = FakeUpstreams(**{'gemini.test': (0, 503), 'openai.test': (0, 429)})
+    result, _ = run(upstreams, monkeypatch, hedging=False)
+    assert isinstance(result, ProviderError)
+    assert result.retryable
+    assert 'all providers failed' in str(result)
+
+
+def test_hedge_delay_follows_recent_p95():
+    provider = GeminiProvider('key', 'model', 'http://gemini.test')
+    router = ProviderRouter([provider], initial_hedge_delay=5.0, min_hedge_delay=0.25, min_samples=20)
+    assert router.hedge_delay(provider) == 5.0
+    for latency_ms in range(100, 2100, 100):
+        provider.latency.observe(latency_ms)
+    assert router.hedge_delay(provider) == 2.0
@@ -0,0 +1,59 @@
+"""
+Loop Watchdog Tests
+Stall detection and blocking-site attribution of LoopWatchdog
+"""
+
+import asyncio
+import time
+
+from utils.loop_watchdog import LoopWatchdog
+
+# A "library" whose frames are outside the app, recursing before it blocks
+LIBRARY_SOURCE = '''
+import time
+
+def descend(depth, seconds):
+    if depth:
+        return descend(depth - 1, seconds)
+    time.sleep(seconds)
+'''
+library = {}
+exec(compile(LIBRARY_SOURCE, '/opt/vendor/deep_library.py', 'exec'), library)
+
+
+def call_blocking_library():
+    library['descend'](60, 0.3)
+
+
+def run_with_watchdog(blocking_call) -> LoopWatchdog:
+    watchdog = LoopWatchdog(interval=0.02, threshold=0.05, stack_limit=10)
+
+    async def scenario():
+        watchdog.start()
+        await asyncio.sleep(0.1)
+        blocking_call()
+        await asyncio.sleep(0.1)
+        await watchdog.stop()
+
+    asyncio.run(scenario())
+    return watchdog
+
+
+def test_stall_is_attributed_to_app_frame_below_a_deep_library_stack():
+    watchdog = run_with_watchdog(call_blocking_library)
+
+    assert watchdog.stalls == 1
+    site = watchdog.top_sites()[0]
+    assert site['site'].startswith('tests/test_loop_watchdog.py:')
+    assert site['site'].endswith('in call_blocking_library')
+    assert site['leaf'].startswith('/opt/vendor/deep_library.py:7 in descend')
+    assert site['max_ms'] >= 250
+
+    stall = watchdog.recent_stalls[-1]
+    assert len(stall['stack']) == 10
+
+
+def test_idle_loop_records_no_stalls():
+    watchdog = run_with_watchdog(lambda: time.sleep(0.01))
+    assert watchdog.stalls == 0
+    assert watchdog.stats()['lag']['samples'] > 0
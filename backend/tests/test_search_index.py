@@ -0,0 +1,99 @@
+"""
+Search Index Tests
+Structured queries over AnalysisIndex and syncing it with a shared store
+"""
+
+from services.search_index import AnalysisIndex
+from services.storage_service import AnalysisStore
+
+
+def make_analysis(name, skills, fit_score, top_role):
+    return {
+        'candidate_info': {'name': name, 'skills': skills},
+        'overall_insights': {'fit_score': fit_score},
+        'role_matches': [{'title': top_role, 'match': fit_score}],
+        'metadata': {'upload_time': '2024-01-01T00:00:00'},
+    }
+
+
+def test_conjunctive_search():
+    index = AnalysisIndex()
+    index.add('a', make_analysis('Ann', ['SQL', 'Tableau'], 80, 'Data Analyst'))
+    index.add('b', make_analysis('Bob', ['SQL', 'Java'], 60, 'Software Engineer'))
+    index.add('c', make_analysis('Cid', ['sql', 'Tableau'], 55, 'Data Analyst'))
+
+    total, results = index.search(skills=['sql', 'tableau'], min_fit=70)
+    assert total == 1 and results[0]['file_id'] == 'a'
+
+    total, results = index.search(top_role='data analyst')
+    assert [result['file_id'] for result in results] == ['a', 'c']
+
+
+def test_sync_picks_up_other_processes_changes(tmp_path):
+    # Two serve.py workers: each has its own store object and index
+    store_a, store_b = AnalysisStore(tmp_path), AnalysisStore(tmp_path)
+    index_b = AnalysisIndex()
+    store_b.save_sync('b1', make_analysis('Bea', ['Python'], 70, 'Data Scientist'))
+    assert index_b.sync(store_b) == 1
+
+    store_a.save_sync('a1', make_analysis('Ann', ['Python', 'SQL'], 90, 'Data Scientist'))
+    assert index_b.sync(store_b) == 1
+    total, results = index_b.search(skills=['python'])
+    assert total == 2 and results[0]['name'] == 'Ann'
+
+    # Unchanged store: nothing is listed or reloaded
+    assert index_b.sync(store_b) == 0
+
+    store_a.delete_sync('b1')
+    assert index_b.sync(store_b) == 1
+    assert index_b.search(skills=['python'])[0] == 1
+
+
+class CountingStore(AnalysisStore):
+    scans = 0
+
+    def iter_ids(self):
+        self.scans += 1
+        return super().iter_ids()
+
+
+def test_own_writes_do_not_trigger_a_rescan(tmp_path):
+    store, other = CountingStore(tmp_path), AnalysisStore(tmp_path)
+    index = AnalysisIndex()
+    index.sync(store)
+    assert store.scans == 1
+
+    # Uploads and deletes handled by this worker
+    for file_id in ('a1', 'a2'):
+        before = store.version()
+        store.save_sync(file_id, make_analysis('Ann', ['SQL'], 80, 'Data Analyst'))
+        index.add(file_id, make_analysis('Ann', ['SQL'], 80, 'Data Analyst'))
+        index.note_write(before, store.version())
+    before = store.version()
+    store.delete_sync('a1')
+    index.remove('a1')
+    index.note_write(before, store.version())
+    assert index.sync(store) == 0
+    assert store.scans == 1
+
+    # Another worker's upload still triggers one
+    other.save_sync('b1', make_analysis('Bea', ['SQL'], 70, 'Data Analyst'))
+    assert index.sync(store) == 1
+    assert store.scans == 2
+    assert index.search(skills=['sql'])[0] == 2
+
+
+def test_write_masked_by_an_own_write_is_caught_by_a_rescan(tmp_path):
+    store, other = AnalysisStore(tmp_path), AnalysisStore(tmp_path)
+    index = AnalysisIndex(rescan_interval=0)
+    index.sync(store)
+
+    # Another worker's upload lands while this worker is writing
+    before = store.version()
+    other.save_sync('b1', make_analysis('Bea', ['SQL'], 70, 'Data Analyst'))
+    store.save_sync('a1', make_analysis('Ann', ['SQL'], 80, 'Data Analyst'))
+    index.add('a1', make_analysis('Ann', ['SQL'], 80, 'Data Analyst'))
+    index.note_write(before, store.version())
+
+    assert index.sync(store) == 1
+    assert index.search(skills=['sql'])[0] == 2
@@ -0,0 +1,218 @@
+"""
+Segment Store Tests
+Reopen, torn-tail recovery, crash-safe compaction and read-only opens of SegmentLogStore
+"""
+
+import pytest
+
+from services.segment_store import SegmentLogStore
+
+
+def open_store(directory, **kwargs):
+    # Compaction only runs when a test calls compact()
+    return SegmentLogStore(directory, compact_interval=3600, **kwargs)
+
+
+def segment_files(directory):
+    return sorted(p.name for p in directory.iterdir() if not p.name.endswith('.lock'))
+
+
+def test_reopen_rebuilds_index(tmp_path):
+    store = open_store(tmp_path)
+    store.save_sync('a', {'n': 1})
+    store.save_sync('b', {'n': 2})
+    store.save_sync('a', {'n': 3})
+    store.delete_sync('b')
+    store.close()
+
+    store = open_store(tmp_path)
+    try:
+        assert list(store.iter_ids()) == ['a']
+        assert store.load_sync('a') == {'n': 3}
+        assert store.load_sync('b') is None
+    finally:
+        store.close()
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    store = open_store(tmp_path)
+    store.save_sync('a', {'n': 1})
+    store.save_sync('b', {'n': 2})
+    store.close()
+
+    segment = tmp_path / 'segment-000001.log'
+    intact = segment.stat().st_size
+    with segment.open('ab') as f:
+        # Half a record, as left by a crash mid-append
+        f.write(b'\x01\x01\x00\x10\x00\x00\x00garbage')
+
+    store = open_store(tmp_path)
+    try:
+        assert segment.stat().st_size == intact
+        assert sorted(store.iter_ids()) == ['a', 'b']
+        store.save_sync('c', {'n': 3})
+        assert store.load_sync('c') == {'n': 3}
+    finally:
+        store.close()
+
+    store = open_store(tmp_path)
+    try:
+        assert sorted(store.iter_ids()) == ['a', 'b', 'c']
+    finally:
+        store.close()
+
+
+def test_compaction_drops_dead_records(tmp_path):
+    store = open_store(tmp_path, segment_size=256)
+    for i in range(20):
+        store.save_sync(f'id{i}', {'n': i})
+    for i in range(15):
+        store.delete_sync(f'id{i}')
+    assert store.compact()
+    assert sorted(store.iter_ids()) == sorted(f'id{i}' for i in range(15, 20))
+    store.close()
+
+    store = open_store(tmp_path)
+    try:
+        assert {store.load_sync(f'id{i}')['n'] for i in range(15, 20)} == set(range(15, 20))
+        assert not any(name.endswith(('.compacted', '.compacting')) for name in segment_files(tmp_path))
+    finally:
+        store.close()
+
+
+def test_partial_compaction_output_keeps_sources(tmp_path):
+    store = open_store(tmp_path, segment_size=128)
+    for i in range(10):
+        store.save_sync(f'id{i}', {'n': i})
+    store.close()
+    logs = [name for name in segment_files(tmp_path) if name.endswith('.log')]
+
+    # A crash mid-copy leaves the in-progress output; a torn .compacted
+    # file must not be trusted either
+    (tmp_path / 'segment-000003.compacting').write_bytes(b'\x01\x02')
+    (tmp_path / 'segment-000004.compacted').write_bytes(b'\x01\x05\x00\x20')
+
+    store = open_store(tmp_path)
+    try:
+        assert sorted(store.iter_ids()) == sorted(f'id{i}' for i in range(10))
+        assert [name for name in segment_files(tmp_path) if name.endswith('.log')] == logs
+        assert not any(name.endswith(('.compacted', '.compacting')) for name in segment_files(tmp_path))
+    finally:
+        store.close()
+
+
+def test_finished_compaction_output_replaces_sources(tmp_path):
+    store = open_store(tmp_path, segment_size=128)
+    for i in range(10):
+        store.save_sync(f'id{i}', {'n': i})
+    for i in range(5):
+        store.delete_sync(f'id{i}')
+    store.close()
+
+    # Build the output a crashed compaction would have renamed into place
+    source = open_store(tmp_path / 'scratch')
+    for i in range(5, 10):
+        source.save_sync(f'id{i}', {'n': i})
+    source.close()
+    target = max(int(name[8:14]) for name in segment_files(tmp_path) if name.endswith('.log'))
+    (tmp_path / 'scratch' / 'segment-000001.log').rename(tmp_path / f'segment-{target:06d}.compacted')
+
+    store = open_store(tmp_path)
+    try:
+        assert sorted(store.iter_ids()) == sorted(f'id{i}' for i in range(5, 10))
+        assert store.load_sync('id7') == {'n': 7}
+        assert segment_files(tmp_path) == ['scratch', f'segment-{target:06d}.log']
+    finally:
+        store.close()
+
+
+def test_second_writer_fails_fast(tmp_path):
+    store = open_store(tmp_path)
+    try:
+        with pytest.raises(RuntimeError):
+            open_store(tmp_path)
+    finally:
+        store.close()
+
+    store = open_store(tmp_path)
+    store.close()
+
+
+def test_read_only_open_never_modifies_the_store(tmp_path):
+    store = open_store(tmp_path)
+    store.save_sync('a', {'n': 1})
+    store.close()
+    segment = tmp_path / 'segment-000001.log'
+    with segment.open('ab') as f:
+        f.write(b'\x01\x01\x00\x10')
+    torn = segment.stat().st_size
+    (tmp_path / 'segment-000001.compacting').write_bytes(b'\x01')
+
+    reader = open_store(tmp_path, read_only=True)
+    try:
+        assert list(reader.iter_ids()) == ['a']
+        assert reader.load_sync('a') == {'n': 1}
+        with pytest.raises(PermissionError):
+            reader.save_sync('b', {'n': 2})
+        with pytest.raises(PermissionError):
+            reader.delete_sync('a')
+        assert segment.stat().st_size == torn
+        assert 'segment-000001.compacting' in segment_files(tmp_path)
+    finally:
+        reader.close()
+
+
+def test_compaction_waits_for_readers(tmp_path):
+    # Puts and deletes by the server, then an export opened beside it
+    server = open_store(tmp_path, segment_size=64)
+    for i in range(4):
+        server.save_sync(f'a{i}', {'n': i})
+    for i in range(3):
+        server.delete_sync(f'a{i}')
+
+    reader = open_store(tmp_path, read_only=True)
+    try:
+        assert not server.compact()
+        server.save_sync('new', {'n': 4})
+        assert list(reader.iter_ids()) == ['a3']
+        assert reader.load_sync('a3') == {'n': 3}
+    finally:
+        reader.close()
+
+    assert server.compact()
+    server.save_sync('newer', {'n': 5})
+    server.close()
+
+    store = open_store(tmp_path)
+    try:
+        assert sorted(store.iter_ids()) == ['a3', 'new', 'newer']
+    finally:
+        store.close()
+
+
+def test_read_only_open_reads_a_finished_compaction_in_place(tmp_path):
+    store = open_store(tmp_path, segment_size=128)
+    for i in range(10):
+        store.save_sync(f'id{i}', {'n': i})
+    for i in range(5):
+        store.delete_sync(f'id{i}')
+    store.close()
+
+    source = open_store(tmp_path / 'scratch')
+    for i in range(5, 10):
+        source.save_sync(f'id{i}', {'n': i})
+    source.close()
+    target = max(int(name[8:14]) for name in segment_files(tmp_path) if name.endswith('.log'))
+    compacted = tmp_path / f'segment-{target:06d}.compacted'
+    (tmp_path / 'scratch' / 'segment-000001.log').rename(compacted)
+    # As if the crash came after some source segments were deleted
+    (tmp_path / 'segment-000001.log').unlink()
+    before = segment_files(tmp_path)
+
+    reader = open_store(tmp_path, read_only=True)
+    try:
+        assert sorted(reader.iter_ids()) == sorted(f'id{i}' for i in range(5, 10))
+        assert reader.load_sync('id7') == {'n': 7}
+        assert segment_files(tmp_path) == before
+    finally:
+        reader.close()
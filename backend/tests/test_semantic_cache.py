@@ -0,0 +1,70 @@
+"""
+Semantic Cache Tests
+Near-duplicate matching rules of SemanticQueryCache
+"""
+
+from services.job_cache import make_cache_key
+from services.semantic_cache import SemanticQueryCache, same_role, seniority
+
+
+def cache_with(query, value=('cached',)):
+    cache = SemanticQueryCache(max_entries=16)
+    cache.add(make_cache_key(query, 'python,sql', None, 5), list(value))
+    return cache
+
+
+def test_seniority_levels():
+    assert seniority('Senior Data Analyst') == {'senior'}
+    assert seniority('entry level data analyst') == seniority('junior data analyst')
+    assert seniority('machine learning engineer') == frozenset()
+
+
+def test_near_duplicate_query_matches():
+    cache = cache_with('software engineer')
+    hit = cache.lookup(make_cache_key('software developer', 'python,sql', None, 5))
+    assert hit is not None and hit[0] == ['cached']
+
+
+def test_word_order_and_spelling_variants_match():
+    cache = cache_with('data analyst remote')
+    assert cache.lookup(make_cache_key('remote data analyst', 'python,sql', None, 5)) is not None
+    cache = cache_with('frontend developer')
+    assert cache.lookup(make_cache_key('front end developer', 'python,sql', None, 5)) is not None
+    assert cache.lookup(make_cache_key('frontend engineer', 'python,sql', None, 5)) is not None
+
+
+def test_different_roles_do_not_share_an_entry():
+    # Each pair scores above the similarity threshold
+    cache = cache_with('data analyst remote')
+    assert cache.lookup(make_cache_key('business analyst remote', 'python,sql', None, 5)) is None
+    cache = cache_with('software engineer')
+    assert cache.lookup(make_cache_key('software engineering manager', 'python,sql', None, 5)) is None
+
+
+def test_same_role():
+    assert same_role('software engineer', 'software developers')
+    assert same_role('back-end developer', 'backend engineer')
+    assert not same_role('machine learning engineer', 'machine learning scientist')
+    assert not same_role('product manager', 'project manager')
+    assert not same_role('java developer', 'javascript developer')
+    assert not same_role('ux designer', 'ui designer')
+
+
+def test_senior_and_junior_queries_do_not_share_an_entry():
+    cache = cache_with('senior data analyst')
+    assert cache.lookup(make_cache_key('junior data analyst', 'python,sql', None, 5)) is None
+    assert cache.lookup(make_cache_key('senior data analyst ', 'python,sql', None, 5)) is not None
+
+
+def test_intern_does_not_match_unlevelled_role():
+    cache = cache_with('machine learning engineer')
+    assert cache.lookup(make_cache_key('machine learning intern', 'python,sql', None, 5)) is None
+
+    cache = cache_with('senior machine learning engineer')
+    assert cache.lookup(make_cache_key('machine learning intern', 'python,sql', None, 5)) is None
+
+
+def test_location_and_skills_must_match():
+    cache = cache_with('data analyst')
+    assert cache.lookup(make_cache_key('data analyst', 'python,sql', 'berlin', 5)) is None
+    assert cache.lookup(make_cache_key('data analyst', 'java,go', None, 5)) is None
@@ -0,0 +1,77 @@
+"""
+Storage Service Tests
+Atomic analysis files and the latest-analysis pointer shared between processes
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from services.storage_service import STALE_TEMP_SECONDS, AnalysisStore, LatestAnalysis
+
+
+def test_save_load_delete(tmp_path):
+    store = AnalysisStore(tmp_path)
+    store.save_sync('a', {'n': 1})
+    assert store.load_sync('a') == {'n': 1}
+    assert list(store.iter_ids()) == ['a']
+    assert store.delete_sync('a')
+    assert store.load_sync('a') is None
+    assert not store.delete_sync('a')
+    assert not list(tmp_path.glob('.*.tmp'))
+
+
+def test_only_stale_temp_files_are_swept(tmp_path):
+    # One temp file from a crash long ago, one from another process writing now
+    crashed = tmp_path / '.a.crashed.tmp'
+    in_flight = tmp_path / '.b.writing.tmp'
+    crashed.write_bytes(b'{')
+    in_flight.write_bytes(b'{')
+    old = time.time() - STALE_TEMP_SECONDS - 60
+    os.utime(crashed, (old, old))
+
+    AnalysisStore(tmp_path, read_only=True)
+    assert crashed.exists() and in_flight.exists()
+
+    AnalysisStore(tmp_path)
+    assert not crashed.exists()
+    assert in_flight.exists()
+
+
+def test_read_only_store_refuses_writes(tmp_path):
+    AnalysisStore(tmp_path).save_sync('a', {'n': 1})
+    store = AnalysisStore(tmp_path, read_only=True)
+    assert store.load_sync('a') == {'n': 1}
+    with pytest.raises(PermissionError):
+        store.save_sync('b', {'n': 2})
+    with pytest.raises(PermissionError):
+        store.delete_sync('a')
+    with pytest.raises(FileNotFoundError):
+        AnalysisStore(tmp_path / 'missing', read_only=True)
+
+
+def test_latest_analysis_is_shared_between_processes(tmp_path):
+    async def scenario():
+        store = AnalysisStore(tmp_path / 'analysis')
+        # One LatestAnalysis per worker, all pointing at the same file
+        worker_a = LatestAnalysis(tmp_path / 'latest_analysis', store)
+        worker_b = LatestAnalysis(tmp_path / 'latest_analysis', store)
+        assert await worker_b.get() is None
+
+        await store.save('x', {'n': 1})
+        await worker_a.set('x', {'n': 1})
+        assert await worker_b.get() == ('x', {'n': 1})
+
+        await store.save('y', {'n': 2})
+        await worker_b.set('y', {'n': 2})
+        assert await worker_a.get() == ('y', {'n': 2})
+
+        # Deleting an older analysis leaves the pointer alone
+        worker_a.discard('x')
+        assert await worker_b.get() == ('y', {'n': 2})
+        worker_a.discard('y')
+        assert await worker_b.get() is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,54 @@
+"""
+Text Index Tests
+BM25 search over ResumeTextIndex, including instances shared across processes
+"""
+
+from services.text_index import ResumeTextIndex
+
+
+def test_search_ranks_matching_resumes(tmp_path):
+    index = ResumeTextIndex(tmp_path)
+    try:
+        index.add_sync('r1', "Data analyst with SQL, Tableau and Python experience")
+        index.add_sync('r2', "Frontend developer building React and TypeScript apps")
+        results = index.search_sync('sql tableau')
+        assert [result['file_id'] for result in results] == ['r1']
+        assert 'Tableau' in results[0]['snippet']
+    finally:
+        index.close()
+
+
+def test_instances_sharing_a_directory_see_each_others_updates(tmp_path):
+    # Two serve.py workers each open their own connection to one index
+    worker_a = ResumeTextIndex(tmp_path)
+    worker_b = ResumeTextIndex(tmp_path)
+    try:
+        worker_a.add_sync('r1', "Machine learning engineer, PyTorch and Python")
+        assert [result['file_id'] for result in worker_b.search_sync('pytorch')] == ['r1']
+
+        worker_b.add_sync('r2', "Python backend developer, Django and PostgreSQL")
+        scores_a = {result['file_id']: result['score'] for result in worker_a.search_sync('python')}
+        scores_b = {result['file_id']: result['score'] for result in worker_b.search_sync('python')}
+        assert set(scores_a) == {'r1', 'r2'}
+        assert scores_a == scores_b
+
+        assert worker_a.remove_sync('r1')
+        assert worker_b.search_sync('pytorch') == []
+        assert [result['file_id'] for result in worker_b.search_sync('python')] == ['r2']
+    finally:
+        worker_a.close()
+        worker_b.close()
+
+
+def test_statistics_survive_reopen(tmp_path):
+    index = ResumeTextIndex(tmp_path)
+    index.add_sync('r1', "Project manager, Agile and Scrum")
+    index.add_sync('r1', "Project manager, Agile, Scrum and Jira")
+    index.close()
+
+    index = ResumeTextIndex(tmp_path)
+    try:
+        assert index._db.execute("SELECT doc_count FROM stats").fetchone() == (1,)
+        assert [result['file_id'] for result in index.search_sync('jira')] == ['r1']
+    finally:
+        index.close()
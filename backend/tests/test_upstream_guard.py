@@ -0,0 +1,194 @@
+"""
+Upstream Guard Tests
+Concurrency cap, rate limit and circuit-breaker transitions of UpstreamGuard
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from services.upstream_guard import CLOSED, HALF_OPEN, OPEN, UpstreamGuard, UpstreamUnavailableError
+
+
+class RetryableError(Exception):
+    retryable = True
+
+
+class BadRequestError(Exception):
+    retryable = False
+
+
+def make_guard(**kwargs):
+    options = dict(max_in_flight=4, rate_per_minute=6000, burst=100, max_wait=0.05,
+                   failure_threshold=2, reset_timeout=0.05)
+    options.update(kwargs)
+    return UpstreamGuard('test', **options)
+
+
+async def fail_with(error):
+    raise error
+
+
+async def succeed():
+    return 'ok'
+
+
+def test_concurrency_cap_rejects_after_max_wait():
+    async def scenario():
+        guard = make_guard(max_in_flight=1)
+        async with guard.acquire():
+            with pytest.raises(UpstreamUnavailableError) as refused:
+                async with guard.acquire():
+                    pass
+            assert refused.value.reason == 'concurrency'
+        assert guard.in_flight == 0
+        assert await guard.call(succeed) == 'ok'
+
+    asyncio.run(scenario())
+
+
+def test_rate_limit_allows_the_burst_then_refuses():
+    async def scenario():
+        guard = make_guard(rate_per_minute=60, burst=2, max_wait=0)
+        await guard.call(succeed)
+        await guard.call(succeed)
+        with pytest.raises(UpstreamUnavailableError) as refused:
+            await guard.call(succeed)
+        assert refused.value.reason == 'rate_limited'
+
+    asyncio.run(scenario())
+
+
+def test_circuit_opens_probes_and_closes():
+    async def scenario():
+        guard = make_guard()
+
+        # Errors that say nothing about upstream health do not count
+        for _ in range(3):
+            with pytest.raises(BadRequestError):
+                await guard.call(lambda: fail_with(BadRequestError()))
+        assert guard.breaker.state == CLOSED
+
+        for _ in range(2):
+            with pytest.raises(RetryableError):
+                await guard.call(lambda: fail_with(RetryableError()))
+        assert guard.breaker.state == OPEN
+        with pytest.raises(UpstreamUnavailableError) as refused:
+            await guard.call(succeed)
+        assert refused.value.reason == 'circuit_open'
+        assert guard.retry_after() >= 1.0
+
+        # After the cool-down exactly one probe goes through
+        time.sleep(0.06)
+        release = asyncio.Event()
+
+        async def slow_probe():
+            await release.wait()
+            return 'ok'
+
+        probe = asyncio.ensure_future(guard.call(slow_probe))
+        await asyncio.sleep(0)
+        assert guard.breaker.state == HALF_OPEN
+        with pytest.raises(UpstreamUnavailableError):
+            await guard.call(succeed)
+        release.set()
+        assert await probe == 'ok'
+        assert guard.breaker.state == CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_failed_or_cancelled_probe():
+    async def scenario():
+        guard = make_guard(failure_threshold=1)
+        with pytest.raises(RetryableError):
+            await guard.call(lambda: fail_with(RetryableError()))
+        time.sleep(0.06)
+
+        # A failed probe reopens the circuit straight away
+        with pytest.raises(RetryableError):
+            await guard.call(lambda: fail_with(RetryableError()))
+        assert guard.breaker.state == OPEN
+        time.sleep(0.06)
+
+        # A cancelled probe must let the next caller probe
+        probe = asyncio.ensure_future(guard.call(lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert guard.breaker.state == HALF_OPEN
+        assert await guard.call(succeed) == 'ok'
+        assert guard.breaker.state == CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_share_splits_limits_between_workers():
+    guard = make_guard(max_in_flight=8, rate_per_minute=60, burst=10)
+    guard.share(4)
+    assert guard.max_in_flight == 2
+    assert guard.rate_per_minute == 15
+    assert guard.burst == 2.5
+
+    guard = make_guard(max_in_flight=2, rate_per_minute=20, burst=1)
+    assert guard.oversubscribed(4) == ['max_in_flight 2 -> 4', 'burst 1 -> 4']
+    assert make_guard(max_in_flight=8, burst=10).oversubscribed(4) == []
+    guard.share(4)
+    assert guard.max_in_flight == 1
+    assert guard.burst == 1.0
+
+
+def test_only_the_probe_releases_the_half_open_slot():
+    async def scenario():
+        guard = make_guard(failure_threshold=1)
+        release = asyncio.Event()
+
+        async def slow_bad_request():
+            await release.wait()
+            raise BadRequestError()
+
+        # Admitted while closed, still running when the circuit goes half-open
+        straggler = asyncio.ensure_future(guard.call(slow_bad_request))
+        await asyncio.sleep(0)
+        with pytest.raises(RetryableError):
+            await guard.call(lambda: fail_with(RetryableError()))
+        time.sleep(0.06)
+
+        probe_release = asyncio.Event()
+
+        async def slow_probe():
+            await probe_release.wait()
+            return 'ok'
+
+        probe = asyncio.ensure_future(guard.call(slow_probe))
+        await asyncio.sleep(0)
+        assert guard.breaker.state == HALF_OPEN
+
+        release.set()
+        with pytest.raises(BadRequestError):
+            await straggler
+        with pytest.raises(UpstreamUnavailableError) as refused:
+            await guard.call(succeed)
+        assert refused.value.reason == 'circuit_open'
+
+        probe_release.set()
+        assert await probe == 'ok'
+        assert guard.breaker.state == CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_concurrency_rejection_refunds_its_token():
+    async def scenario():
+        guard = make_guard(max_in_flight=1, rate_per_minute=0.6, burst=2)
+        async with guard.acquire():
+            assert guard.bucket.tokens == pytest.approx(1, abs=0.01)
+            with pytest.raises(UpstreamUnavailableError) as refused:
+                async with guard.acquire():
+                    pass
+            assert refused.value.reason == 'concurrency'
+            assert guard.bucket.tokens == pytest.approx(1, abs=0.01)
+
+    asyncio.run(scenario())
@@ -0,0 +1,31 @@
+"""
+Admin Access
+Gate operational endpoints and debug modes on the ADMIN_TOKEN secret
+"""
+
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+ADMIN_HEADER = 'X-Admin-Token'
+
+
+def is_admin(token: Optional[str]) -> bool:
+    """True if token matches ADMIN_TOKEN; always False while ADMIN_TOKEN is unset"""
+    expected = os.getenv('ADMIN_TOKEN')
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8'))
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Dependency for admin-only routes"""
+    if not os.getenv('ADMIN_TOKEN'):
+        raise HTTPException(
+            status_code=403,
+            detail="Admin endpoints are disabled. Please set ADMIN_TOKEN environment variable."
+        )
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail=f"Invalid or missing {ADMIN_HEADER} header")
@@ -0,0 +1,115 @@
+"""
+Incremental JSON Array Parser
+Decodes objects from a JSON array as soon as each one is complete
+"""
+
+import json
+from typing import List, Optional, Tuple
+
+
+class JSONArrayStream:
+    """Feed text chunks and get back each complete top-level array element
+
+    Anything before the opening ``[`` (markdown fences, preambles) is skipped,
+    and everything after the closing ``]`` is ignored. Characters are scanned
+    once, tracking nesting depth and string/escape state, so feeding a
+    response in many small chunks costs the same as feeding it whole.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._element_start = None
+        self.done = False
+
+    def feed(self, chunk: str) -> List:
+        """Add text and return the elements completed by it"""
+        if self.done or not chunk:
+            return []
+
+        self._buffer += chunk
+        elements = []
+        buffer = self._buffer
+        pos = self._pos
+
+        while pos < len(buffer):
+            char = buffer[pos]
+
+            if not self._started:
+                if char == '[':
+                    self._started = True
+                    self._depth = 1
+                pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                pos += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if self._depth == 1:
+                    self._element_start = pos
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self.done = True
+                    pos += 1
+                    break
+                if self._depth == 1 and self._element_start is not None:
+                    elements.append(self._decode(buffer[self._element_start:pos + 1]))
+                    self._element_start = None
+            elif self._depth == 1 and char == ',':
+                self._element_start = None
+            pos += 1
+
+        # Keep only the unfinished element so the buffer does not grow
+        keep_from = self._element_start if self._element_start is not None else pos
+        self._buffer = buffer[keep_from:]
+        self._pos = pos - keep_from
+        if self._element_start is not None:
+            self._element_start = 0
+
+        return [element for element in elements if element is not None]
+
+    @staticmethod
+    def _decode(text: str):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return None
+
+
+def extract_array_elements(text: str, max_attempts: int = 5) -> Tuple[Optional[List], bool]:
+    """
+    Find a JSON array anywhere in text and decode its complete elements
+
+    Markdown fences, preambles and trailing commentary are skipped, and a
+    trailing element cut off mid-way (e.g. at the output token limit) is
+    dropped. Brackets in prose before the real array are tried and skipped.
+
+    Returns (elements, complete) where complete is False if the array was
+    never closed, or (None, False) if no array with elements was found.
+    """
+    start = text.find('[')
+    attempts = 0
+    while start != -1 and attempts < max_attempts:
+        stream = JSONArrayStream()
+        elements = stream.feed(text[start:])
+        if elements:
+            return elements, stream.done
+        attempts += 1
+        start = text.find('[', start + 1)
+    return None, False
@@ -0,0 +1,54 @@
+"""
+Lazy Imports
+Defer heavy optional libraries until first use to keep worker startup fast
+"""
+
+import importlib
+import threading
+from types import ModuleType
+from typing import List, Optional
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access
+
+    The first access imports the module under a lock, so concurrent
+    requests (or parser threads) trigger exactly one import; later accesses
+    only pay for an attribute lookup.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                module = self._module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+# Every lazy module created, e.g. to preload them all before forking workers
+lazy_modules: List[LazyModule] = []
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a module proxy that imports ``name`` on first use"""
+    module = LazyModule(name)
+    lazy_modules.append(module)
+    return module
@@ -0,0 +1,201 @@
+"""
+Event Loop Watchdog
+Measure event-loop lag and capture the stacks of calls that block it
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.metrics import registry
+
+# Frames under this directory are "ours" and name the blocking site
+APP_ROOT = str(Path(__file__).resolve().parent.parent)
+
+# Our middleware and stage-timing wrappers sit on every stack; they never block themselves
+PASS_THROUGH = ('utils/loop_watchdog.py', 'utils/timing.py', 'utils/profiling.py')
+
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+loop_lag = registry.histogram(
+    'event_loop_lag_seconds', "Delay of event-loop heartbeats past their due time", buckets=LAG_BUCKETS)
+stall_duration = registry.histogram(
+    'event_loop_stall_duration_seconds', "Duration of event-loop stalls over the threshold", buckets=LAG_BUCKETS)
+stalls_total = registry.counter('event_loop_stalls_total', "Event-loop stalls over the threshold")
+
+
+class LoopWatchdog:
+    """Detect event-loop stalls and record where they happen
+
+    A heartbeat task wakes every ``interval`` seconds and records how late
+    it woke (the loop lag). A daemon thread checks the heartbeat; if the
+    loop has not run it for ``threshold`` seconds past its due time, the
+    thread snapshots the loop thread's stack with ``sys._current_frames``
+    while the blocking call is still running. Once the loop resumes the
+    stall is recorded against its site: the innermost frame in our own
+    code (e.g. the route or service that called pdfplumber).
+
+    While idle this costs about one short wake-up of the task and of the
+    thread per interval; stacks are only captured during a stall.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.1, max_sites: int = 100,
+                 keep: int = 20, stack_limit: int = 30):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_sites = max_sites
+        self.stack_limit = stack_limit
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = 0.0
+        self._captured: Optional[Dict] = None
+        self._lags = deque(maxlen=max(int(60 / interval), 1))
+        self.sites: Dict[str, Dict] = {}
+        self.recent_stalls = deque(maxlen=keep)
+        self.stalls = 0
+        self.blocked_seconds = 0.0
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._beat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+    async def _beat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - due, 0.0)
+            previous, self._heartbeat = self._heartbeat, time.monotonic()
+            self._lags.append(lag)
+            loop_lag.observe(lag)
+            if lag >= self.threshold:
+                self._record_stall(lag, previous)
+
+    def _watch(self) -> None:
+        """Runs in a thread: snapshot the loop thread's stack once per stall"""
+        timeout = self.threshold
+        while not self._stop.wait(timeout):
+            overdue = time.monotonic() - self._heartbeat - self.interval
+            if overdue < self.threshold:
+                # Sleep until this heartbeat would count as a stall
+                timeout = self.threshold - overdue
+                continue
+            timeout = self.threshold
+            with self._lock:
+                if self._captured is not None and self._captured['heartbeat'] == self._heartbeat:
+                    continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            # The site comes from the whole stack: under a deep import or
+            # pdfminer call our own frame can be far from the innermost one
+            stack = traceback.extract_stack(frame)
+            with self._lock:
+                self._captured = {
+                    'heartbeat': self._heartbeat,
+                    'site': self._site(stack),
+                    'stack': stack[-self.stack_limit:],
+                }
+
+    def _record_stall(self, lag: float, heartbeat: float) -> None:
+        with self._lock:
+            captured, self._captured = self._captured, None
+        stalls_total.inc()
+        stall_duration.observe(lag)
+
+        # A stall shorter than the watch period may end before a snapshot
+        if captured and captured['heartbeat'] == heartbeat:
+            site, stack = captured['site'], captured['stack']
+        else:
+            site, stack = 'unknown (ended before a stack was captured)', None
+        stall = {
+            'at': datetime.now().isoformat(),
+            'duration_ms': round(lag * 1000, 1),
+            'site': site,
+            'stack': [f"{f.filename}:{f.lineno} in {f.name}: {f.line}" for f in stack] if stack else [],
+        }
+
+        with self._lock:
+            self.stalls += 1
+            self.blocked_seconds += lag
+            self.recent_stalls.append(stall)
+            entry = self.sites.get(site)
+            if entry is None:
+                if len(self.sites) >= self.max_sites:
+                    # Make room by dropping the site with the least blocked time
+                    del self.sites[min(self.sites, key=lambda key: self.sites[key]['total_ms'])]
+                entry = self.sites[site] = {'site': site, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+            entry['count'] += 1
+            entry['total_ms'] = round(entry['total_ms'] + stall['duration_ms'], 1)
+            entry['max_ms'] = max(entry['max_ms'], stall['duration_ms'])
+            entry['leaf'] = stall['stack'][-1] if stall['stack'] else None
+            entry['last_seen'] = stall['at']
+
+    @staticmethod
+    def _site(stack: traceback.StackSummary) -> str:
+        """Innermost frame in our own code, else the innermost frame"""
+        for frame in reversed(stack):
+            if frame.filename.startswith(APP_ROOT) and 'site-packages' not in frame.filename \
+                    and not frame.filename.endswith(PASS_THROUGH):
+                return f"{os.path.relpath(frame.filename, APP_ROOT)}:{frame.lineno} in {frame.name}"
+        frame = stack[-1]
+        return f"{frame.filename}:{frame.lineno} in {frame.name}"
+
+    def lag_percentiles(self) -> Dict[str, float]:
+        lags = sorted(self._lags)
+        if not lags:
+            return {}
+        pick = lambda q: round(lags[min(int(q * len(lags)), len(lags) - 1)] * 1000, 2)
+        return {'p50_ms': pick(0.5), 'p99_ms': pick(0.99), 'max_ms': round(lags[-1] * 1000, 2),
+                'samples': len(lags)}
+
+    def top_sites(self, limit: int = 10) -> List[Dict]:
+        with self._lock:
+            sites = [dict(entry) for entry in self.sites.values()]
+        return sorted(sites, key=lambda entry: -entry['total_ms'])[:limit]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'running': self._task is not None,
+                'interval_ms': self.interval * 1000,
+                'threshold_ms': self.threshold * 1000,
+                'stalls': self.stalls,
+                'blocked_ms': round(self.blocked_seconds * 1000, 1),
+                'lag': self.lag_percentiles(),
+            }
+
+
+loop_watchdog = LoopWatchdog(
+    interval=int(os.getenv('LOOP_LAG_INTERVAL_MS', '100')) / 1000,
+    threshold=int(os.getenv('LOOP_STALL_THRESHOLD_MS', '100')) / 1000,
+)
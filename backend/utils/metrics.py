@@ -0,0 +1,189 @@
+"""
+Metrics
+Low-overhead in-process counters, gauges and histograms
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Default histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in key
+    )
+    return '{' + pairs + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if value == float('-inf'):
+        return '-Inf'
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonically increasing value per label set"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[Tuple[LabelKey, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+
+class Gauge:
+    """Point-in-time value per label set, optionally read from a callback"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, description: str, function: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.description = description
+        self._function = function
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[Tuple[LabelKey, float]]:
+        if self._function is not None:
+            return [((), float(self._function()))]
+        with self._lock:
+            return list(self._values.items())
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self) -> List[Tuple[LabelKey, Dict]]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._values.items()]
+        result = []
+        for key, series in items:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(list(self.buckets) + [float('inf')], series[:-1]):
+                cumulative += count
+                buckets['+Inf' if bound == float('inf') else str(bound)] = cumulative
+            result.append((key, {'buckets': buckets, 'count': cumulative, 'sum': series[-1]}))
+        return result
+
+
+class MetricsRegistry:
+    """Named collection of metrics; registering a name twice returns the first"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._register(Counter(name, description))
+
+    def gauge(self, name: str, description: str, function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._register(Gauge(name, description, function))
+
+    def histogram(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, description, buckets))
+
+    def metrics(self) -> List:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self, const_labels: Optional[Dict[str, str]] = None) -> str:
+        """Prometheus text exposition format (version 0.0.4); const_labels are added to every sample"""
+        base = _label_key(const_labels or {})
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.description)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for key, value in metric.samples():
+                key = base + key
+                if metric.kind != 'histogram':
+                    lines.append(f"{metric.name}{_format_labels(key)} {_format_value(value)}")
+                    continue
+                for bound, count in value['buckets'].items():
+                    lines.append(f"{metric.name}_bucket{_format_labels(key + (('le', bound),))} {count}")
+                lines.append(f"{metric.name}_sum{_format_labels(key)} {_format_value(value['sum'])}")
+                lines.append(f"{metric.name}_count{_format_labels(key)} {value['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict:
+        """JSON-friendly view of every metric"""
+        result = {}
+        for metric in self.metrics():
+            result[metric.name] = {
+                'type': metric.kind,
+                'description': metric.description,
+                'samples': [
+                    {'labels': dict(key), 'value': value}
+                    for key, value in metric.samples()
+                ],
+            }
+        return result
+
+
+# Process-wide registry
+registry = MetricsRegistry()
@@ -0,0 +1,41 @@
+"""
+Process Memory
+Resident, proportional, shared and private memory of a process
+"""
+
+import resource
+from typing import Dict, Union
+
+# /proc/<pid>/smaps_rollup fields (kB) and the keys they are reported under
+SMAPS_FIELDS = {
+    'Rss': 'rss',
+    'Pss': 'pss',
+    'Shared_Clean': 'shared',
+    'Shared_Dirty': 'shared',
+    'Private_Clean': 'private',
+    'Private_Dirty': 'private',
+}
+
+
+def process_memory(pid: Union[int, str] = 'self') -> Dict[str, int]:
+    """
+    Memory of a process in bytes
+
+    ``pss`` counts each copy-on-write page shared with the master and the
+    other workers divided by the number of processes sharing it, so summing
+    it over workers gives the real footprint; ``rss`` counts shared pages in
+    full. Off Linux only ``max_rss`` of the current process is available.
+    """
+    usage: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, rest = line.partition(':')
+                key = SMAPS_FIELDS.get(name)
+                if key:
+                    usage[key] = usage.get(key, 0) + int(rest.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        if pid == 'self':
+            # ru_maxrss is in kB on Linux, bytes on macOS; close enough for a fallback
+            usage['max_rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return usage
@@ -0,0 +1,168 @@
+"""
+Request Profiling
+Run a single admin-requested request under cProfile and keep its report
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from utils.admin import ADMIN_HEADER, is_admin
+
+# Where the time went, by the file (or builtin) a function belongs to
+AREAS = {
+    'pdf': ('pdfplumber', 'pdfminer'),
+    'docx': ('/docx/', 'lxml'),
+    'regex': ('/re/', '/re.py', 're.Pattern', '_sre', 'sre_'),
+    'scoring': ('scoring_logic', 'analysis_service'),
+    'parser': ('parser_service',),
+    'json': ('/json/',),
+    'llm': ('llm_providers', 'httpx', 'httpcore'),
+}
+
+# Call tree restricted to our own modules, where a slow request starts
+APP_FUNCTIONS = r'routes/|services/|utils/scoring_logic'
+
+PROFILE_TOP = int(os.getenv('PROFILE_TOP', '40'))
+PROFILE_DIR = os.getenv('PROFILE_DIR')
+
+# Most recent reports, newest last
+profile_reports = deque(maxlen=int(os.getenv('PROFILE_KEEP', '20')))
+
+
+def function_label(func: tuple) -> str:
+    filename, line, name = func
+    return name if filename == '~' else f"{filename}:{line}({name})"
+
+
+def area_of(func: tuple) -> str:
+    label = function_label(func)
+    for area, markers in AREAS.items():
+        if any(marker in label for marker in markers):
+            return area
+    return 'other'
+
+
+def build_report(profile: cProfile.Profile, top: int = PROFILE_TOP) -> Dict:
+    """Self time per area, the top functions by cumulative time and a call-tree text report"""
+    stats = pstats.Stats(profile)
+    areas: Dict[str, float] = {}
+    functions: List[Dict] = []
+    for func, (_, calls, tottime, cumtime, _) in stats.stats.items():
+        area = area_of(func)
+        areas[area] = areas.get(area, 0.0) + tottime
+        functions.append({
+            'function': function_label(func),
+            'area': area,
+            'calls': calls,
+            'self_ms': round(tottime * 1000, 3),
+            'cumulative_ms': round(cumtime * 1000, 3),
+        })
+    functions.sort(key=lambda f: -f['cumulative_ms'])
+
+    text = io.StringIO()
+    stats.stream = text
+    stats.sort_stats('cumulative').print_stats(top)
+    stats.print_callees(APP_FUNCTIONS)
+
+    return {
+        'areas_ms': {area: round(seconds * 1000, 3)
+                     for area, seconds in sorted(areas.items(), key=lambda item: -item[1])},
+        'top_functions': functions[:top],
+        'report': text.getvalue(),
+    }
+
+
+def get_report(profile_id: str) -> Optional[Dict]:
+    return next((report for report in profile_reports if report['id'] == profile_id), None)
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request sent with ``?profile=1`` and an admin token
+
+    The request runs normally; its response gains an X-Profile-Id header
+    naming the stored report (see /api/admin/profiles). With PROFILE_DIR
+    set, the raw .prof file is written there too, for snakeviz or
+    pstats. cProfile follows the event-loop thread, so work other
+    requests do meanwhile is included. Keep it to a quiet moment or a
+    dedicated worker; one request is profiled at a time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or b'profile=' not in scope.get('query_string', b''):
+            await self.app(scope, receive, send)
+            return
+
+        query = parse_qs(scope['query_string'].decode('latin-1'))
+        if query.get('profile', ['0'])[-1] not in ('1', 'true'):
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        if not is_admin(headers.get(ADMIN_HEADER.lower())):
+            await self._reject(send, 403, f"Profiling requires a valid {ADMIN_HEADER} header")
+            return
+        if not self._busy.acquire(blocking=False):
+            await self._reject(send, 409, "Another request is being profiled")
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        status = [500]
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+                message = {**message, 'headers': [
+                    *message.get('headers', []), (b'x-profile-id', profile_id.encode('latin-1'))
+                ]}
+            await send(message)
+
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profile.disable()
+            elapsed = time.perf_counter() - started
+            report = {
+                'id': profile_id,
+                'method': scope['method'],
+                'path': scope['path'],
+                'status': status[0],
+                'duration_ms': round(elapsed * 1000, 3),
+                'created_at': datetime.now().isoformat(),
+                **build_report(profile),
+            }
+            if PROFILE_DIR:
+                Path(PROFILE_DIR).mkdir(parents=True, exist_ok=True)
+                profile.dump_stats(str(Path(PROFILE_DIR) / f"{profile_id}.prof"))
+            profile_reports.append(report)
+        finally:
+            self._busy.release()
+
+    @staticmethod
+    async def _reject(send, status: int, detail: str) -> None:
+        body = json.dumps({'detail': detail}).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
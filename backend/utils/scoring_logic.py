@@ -6,6 +6,8 @@ Calculates fit scores, skill levels, and role matches
 import random
 from typing import Dict, List, Tuple
 
+from utils.timing import timed_stage
+
 
 class ScoringEngine:
     """Calculate various scores and metrics for resume analysis"""
@@ -50,6 +52,7 @@ class ScoringEngine:
         }
     }
     
+    @timed_stage('upload')
     def calculate_overall_fit_score(self, parsed_data: Dict) -> int:
         """Calculate overall fit score (0-100)"""
         score = 50  # Base score
@@ -79,6 +82,7 @@ class ScoringEngine:
         
         return min(max(score, 0), 100)
     
+    @timed_stage('upload')
     def calculate_role_alignment(self, fit_score: int) -> str:
         """Determine role alignment level"""
         if fit_score >= 80:
@@ -88,6 +92,7 @@ class ScoringEngine:
         else:
             return "Low"
     
+    @timed_stage('upload')
     def calculate_skill_momentum(self, parsed_data: Dict) -> int:
         """Calculate skill momentum percentage"""
         # Base momentum on number of skills and recent projects
@@ -99,6 +104,7 @@ class ScoringEngine:
         
         return min(max(momentum, 0), 25)
     
+    @timed_stage('upload')
     def calculate_skill_strengths(self, parsed_data: Dict) -> List[Dict[str, any]]:
         """Calculate individual skill strength percentages"""
         skills = [s.lower() for s in parsed_data.get('skills', [])]
@@ -137,6 +143,7 @@ class ScoringEngine:
             for name, level in skill_analysis.items()
         ]
     
+    @timed_stage('upload')
     def calculate_role_matches(self, parsed_data: Dict) -> List[Dict[str, any]]:
         """Calculate top role matches with percentages"""
         skills = [s.lower() for s in parsed_data.get('skills', [])]
@@ -179,6 +186,7 @@ class ScoringEngine:
         }
         return summaries.get(role_name, "Good potential for this role based on your profile.")
     
+    @timed_stage('upload')
     def generate_next_actions(self, parsed_data: Dict, role_matches: List[Dict]) -> List[Dict[str, str]]:
         """Generate personalized next best actions"""
         skills = [s.lower() for s in parsed_data.get('skills', [])]
@@ -223,6 +231,7 @@ class ScoringEngine:
         
         return actions
     
+    @timed_stage('upload')
     def generate_insights(self, parsed_data: Dict, fit_score: int) -> List[str]:
         """Generate key insights about the resume"""
         insights = []
@@ -0,0 +1,142 @@
+"""
+Stage Timing
+Per-stage latency histograms for the upload and jobs pipelines
+"""
+
+import asyncio
+import contextvars
+import functools
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.metrics import registry
+
+# Stages range from sub-millisecond (a scoring method) to tens of seconds
+# (an upstream call), so the buckets start finer than the defaults
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+stage_duration = registry.histogram(
+    'stage_duration_seconds', "Time spent in each pipeline stage", buckets=STAGE_BUCKETS)
+request_duration = registry.histogram(
+    'http_request_duration_seconds', "Request latency by route and status", buckets=STAGE_BUCKETS)
+
+# (stage, seconds) recorded while handling the current request, for Server-Timing
+_request_stages: contextvars.ContextVar = contextvars.ContextVar('request_stages', default=None)
+
+
+class stage:
+    """Time a block as one stage of a pipeline::
+
+        with stage('upload', 'save'):
+            ...
+    """
+
+    __slots__ = ('pipeline', 'name', 'started')
+
+    def __init__(self, pipeline: str, name: str):
+        self.pipeline = pipeline
+        self.name = name
+
+    def __enter__(self) -> 'stage':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        observe_stage(self.pipeline, self.name, time.perf_counter() - self.started)
+
+
+def observe_stage(pipeline: str, name: str, seconds: float) -> None:
+    """Record a stage duration measured elsewhere"""
+    stage_duration.observe(seconds, pipeline=pipeline, stage=name)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages.append((name, seconds))
+
+
+def timed_stage(pipeline: str, name: Optional[str] = None) -> Callable:
+    """Decorator timing every call of a function (sync or async) as a stage; name defaults to the function's"""
+
+    def decorate(fn: Callable) -> Callable:
+        label = name or fn.__name__.lstrip('_')
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with stage(pipeline, label):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(pipeline, label):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+def server_timing(stages: List[Tuple[str, float]], extra: Optional[Dict[str, float]] = None) -> str:
+    """Server-Timing header value in milliseconds; repeated stages are summed"""
+    totals: Dict[str, float] = {}
+    for name, seconds in stages:
+        totals[name] = totals.get(name, 0.0) + seconds
+    totals.update(extra or {})
+    return ', '.join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in totals.items())
+
+
+def request_started_at(scope: dict) -> Optional[float]:
+    """perf_counter() value when RequestTimingMiddleware first saw the request"""
+    return scope.get('state', {}).get('started_at')
+
+
+class RequestTimingMiddleware:
+    """
+    Stamp each request's arrival time and record its latency per route
+
+    Pure ASGI (no BaseHTTPMiddleware) so it adds no task or buffering to
+    streamed responses. Handlers read the stamp via request_started_at()
+    to time work that happens before they run, such as receiving and
+    parsing a multipart upload. Latency is labelled with the route
+    template (e.g. /api/analysis/{file_id}), never the raw path.
+
+    Responses of requests that recorded stages (uploads, job
+    recommendations) carry them in a Server-Timing header, plus ``app``:
+    the time until the response started.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        scope.setdefault('state', {})['started_at'] = started
+        status = [500]
+        stages: List[Tuple[str, float]] = []
+        token = _request_stages.set(stages)
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+                if stages:
+                    value = server_timing(stages, {'app': time.perf_counter() - started})
+                    message = {**message, 'headers': [
+                        *message.get('headers', []), (b'server-timing', value.encode('latin-1'))
+                    ]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stages.reset(token)
+            route = scope.get('route')
+            request_duration.observe(
+                time.perf_counter() - started,
+                method=scope['method'],
+                route=getattr(route, 'path', 'unmatched'),
+                status=str(status[0])
+            )